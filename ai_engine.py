@@ -1,16 +1,190 @@
-import json
+import copy
+import io
 import os
-from datetime import datetime, timedelta
-import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+from urllib.parse import quote
+import joblib
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
+from functools import cached_property
+from cache import TTLCache
+import serialization
+from feature_encoding import ACTIVITY_ENCODER, ENCODERS, INTENSITY_LEVELS, to_number
+from storage import file_lock, file_signature, open_store, write_atomic
+from timeutils import from_epoch, now_ts, to_epoch
+from weather import default_weather_service
+
+
+class ActivityModel:
+    """Per-user activity clusters, updated incrementally as patterns arrive"""
+
+    def __init__(self, n_clusters=3, encoder=None):
+        self.n_clusters = n_clusters
+        # Encoding the model was fitted on, vocabularies included; a different encoding needs a refit
+        self.encoder = encoder or ACTIVITY_ENCODER
+        self.feature_names = list(self.encoder.feature_names)
+        self.scaler = StandardScaler()
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, n_init=1)
+        self.fitted = False
+        # Samples seen before there are enough to initialize the clusters
+        self.pending = []
+        # Activity type counts per cluster
+        self.cluster_activities = [Counter() for _ in range(n_clusters)]
+        # When an online update last wrote the model; None for models fitted by retrain.py
+        self.updated_at = None
+
+    def partial_fit(self, vectors, activity_types):
+        """Update the scaler and clusters with new feature vectors"""
+        if not self.fitted:
+            self.pending.extend(zip(map(list, vectors), activity_types))
+            if len(self.pending) < self.n_clusters:
+                return self
+            vectors, activity_types = zip(*self.pending)
+            self.pending = []
+
+        features = np.asarray(vectors, dtype=float)
+        self.scaler.partial_fit(features)
+        features = self.scaler.transform(features)
+        self.kmeans.partial_fit(features)
+        self.fitted = True
+        for cluster, activity_type in zip(self.kmeans.predict(features), activity_types):
+            if activity_type:
+                self.cluster_activities[cluster][activity_type] += 1
+        return self
+
+    def encode(self, patterns):
+        """Feature vectors of activity patterns in this model's encoding"""
+        return pattern_matrix(patterns, encoder=self.encoder)
+
+    def predict(self, vectors):
+        """Cluster of each feature vector"""
+        return self.kmeans.predict(self.scaler.transform(np.asarray(vectors, dtype=float)))
+
+    def recommend(self):
+        """Most common activity type of each cluster"""
+        if not self.fitted:
+            return list(dict.fromkeys(t for _, t in self.pending if t))
+        return [counts.most_common(1)[0][0] for counts in self.cluster_activities if counts]
+
+
+# Fields kept in the rolling summaries of patterns that leave the retention window
+SUMMARY_FIELDS = {
+    "activity_patterns": {"numeric": ["duration", "intensity"], "categorical": ["type", "location"]},
+    "emotion_patterns": {"numeric": ["intensity"], "categorical": ["emotion", "triggers"]},
+    "weather_patterns": {"numeric": ["temperature", "humidity"], "categorical": ["condition"]},
+}
+
+
+def fold_pattern(summary, kind, pattern):
+    """Add one pattern to a rolling summary: counts, running means and histograms"""
+    summary["count"] = summary.get("count", 0) + 1
+    timestamp = pattern.get("time_of_day")
+    if isinstance(timestamp, (int, float)):
+        summary["first"] = min(summary.get("first", timestamp), timestamp)
+        summary["last"] = max(summary.get("last", timestamp), timestamp)
+        hours = summary.setdefault("hours", {})
+        hour = str(from_epoch(timestamp).hour)
+        hours[hour] = hours.get(hour, 0) + 1
+
+    means = summary.setdefault("means", {})
+    for field in SUMMARY_FIELDS[kind]["numeric"]:
+        if pattern.get(field) is None:
+            continue
+        stat = means.setdefault(field, {"n": 0, "mean": 0.0})
+        stat["n"] += 1
+        stat["mean"] += (to_number(pattern[field], INTENSITY_LEVELS) - stat["mean"]) / stat["n"]
+
+    histograms = summary.setdefault("histograms", {})
+    for field in SUMMARY_FIELDS[kind]["categorical"]:
+        values = pattern.get(field)
+        if values is None:
+            continue
+        histogram = histograms.setdefault(field, {})
+        for value in values if isinstance(values, list) else [values]:
+            histogram[str(value)] = histogram.get(str(value), 0) + 1
+    return summary
+
+
+def pattern_matrix(patterns, kind="activity_patterns", encoder=None):
+    """Encoded vectors of patterns; vectors stored at ingest are reused when encoder is the default one"""
+    encoder = encoder or ENCODERS[kind]
+    # Stored vectors use the default vocabularies, so a fitted encoder re-encodes
+    stored = encoder.feature_names == ENCODERS[kind].feature_names
+    matrix = np.empty((len(patterns), encoder.width))
+    missing = []
+    for i, pattern in enumerate(patterns):
+        vector = pattern.get("features") if stored else None
+        if vector is not None and len(vector) == encoder.width:
+            matrix[i] = vector
+        else:
+            missing.append(i)
+    if missing:
+        matrix[missing] = encoder.encode_many([patterns[i] for i in missing])
+    return matrix
+
+
+def fit_activity_model(patterns):
+    """A fresh ActivityModel fitted on a list of activity patterns, with the activity types and locations they use"""
+    model = ActivityModel(encoder=ACTIVITY_ENCODER.fit(patterns))
+    return model.partial_fit(model.encode(patterns), [p.get("type") for p in patterns])
+
+
+def frequent_activities(patterns, n=3):
+    """The n most common activity types, for users without a fitted model"""
+    return [t for t, _ in Counter(p.get("type") for p in patterns if p.get("type")).most_common(n)]
+
+
+def model_filename(user_id):
+    return quote(str(user_id), safe="") + ".joblib"
+
+
+def write_activity_model(path, model):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    write_atomic(path, buffer.getvalue())
+
+
+def read_activity_model(path):
+    """A persisted ActivityModel, or None if it was fitted on another encoding"""
+    with open(path, 'rb') as f:
+        model = joblib.load(f)
+    encoder = getattr(model, "encoder", None)
+    if encoder is None or not encoder.extends(ACTIVITY_ENCODER) or model.feature_names != encoder.feature_names:
+        return None
+    return model
+
 
 class AIEngine:
     def __init__(self):
         self.ai_data_file = "ai_data.json"
-        self.ai_data = self._load_ai_data()
+        self._store = open_store(self.ai_data_file)
+        self.models_dir = "ai_models"
+        # Mutable working area for online updates; published versions are never written after retrain.py
+        self.live_models_dir = os.path.join(self.models_dir, "live")
+        # (file signature, model directory, snapshot time) of the version published by retrain.py
+        self._model_version = (None, self.models_dir, 0)
+        # path -> (file signature, ActivityModel) of models read from disk
+        self._models = {}
+        # user_id -> ActivityModel updated inside batch(), written once when it exits
+        self._dirty_models = {}
+        self._batch_depth = 0
+        # Raw patterns kept per user and kind; older ones are folded into summaries
+        self.pattern_retention = int(os.getenv("FORMAMIND_PATTERN_RETENTION", 500))
+        # Days of per-day emotion counters kept for analyze_emotion_patterns
+        self.emotion_days_retention = int(os.getenv("FORMAMIND_EMOTION_DAYS", 400))
+        # (user_id, emotion, weather class) -> recommendations, dropped when the user's patterns
+        # change and cleared when a new model version is published; callers get copies
+        self.recommendation_cache = TTLCache(
+            maxsize=int(os.getenv("FORMAMIND_RECOMMENDATION_CACHE_SIZE", 10000)),
+            ttl=float(os.getenv("FORMAMIND_RECOMMENDATION_CACHE_TTL", 900))
+        )
         self.weather_api_key = os.getenv("WEATHER_API_KEY")
+        # Cached weather lookups for callers that pass a location instead of weather
+        self.weather = default_weather_service()
         self.emotion_patterns = {
             "happy": ["exercise", "social", "creative"],
             "sad": ["rest", "self_care", "social"],
@@ -19,57 +193,290 @@ class AIEngine:
             "energetic": ["exercise", "creative", "social"]
         }
 
+    @cached_property
+    def ai_data(self):
+        """AI data, loaded from disk on first access"""
+        return self._load_ai_data()
+
     def _load_ai_data(self):
         """Load AI data from JSON file"""
-        if os.path.exists(self.ai_data_file):
-            with open(self.ai_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
+        return self._store.load({
             "user_patterns": {},
             "activity_recommendations": {},
             "weather_adaptations": {},
             "emotion_insights": {}
-        }
+        })
 
-    def _save_ai_data(self):
+    def _save_ai_data(self, *paths):
         """Save AI data to JSON file"""
-        with open(self.ai_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.ai_data, f, ensure_ascii=False, indent=4)
+        self._store.save(self.ai_data, *paths)
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single save; updated activity models are written once on exit"""
+        self._batch_depth += 1
+        try:
+            with self._store.batch():
+                yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_models()
+
+    def _flush_models(self):
+        """Write the activity models updated inside a batch, once per user"""
+        dirty, self._dirty_models = self._dirty_models, {}
+        for user_id, model in dirty.items():
+            path = self._live_model_path(user_id)
+            with file_lock(path):
+                write_activity_model(path, model)
+                self._models[path] = (file_signature(path), model)
 
     def learn_user_patterns(self, user_id, activity_data, emotion_data, weather_data):
         """Learn patterns from user's activity and emotion data"""
+        # Extracted before anything is stored, so invalid input leaves no trace
+        activity_features = self._extract_activity_features(activity_data)
+        emotion_features = self._extract_emotion_features(emotion_data)
+        weather_features = self._extract_weather_features(weather_data)
+
+        changed = []
         if user_id not in self.ai_data["user_patterns"]:
             self.ai_data["user_patterns"][user_id] = {
                 "activity_patterns": [],
                 "emotion_patterns": [],
-                "weather_patterns": []
+                "weather_patterns": [],
+                "emotion_days": {}
             }
+            changed.append(("user_patterns", user_id))
 
         # Process activity patterns
-        activity_features = self._extract_activity_features(activity_data)
         if activity_features:
-            self.ai_data["user_patterns"][user_id]["activity_patterns"].append(activity_features)
+            self._add_pattern(user_id, "activity_patterns", activity_features, changed)
+            self._update_activity_model(user_id, [activity_features])
 
         # Process emotion patterns
-        emotion_features = self._extract_emotion_features(emotion_data)
         if emotion_features:
-            self.ai_data["user_patterns"][user_id]["emotion_patterns"].append(emotion_features)
+            self._count_emotion(user_id, emotion_features, changed)
+            self._add_pattern(user_id, "emotion_patterns", emotion_features, changed)
 
         # Process weather patterns
-        weather_features = self._extract_weather_features(weather_data)
         if weather_features:
-            self.ai_data["user_patterns"][user_id]["weather_patterns"].append(weather_features)
+            self._add_pattern(user_id, "weather_patterns", weather_features, changed)
 
-        self._save_ai_data()
+        if changed:
+            self._save_ai_data(*changed)
+            self.recommendation_cache.invalidate(user_id)
         return True
 
+    def _add_pattern(self, user_id, kind, pattern, changed):
+        """
+        Store a pattern with its encoded vector, computed once here at ingest.
+
+        Each kind of pattern is a ring buffer of pattern_retention slots: once
+        full, the oldest pattern is folded into the rolling summary and its
+        slot is overwritten, so only that slot, the head and the summary are
+        written back.
+        """
+        pattern["features"] = ENCODERS[kind].encode(pattern)
+        user_patterns = self.ai_data["user_patterns"][user_id]
+        patterns = user_patterns[kind]
+        if len(patterns) > self.pattern_retention:
+            self._trim_patterns(user_id, kind)
+            changed.append(("user_patterns", user_id))
+
+        if len(patterns) < self.pattern_retention:
+            patterns.append(pattern)
+            changed.append(("user_patterns", user_id, kind, -1))
+            return
+
+        heads = user_patterns.setdefault("ring_heads", {})
+        head = heads.get(kind, 0) % len(patterns)
+        fold_pattern(user_patterns.setdefault("summaries", {}).setdefault(kind, {}), kind, patterns[head])
+        patterns[head] = pattern
+        heads[kind] = (head + 1) % len(patterns)
+        changed.extend([
+            ("user_patterns", user_id, kind, head),
+            ("user_patterns", user_id, "ring_heads", kind),
+            ("user_patterns", user_id, "summaries", kind)
+        ])
+
+    def _ordered_patterns(self, user_id, kind):
+        """A user's retained patterns of one kind, oldest first"""
+        user_patterns = self.ai_data["user_patterns"][user_id]
+        patterns = user_patterns[kind]
+        head = user_patterns.get("ring_heads", {}).get(kind, 0) % max(len(patterns), 1)
+        return patterns[head:] + patterns[:head]
+
+    def _trim_patterns(self, user_id, kind):
+        """Fold patterns beyond the retention window (history from before it, or a smaller window) into the summary"""
+        user_patterns = self.ai_data["user_patterns"][user_id]
+        ordered = self._ordered_patterns(user_id, kind)
+        excess = len(ordered) - self.pattern_retention
+        summary = user_patterns.setdefault("summaries", {}).setdefault(kind, {})
+        for pattern in ordered[:excess]:
+            fold_pattern(summary, kind, pattern)
+        user_patterns[kind][:] = ordered[excess:]
+        user_patterns.setdefault("ring_heads", {})[kind] = 0
+
+    def _emotion_days(self, user_id, changed):
+        """The user's per-day emotion counters, built once from retained patterns for older data"""
+        user_patterns = self.ai_data["user_patterns"][user_id]
+        if "emotion_days" not in user_patterns:
+            user_patterns["emotion_days"] = {}
+            for pattern in user_patterns["emotion_patterns"]:
+                self._count_emotion(user_id, pattern, [])
+            changed.append(("user_patterns", user_id, "emotion_days"))
+        return user_patterns["emotion_days"]
+
+    def _count_emotion(self, user_id, pattern, changed):
+        """Add an emotion pattern to the counters of its day, dropping days past the retention"""
+        timestamp = pattern.get("time_of_day")
+        if timestamp is None:
+            return
+        emotion_days = self._emotion_days(user_id, changed)
+        moment = from_epoch(timestamp)
+        day = moment.date().isoformat()
+        if day not in emotion_days:
+            cutoff = (date.today() - timedelta(days=self.emotion_days_retention)).isoformat()
+            for old_day in [d for d in emotion_days if d < cutoff]:
+                del emotion_days[old_day]
+                changed.append(("user_patterns", user_id, "emotion_days", old_day))
+            if day < cutoff:
+                return
+        bucket = emotion_days.setdefault(day, {"emotions": {}, "triggers": {}, "hours": {}, "intensity": {}})
+
+        emotion = pattern.get("emotion")
+        if emotion:
+            bucket["emotions"][emotion] = bucket["emotions"].get(emotion, 0) + 1
+        for trigger in pattern.get("triggers") or []:
+            bucket["triggers"][trigger] = bucket["triggers"].get(trigger, 0) + 1
+        time_slot = f"{moment.hour:02d}:00"
+        bucket["hours"][time_slot] = bucket["hours"].get(time_slot, 0) + 1
+        intensity = pattern.get("intensity")
+        if intensity:
+            # [sum, count] per emotion, for the day's mean intensity
+            total = bucket["intensity"].setdefault(str(emotion), [0, 0])
+            total[0] += to_number(intensity, INTENSITY_LEVELS)
+            total[1] += 1
+        changed.append(("user_patterns", user_id, "emotion_days", day))
+
+    def get_pattern_summary(self, user_id, kind="activity_patterns"):
+        """Long-term summary of a kind of pattern: folded history plus the retained window"""
+        if user_id not in self.ai_data["user_patterns"]:
+            return None
+        user_patterns = self.ai_data["user_patterns"][user_id]
+        summary = copy.deepcopy(user_patterns.get("summaries", {}).get(kind, {}))
+        for pattern in user_patterns[kind]:
+            fold_pattern(summary, kind, pattern)
+        return summary
+
+    def _published_version(self):
+        """(directory, snapshot time) of the current model version; models_dir itself until retrain.py publishes one"""
+        current = os.path.join(self.models_dir, "current.json")
+        signature = file_signature(current)
+        if signature != self._model_version[0]:
+            directory, snapshot_at = self.models_dir, 0
+            if signature is not None:
+                with open(current, 'rb') as f:
+                    version = serialization.loads(f.read())
+                directory = os.path.join(self.models_dir, version["version"])
+                snapshot_at = version.get("snapshot_at", version.get("published_at", 0))
+            self._model_version = (signature, directory, snapshot_at)
+            # Cached results came from the previous version's models
+            self.recommendation_cache.clear()
+        return self._model_version[1:]
+
+    def _model_path(self, user_id):
+        return os.path.join(self._published_version()[0], model_filename(user_id))
+
+    def _live_model_path(self, user_id):
+        return os.path.join(self.live_models_dir, model_filename(user_id))
+
+    def _read_model(self, path):
+        """The ActivityModel at path, re-read only when the file changed; None if missing or unusable"""
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        cached = self._models.get(path)
+        if cached is None or cached[0] != signature:
+            model = read_activity_model(path)
+            if model is None:
+                return None
+            cached = (signature, model)
+            self._models[path] = cached
+        return cached[1]
+
+    def _update_activity_model(self, user_id, patterns):
+        """Fold new activity patterns into the user's live model; inside batch() it is written on exit"""
+        model = self._dirty_models.get(user_id)
+        if model is not None:
+            # Already copied and pending a write for this batch
+            model.partial_fit(model.encode(patterns), [p.get("type") for p in patterns])
+            model.updated_at = now_ts()
+            return model
+
+        path = self._live_model_path(user_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with file_lock(path):
+            model = self._get_activity_model(user_id)
+            if model is None:
+                # New users, history from before per-user models, or a changed encoding: fit once on everything
+                model = fit_activity_model(self.ai_data["user_patterns"][user_id]["activity_patterns"])
+            else:
+                # The base may be the published model, which stays as retrain.py wrote it
+                model = copy.deepcopy(model)
+                model.partial_fit(model.encode(patterns), [p.get("type") for p in patterns])
+            model.updated_at = now_ts()
+            if self._batch_depth:
+                self._dirty_models[user_id] = model
+            else:
+                write_activity_model(path, model)
+                self._models[path] = (file_signature(path), model)
+        return model
+
+    def _get_activity_model(self, user_id):
+        """
+        The user's model, or None if there is no usable one.
+
+        Read-only: models are fitted on ingest and by the nightly retrain.py job,
+        never while serving. The live model wins when it was updated after the
+        published version took its snapshot of the patterns, since it then
+        holds patterns the version is missing; otherwise the refit published
+        model is used. Files are re-read only when they changed on disk; a model
+        updated inside an open batch() is used before it is written.
+        """
+        if user_id in self._dirty_models:
+            return self._dirty_models[user_id]
+        snapshot_at = self._published_version()[1]
+        live = self._read_model(self._live_model_path(user_id))
+        if live is not None and (getattr(live, "updated_at", None) or 0) >= snapshot_at:
+            return live
+        published = self._read_model(self._model_path(user_id))
+        return published if published is not None else live
+
+    def _cluster_activities(self, user_id):
+        """Activities from the user's clusters, or their most frequent ones without a model"""
+        model = self._get_activity_model(user_id)
+        if model is not None:
+            return model.recommend()
+        return frequent_activities(self.ai_data["user_patterns"][user_id]["activity_patterns"])
+
+    def _timestamp(self, value):
+        """Normalize an incoming time to epoch seconds, keeping None"""
+        if value is None:
+            return None
+        try:
+            return to_epoch(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"time_of_day must be epoch seconds, a datetime or an ISO date string, not {value!r}") from None
+
     def _extract_activity_features(self, activity_data):
         """Extract features from activity data"""
         if not activity_data:
             return None
 
         features = {
-            "time_of_day": activity_data.get("time_of_day"),
+            "time_of_day": self._timestamp(activity_data.get("time_of_day")),
             "duration": activity_data.get("duration"),
             "intensity": activity_data.get("intensity"),
             "type": activity_data.get("type"),
@@ -86,7 +493,7 @@ class AIEngine:
             "emotion": emotion_data.get("emotion"),
             "intensity": emotion_data.get("intensity"),
             "triggers": emotion_data.get("triggers"),
-            "time_of_day": emotion_data.get("time_of_day")
+            "time_of_day": self._timestamp(emotion_data.get("time_of_day"))
         }
         return features
 
@@ -99,19 +506,26 @@ class AIEngine:
             "temperature": weather_data.get("temperature"),
             "condition": weather_data.get("condition"),
             "humidity": weather_data.get("humidity"),
-            "time_of_day": weather_data.get("time_of_day")
+            "time_of_day": self._timestamp(weather_data.get("time_of_day"))
         }
         return features
 
-    def get_personalized_recommendations(self, user_id, current_emotion, current_weather):
-        """Get personalized recommendations based on user patterns"""
+    def get_personalized_recommendations(self, user_id, current_emotion, current_weather=None, location=None):
+        """Get personalized recommendations based on user patterns; weather can be looked up from a (lat, lon) location"""
         if user_id not in self.ai_data["user_patterns"]:
             return self._get_default_recommendations(current_emotion)
+        if current_weather is None:
+            current_weather = self._weather_for([location])[0]
+
+        # Results only depend on the weather through its class, so similar weather shares an entry
+        cache_key = (user_id, current_emotion, self._weather_classes([current_weather])[0])
+        self._published_version()
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
 
-        user_patterns = self.ai_data["user_patterns"][user_id]
-        
         # Get activity recommendations based on patterns
-        activity_recs = self._get_activity_recommendations(user_patterns, current_emotion)
+        activity_recs = self._get_activity_recommendations(user_id, current_emotion)
         
         # Adapt recommendations based on weather
         weather_adapted_recs = self._adapt_to_weather(activity_recs, current_weather)
@@ -119,32 +533,104 @@ class AIEngine:
         # Add emotion-specific recommendations
         emotion_recs = self._get_emotion_recommendations(current_emotion)
         
-        return {
+        recommendations = {
             "activities": weather_adapted_recs,
             "emotion_support": emotion_recs,
             "weather_considerations": self._get_weather_considerations(current_weather)
         }
+        self.recommendation_cache.set(cache_key, copy.deepcopy(recommendations), tag=user_id)
+        return recommendations
+
+    def recommendation_cache_stats(self):
+        """Hit/miss counters and size of the recommendation cache"""
+        return self.recommendation_cache.stats()
+
+    def get_personalized_recommendations_batch(self, user_ids, emotions, weather=None, locations=None):
+        """
+        Recommendations for many users, yielded as (user_id, recommendations) pairs in user_ids order.
+
+        emotions and weather are either one value for everyone or a list aligned
+        with user_ids; instead of weather, (lat, lon) locations can be given the
+        same way and are looked up once per area. Activity models come from the
+        same in-process cache as get_personalized_recommendations, so a warm
+        batch reads no model files. Timing of the finished run is kept in
+        self.batch_stats.
+        """
+        start = time.perf_counter()
+        user_ids = list(user_ids)
+        emotions = self._per_user(emotions, str, user_ids, "emotions")
+        if weather is None:
+            if locations is None:
+                raise ValueError("Either weather or locations is required")
+            weather = self._weather_for(self._per_user(locations, tuple, user_ids, "locations"))
+        weather = self._per_user(weather, dict, user_ids, "weather")
+
+        # Weather classes for everyone at once; adaptations, considerations and
+        # emotion support are then looked up once per distinct class or emotion
+        classes = self._weather_classes(weather)
+        representative = {cls: weather[i] for i, cls in reversed(list(enumerate(classes)))}
+        considerations = {cls: self._get_weather_considerations(w) for cls, w in representative.items()}
+        adaptations = {cls: {} for cls in representative}
+        emotion_recs = {emotion: self._get_emotion_recommendations(emotion) for emotion in set(emotions)}
+        user_patterns = self.ai_data["user_patterns"]
+
+        for user_id, emotion, cls in zip(user_ids, emotions, classes):
+            if user_id not in user_patterns:
+                yield user_id, self._get_default_recommendations(emotion)
+                continue
+            adapted = adaptations[cls]
+            activities = []
+            for rec in self._merge_recommendations(self._cluster_activities(user_id), emotion):
+                if rec not in adapted:
+                    adapted[rec] = self._adapt_to_weather([rec], representative[cls])[0]
+                activities.append(adapted[rec])
+            # Shared per emotion and class, so every user gets their own copy
+            yield user_id, {
+                "activities": activities,
+                "emotion_support": copy.deepcopy(emotion_recs[emotion]),
+                "weather_considerations": list(considerations[cls])
+            }
+
+        elapsed = time.perf_counter() - start
+        self.batch_stats = {
+            "users": len(user_ids),
+            "seconds": elapsed,
+            "users_per_second": len(user_ids) / elapsed if elapsed else 0.0
+        }
 
-    def _get_activity_recommendations(self, user_patterns, current_emotion):
+    def _per_user(self, value, single_type, user_ids, name):
+        """value repeated for every user, or a list checked to have one entry per user"""
+        if isinstance(value, single_type):
+            return [value] * len(user_ids)
+        values = list(value)
+        if len(values) != len(user_ids):
+            raise ValueError(f"{name} has {len(values)} entries for {len(user_ids)} users")
+        return values
+
+    def _weather_for(self, locations):
+        """Current weather for (lat, lon) locations through the cached weather service"""
+        if self.weather is None:
+            raise ValueError("No weather given and no weather service configured "
+                             "(set WEATHER_API_KEY or FORMAMIND_WEATHER_FILE)")
+        if any(location is None for location in locations):
+            raise ValueError("Either weather or a (lat, lon) location is required")
+        return self.weather.get_many_sync(locations)
+
+    def _weather_classes(self, weather):
+        """Vectorized weather class per entry: wet, hot, cold or mild"""
+        conditions = np.array([w["condition"] for w in weather], dtype=object)
+        temperatures = np.array([w["temperature"] for w in weather], dtype=float)
+        wet = np.isin(conditions, ["rain", "snow"])
+        return np.select([wet, temperatures > 30, temperatures < 10], ["wet", "hot", "cold"], "mild").tolist()
+
+    def _get_activity_recommendations(self, user_id, current_emotion):
         """Get activity recommendations based on user patterns"""
-        recommendations = []
-        
-        # Analyze activity patterns
-        if user_patterns["activity_patterns"]:
-            # Use K-means clustering to find common patterns
-            features = np.array([list(p.values()) for p in user_patterns["activity_patterns"]])
-            scaler = StandardScaler()
-            features_scaled = scaler.fit_transform(features)
-            
-            kmeans = KMeans(n_clusters=min(3, len(features_scaled)))
-            clusters = kmeans.fit_predict(features_scaled)
-            
-            # Get most common activities in each cluster
-            for cluster in range(kmeans.n_clusters):
-                cluster_activities = [p["type"] for i, p in enumerate(user_patterns["activity_patterns"])
-                                    if clusters[i] == cluster]
-                if cluster_activities:
-                    recommendations.append(random.choice(cluster_activities))
+        # Most common activity of each of the user's activity clusters
+        return self._merge_recommendations(self._cluster_activities(user_id), current_emotion)
+
+    def _merge_recommendations(self, cluster_recs, current_emotion):
+        """Combine cluster activities with the emotion's activities"""
+        recommendations = list(cluster_recs)
 
         # Add emotion-based recommendations
         if current_emotion in self.emotion_patterns:
@@ -231,60 +717,53 @@ class AIEngine:
     def _get_default_recommendations(self, emotion):
         """Get default recommendations when no user patterns exist"""
         return {
-            "activities": self.emotion_patterns.get(emotion, ["walking", "meditation", "reading"]),
+            "activities": list(self.emotion_patterns.get(emotion, ["walking", "meditation", "reading"])),
             "emotion_support": self._get_emotion_recommendations(emotion),
             "weather_considerations": []
         }
 
     def analyze_emotion_patterns(self, user_id, days=30):
-        """Analyze emotion patterns over time"""
+        """
+        Analyze emotion patterns over the last `days` calendar days, today included.
+
+        Merges the per-day counters kept by learn_user_patterns, so the cost
+        depends on the number of days, not on the number of recorded emotions.
+        Only emotion_days_retention days are kept, so longer windows are capped;
+        "days" holds the number of days actually covered. intensity_trends holds
+        each emotion's mean intensity per day, oldest first.
+        """
         if user_id not in self.ai_data["user_patterns"]:
             return None
 
-        emotion_patterns = self.ai_data["user_patterns"][user_id]["emotion_patterns"]
-        if not emotion_patterns:
-            return None
-
-        # Filter patterns for the specified time period
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        recent_patterns = [p for p in emotion_patterns
-                         if start_date <= datetime.strptime(p.get("time_of_day", ""), "%Y-%m-%d %H:%M:%S") <= end_date]
-
-        if not recent_patterns:
-            return None
+        changed = []
+        emotion_days = self._emotion_days(user_id, changed)
+        if changed:
+            self._save_ai_data(*changed)
 
         # Analyze patterns
+        days = min(days, self.emotion_days_retention)
         analysis = {
+            "days": days,
             "emotion_frequency": {},
             "common_triggers": {},
             "time_patterns": {},
             "intensity_trends": {}
         }
 
-        for pattern in recent_patterns:
-            # Count emotion frequencies
-            emotion = pattern.get("emotion")
-            if emotion:
-                analysis["emotion_frequency"][emotion] = analysis["emotion_frequency"].get(emotion, 0) + 1
-
-            # Analyze triggers
-            triggers = pattern.get("triggers", [])
-            for trigger in triggers:
-                analysis["common_triggers"][trigger] = analysis["common_triggers"].get(trigger, 0) + 1
-
-            # Analyze time patterns
-            time = pattern.get("time_of_day")
-            if time:
-                hour = datetime.strptime(time, "%Y-%m-%d %H:%M:%S").hour
-                time_slot = f"{hour:02d}:00"
-                analysis["time_patterns"][time_slot] = analysis["time_patterns"].get(time_slot, 0) + 1
-
-            # Track intensity trends
-            intensity = pattern.get("intensity")
-            if intensity:
-                if emotion not in analysis["intensity_trends"]:
-                    analysis["intensity_trends"][emotion] = []
-                analysis["intensity_trends"][emotion].append(intensity)
-
-        return analysis 
\ No newline at end of file
+        today = date.today()
+        found = False
+        for offset in range(days - 1, -1, -1):
+            bucket = emotion_days.get((today - timedelta(days=offset)).isoformat())
+            if bucket is None:
+                continue
+            found = True
+            for table, counts in (("emotion_frequency", bucket["emotions"]),
+                                  ("common_triggers", bucket["triggers"]),
+                                  ("time_patterns", bucket["hours"])):
+                merged = analysis[table]
+                for key, count in counts.items():
+                    merged[key] = merged.get(key, 0) + count
+            for emotion, (total, count) in bucket["intensity"].items():
+                analysis["intensity_trends"].setdefault(emotion, []).append(total / count)
+
+        return analysis if found else None 
\ No newline at end of file
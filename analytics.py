@@ -1,13 +1,22 @@
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import defaultdict
+from journal import JournalManager
+from rewards import RewardSystem
+from timeutils import days_ago, from_epoch
+from user_profile import UserProfile
 
 class Analytics:
-    def __init__(self):
+    def __init__(self, user_profiles=None, journals=None, rewards=None):
         self.data_dir = "analytics_data"
+        # Data is read through the managers so the configured backend and the
+        # per-user shards are used; pass shared instances to avoid reloading
+        self.user_profiles = user_profiles if user_profiles is not None else UserProfile()
+        self.journals = journals if journals is not None else JournalManager()
+        self.rewards = rewards if rewards is not None else RewardSystem()
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
@@ -32,16 +41,10 @@ class Analytics:
     def _analyze_workouts(self, user_id, days):
         """Analyze workout data"""
         try:
-            with open('user_profiles.json', 'r', encoding='utf-8') as f:
-                profiles = json.load(f)
-            
-            if user_id not in profiles:
+            if self.user_profiles.get_profile(user_id) is None:
                 return {}
             
-            workouts = profiles[user_id].get('workout_history', [])
-            recent_workouts = [w for w in workouts if 
-                             datetime.strptime(w['date'], "%Y-%m-%d %H:%M:%S") >= 
-                             datetime.now() - timedelta(days=days)]
+            recent_workouts = self.user_profiles.get_workout_history_range(user_id, start=days_ago(days))
             
             stats = {
                 "total_workouts": len(recent_workouts),
@@ -53,7 +56,7 @@ class Analytics:
             
             for workout in recent_workouts:
                 stats["workout_types"][workout['type']] += 1
-                stats["weekly_distribution"][datetime.strptime(workout['date'], "%Y-%m-%d %H:%M:%S").strftime("%A")] += 1
+                stats["weekly_distribution"][from_epoch(workout['date']).strftime("%A")] += 1
             
             if recent_workouts:
                 stats["average_duration"] = stats["total_duration"] / len(recent_workouts)
@@ -66,16 +69,10 @@ class Analytics:
     def _analyze_moods(self, user_id, days):
         """Analyze mood data"""
         try:
-            with open('journals.json', 'r', encoding='utf-8') as f:
-                journals = json.load(f)
-            
-            if user_id not in journals:
+            if user_id not in self.journals.journals:
                 return {}
             
-            entries = journals[user_id]
-            recent_entries = [e for e in entries if 
-                            datetime.strptime(e['date'], "%Y-%m-%d %H:%M:%S") >= 
-                            datetime.now() - timedelta(days=days)]
+            recent_entries = self.journals.get_entries(user_id, days=days)
             
             stats = {
                 "mood_distribution": defaultdict(int),
@@ -121,10 +118,7 @@ class Analytics:
     def _analyze_goals(self, user_id):
         """Analyze goals progress"""
         try:
-            with open('journals.json', 'r', encoding='utf-8') as f:
-                journals = json.load(f)
-            
-            if user_id not in journals:
+            if user_id not in self.journals.journals:
                 return {}
             
             stats = {
@@ -134,11 +128,10 @@ class Analytics:
                 "goals_by_category": defaultdict(int)
             }
             
-            for entry in journals[user_id]:
-                for goal in entry.get('goals', []):
-                    stats["total_goals"] += 1
-                    if goal.get('completed', False):
-                        stats["completed_goals"] += 1
+            for goal in self.journals.get_goals_progress(user_id):
+                stats["total_goals"] += 1
+                if goal['completed']:
+                    stats["completed_goals"] += 1
             
             if stats["total_goals"] > 0:
                 stats["completion_rate"] = (stats["completed_goals"] / stats["total_goals"]) * 100
@@ -151,13 +144,11 @@ class Analytics:
     def _analyze_streaks(self, user_id):
         """Analyze user streaks"""
         try:
-            with open('rewards.json', 'r', encoding='utf-8') as f:
-                rewards = json.load(f)
-            
-            if user_id not in rewards:
+            status = self.rewards.get_user_status(user_id)
+            if not status:
                 return {}
             
-            return rewards[user_id].get('streaks', {})
+            return status['streaks']
         except Exception as e:
             print(f"Error analyzing streaks: {e}")
             return {}
@@ -194,7 +185,7 @@ class Analytics:
         mood_stats = self._analyze_moods(user_id, days)
         if mood_stats.get("mood_trend"):
             plt.figure(figsize=(10, 6))
-            dates = [datetime.strptime(m["date"], "%Y-%m-%d %H:%M:%S") for m in mood_stats["mood_trend"]]
+            dates = [from_epoch(m["date"]) for m in mood_stats["mood_trend"]]
             moods = [m["mood"] for m in mood_stats["mood_trend"]]
             plt.plot(dates, moods)
             plt.title("Mood Trend")
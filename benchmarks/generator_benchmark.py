@@ -0,0 +1,44 @@
+"""
+Row-by-row generate_dataset against the vectorized generate_dataset_batch.
+
+    python benchmarks/generator_benchmark.py --rows 20000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generator import WorkoutDataGenerator
+
+
+def run(rows):
+    generator = WorkoutDataGenerator()
+    start = time.perf_counter()
+    generator.generate_dataset(rows)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    workouts = generator.generate_dataset_batch(rows, seed=42)
+    batch = time.perf_counter() - start
+    start = time.perf_counter()
+    generator.generate_exercises_batch(workouts, seed=43)
+    exercises = time.perf_counter() - start
+    return {"rows": rows, "loop_s": loop, "batch_s": batch, "batch_with_exercises_s": batch + exercises}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9}{'loop (s)':>11}{'batch (s)':>11}{'+exercises (s)':>16}{'speedup':>9}")
+    for rows in args.rows:
+        r = run(rows)
+        print(f"{r['rows']:>9}{r['loop_s']:>11.2f}{r['batch_s']:>11.3f}{r['batch_with_exercises_s']:>16.3f}"
+              f"{r['loop_s'] / r['batch_with_exercises_s']:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Synthetic datasets shaped like the managers' on-disk data, for benchmarks.
+
+Every generator is seeded and returns data in the same JSON shape the
+corresponding manager stores, with epoch-second timestamps. write_dataset()
+lays the files out in a directory exactly where the managers look for them.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generator import WorkoutDataGenerator
+from storage import ShardedStore, open_store
+from timeutils import DAY, now_ts
+
+MOODS = ["happy", "sad", "stressed", "calm", "tired", "energetic"]
+WORKOUT_TYPES = ["cardio", "strength", "flexibility", "hiit", "yoga"]
+TICKET_CATEGORIES = ["general", "account", "workout", "mindfulness", "nutrition", "technical", "privacy"]
+
+
+def _history_dates(rng, count, days=365):
+    """Sorted epoch timestamps spread over the last `days` days"""
+    now = now_ts()
+    return sorted(now - rng.randint(0, days * DAY) for _ in range(count))
+
+
+def user_ids(users):
+    """Ids shared by every generator, so datasets line up across managers"""
+    return [f"user_{i}" for i in range(users)]
+
+
+def generate_profiles(users, history=5, seed=42):
+    """UserProfile data with `history` workout and emotion records per user"""
+    rng = random.Random(seed)
+    now = now_ts()
+    profiles = {}
+    for user_id in user_ids(users):
+        profiles[user_id] = {
+            "name": user_id.replace("_", " ").title(),
+            "age": rng.randint(18, 70),
+            "gender": rng.choice(["male", "female"]),
+            "weight": round(rng.uniform(50, 110), 1),
+            "height": rng.randint(150, 200),
+            "language": rng.choice(["en", "fa"]),
+            "created_at": now,
+            "last_updated": now,
+            "workout_history": [
+                {"date": date, "type": rng.choice(WORKOUT_TYPES), "duration": rng.randint(10, 90),
+                 "intensity": rng.randint(1, 10), "notes": ""}
+                for date in _history_dates(rng, history)
+            ],
+            "emotion_history": [
+                {"date": date, "emotion": rng.choice(MOODS), "intensity": rng.randint(1, 10), "notes": ""}
+                for date in _history_dates(rng, history)
+            ],
+            "goals": [],
+            "achievements": []
+        }
+    return profiles
+
+
+def generate_journals(users, entries=5, seed=42):
+    """JournalManager data: `entries` time-ordered entries per user"""
+    rng = random.Random(seed)
+    journals = {}
+    for user_id in user_ids(users):
+        journals[user_id] = [
+            {"date": date, "mood": rng.choice(MOODS), "content": "Synthetic journal entry",
+             "tags": rng.sample(["work", "family", "health", "sleep"], rng.randint(0, 2)),
+             "gratitude_list": ["sunshine"] if rng.random() < 0.5 else [],
+             "goals": [{"text": "Walk more", "completed": rng.random() < 0.5, "date": date}],
+             "reflections": []}
+            for date in _history_dates(rng, entries, days=60)
+        ]
+    return journals
+
+
+def generate_social(users, posts_per_user=1, seed=42):
+    """SocialSystem data with posts, comments and friend lists"""
+    rng = random.Random(seed)
+    ids = user_ids(users)
+    posts = {}
+    for user_id in ids:
+        for n in range(posts_per_user):
+            post_id = f"post_{user_id}_{n}"
+            posts[post_id] = {
+                "id": post_id, "user_id": user_id, "content": "Synthetic post", "media_url": None,
+                "visibility": rng.choice(["public", "friends"]), "created_at": now_ts() - rng.randint(0, 30 * DAY),
+                "likes": rng.sample(ids, min(3, len(ids))),
+                "comments": [{"id": f"c_{post_id}", "user_id": rng.choice(ids), "content": "Nice",
+                              "created_at": now_ts(), "likes": []}]
+            }
+    friends = {user_id: rng.sample(ids, min(5, len(ids))) for user_id in ids}
+    return {"challenges": {}, "groups": {}, "posts": posts, "friends": friends, "comments": {}}
+
+
+def generate_support(users, tickets_per_user=1, seed=42):
+    """SupportSystem data with tickets and responses"""
+    rng = random.Random(seed)
+    tickets = {}
+    for user_id in user_ids(users):
+        for n in range(tickets_per_user):
+            ticket_id = f"ticket_{user_id}_{n}"
+            created = now_ts() - rng.randint(0, 90 * DAY)
+            tickets[ticket_id] = {
+                "id": ticket_id, "user_id": user_id, "subject": "Synthetic ticket", "description": "Details",
+                "category": rng.choice(TICKET_CATEGORIES), "priority": rng.choice(["low", "medium", "high"]),
+                "status": rng.choice(["open", "in_progress", "resolved", "closed"]),
+                "created_at": created, "updated_at": created,
+                "responses": [{"id": f"r_{ticket_id}", "user_id": "staff", "message": "On it",
+                               "is_staff": True, "created_at": created}]
+            }
+    return {"tickets": tickets, "faqs": {}, "chat_sessions": {}, "guides": {}, "reports": {}}
+
+
+def generate_payments(trainers, sessions_per_trainer=10, seed=42):
+    """TrainerPaymentManager data: (payments, accounts, withdrawals)"""
+    rng = random.Random(seed)
+    payments, accounts = {}, {}
+    for i in range(trainers):
+        trainer_id = f"trainer_{i}"
+        accounts[trainer_id] = {"bank_info": {"iban": f"IR{i:024d}"}, "balance": 0.0, "total_earnings": 0.0,
+                                "pending_withdrawals": 0.0, "payment_methods": [{"id": "pm_0", "type": "bank"}],
+                                "created_at": now_ts()}
+        for n in range(sessions_per_trainer):
+            amount = round(rng.uniform(10, 100), 2)
+            completed = rng.random() < 0.8
+            payments[f"session_{i}_{n}"] = {
+                "trainer_id": trainer_id, "amount": amount, "date": now_ts() - rng.randint(0, 365 * DAY),
+                "status": "completed" if completed else "pending",
+                "platform_fee": round(amount * 0.2, 2) if completed else 0.0,
+                "trainer_amount": round(amount * 0.8, 2) if completed else 0.0
+            }
+            if completed:
+                accounts[trainer_id]["balance"] += payments[f"session_{i}_{n}"]["trainer_amount"]
+                accounts[trainer_id]["total_earnings"] += payments[f"session_{i}_{n}"]["trainer_amount"]
+    return payments, accounts, {}
+
+
+def generate_workout_data(workouts, seed=42):
+    """DataManager data built with WorkoutDataGenerator: workouts plus feedback and progress"""
+    import numpy as np
+
+    random.seed(seed)
+    np.random.seed(seed)
+    generator = WorkoutDataGenerator()
+    data = {"workouts": [], "user_feedback": [], "workout_progress": []}
+    for n in range(workouts):
+        workout = generator.generate_workout()
+        # The generator's random ids collide at this scale
+        workout["id"] = f"w{n}"
+        data["workouts"].append(workout)
+        data["user_feedback"].append(generator.generate_user_feedback(workout["id"]))
+        data["workout_progress"].append(generator.generate_progress_data(workout["id"]))
+    return data
+
+
+def _write_document(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    open_store(path).save(data)
+
+
+def _write_sharded(directory, data):
+    store = ShardedStore(directory)
+    for key, value in data.items():
+        store.shard(key)[key] = value
+    # With no paths every loaded shard is written in full
+    store.save(None)
+
+
+def write_dataset(directory, users, workouts=None, seed=42):
+    """Write a complete synthetic dataset for `users` users into directory"""
+    workouts = workouts if workouts is not None else max(1, users // 10)
+    _write_document(os.path.join(directory, "user_profiles.json"), generate_profiles(users, seed=seed))
+    _write_sharded(os.path.join(directory, "journals"), generate_journals(users, seed=seed))
+    _write_document(os.path.join(directory, "social_data.json"), generate_social(users, seed=seed))
+    _write_document(os.path.join(directory, "support_data.json"), generate_support(users, seed=seed))
+    payments, accounts, withdrawals = generate_payments(max(1, users // 100), seed=seed)
+    _write_document(os.path.join(directory, "trainer_payments.json"), payments)
+    _write_document(os.path.join(directory, "trainer_accounts.json"), accounts)
+    _write_document(os.path.join(directory, "trainer_withdrawals.json"), withdrawals)
+    _write_document(os.path.join(directory, "data", "workout_data.json"), generate_workout_data(workouts, seed=seed))
@@ -0,0 +1,86 @@
+"""
+Inference latency and throughput of WorkoutLevelPredictor.
+
+Times the pandas path (a one-row DataFrame through _prepare_features and
+the forest), the single-row fast path of predict(), and predict_batch at
+several batch sizes, on a model trained from generated workouts.
+
+    python benchmarks/predictor_benchmark.py --train-rows 20000 --rows 2000 --batch-sizes 1 100 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generator import WorkoutDataGenerator
+from ml_models import WorkoutLevelPredictor
+
+
+def pandas_predict(predictor, row):
+    """The per-call DataFrame path predict() used before the fast path"""
+    X = predictor._prepare_features(pd.DataFrame([row]))
+    return predictor.model.predict(predictor._matrix(X))[0]
+
+
+def time_calls(fn, args):
+    timings = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def summarize(name, timings, rows_per_call=1):
+    return {
+        "path": name,
+        "p50_ms": np.percentile(timings, 50) * 1e3,
+        "p99_ms": np.percentile(timings, 99) * 1e3,
+        "rows_per_s": rows_per_call * len(timings) / timings.sum(),
+    }
+
+
+def run(train_rows, rows, batch_sizes, seed=42):
+    generator = WorkoutDataGenerator()
+    train = generator.generate_dataset_batch(train_rows, seed=seed)
+    # Noisy durations keep the level from being a lookup on calories_burn
+    train["duration"] = train["duration"] + np.random.default_rng(seed).normal(0, 3, train_rows)
+    predictor = WorkoutLevelPredictor()
+    predictor.train(train)
+
+    sample = generator.generate_dataset_batch(rows, seed=seed + 1).to_dict("records")
+    predictor.predict(sample[0])  # builds the lookup tables outside the timed runs
+    results = [
+        summarize("predict (pandas)", time_calls(lambda row: pandas_predict(predictor, row), sample[:max(1, rows // 10)])),
+        summarize("predict (fast)", time_calls(predictor.predict, sample)),
+    ]
+    for size in batch_sizes:
+        frame = generator.generate_dataset_batch(size, seed=seed + 2)
+        results.append(summarize(f"predict_batch[{size}]", time_calls(predictor.predict_batch, [frame] * 5), size))
+
+    fast = np.array([predictor.predict(row) for row in sample], dtype=object)
+    mismatches = int((predictor.predict_batch(sample) != fast).sum())
+    return results, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=2000, help="single-row predictions to time")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    results, mismatches = run(args.train_rows, args.rows, args.batch_sizes)
+    print(f"{'path':<22}{'p50 (ms)':>11}{'p99 (ms)':>11}{'rows/s':>12}")
+    for r in results:
+        print(f"{r['path']:<22}{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['rows_per_s']:>12.0f}")
+    print(f"fast path and predict_batch disagree on {mismatches} of {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Memory held by hot entities as plain dicts versus __slots__ records.
+
+    python benchmarks/records_memory_benchmark.py --records 100000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from records import ChatMessage, EmotionRecord, JournalEntry, Post, Reminder, Ticket, WorkoutRecord
+
+SAMPLES = {
+    JournalEntry: {"date": 1700000000, "mood": "happy", "content": "Good day", "tags": ["work"],
+                   "gratitude_list": [], "goals": [], "reflections": []},
+    WorkoutRecord: {"date": 1700000000, "type": "cardio", "duration": 30, "intensity": 5, "notes": ""},
+    EmotionRecord: {"date": 1700000000, "emotion": "calm", "intensity": 4, "notes": ""},
+    Post: {"id": "p", "user_id": "u", "content": "Hello", "media_url": None, "visibility": "public",
+           "created_at": 1700000000, "likes": [], "comments": []},
+    Ticket: {"id": "t", "user_id": "u", "subject": "Help", "description": "Details", "category": "general",
+             "priority": "medium", "status": "open", "created_at": 1700000000, "updated_at": 1700000000,
+             "responses": []},
+    ChatMessage: {"id": "m", "user_id": "u", "message": "Hi", "is_staff": False, "timestamp": 1700000000},
+    Reminder: {"type": "water", "time": "10:00", "message": "Drink water", "repeat_daily": True,
+               "created_at": 1700000000, "last_triggered": None},
+}
+
+
+def measure(build):
+    """Bytes still allocated after build() returns, with its result kept alive"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(count):
+    results = []
+    for record_type, sample in SAMPLES.items():
+        # Decode from JSON so both variants own their own strings and lists, as after a load
+        encoded = serialization.dumps([sample] * count)
+        as_dicts = measure(lambda: serialization.loads(encoded))
+        as_records = measure(lambda: [record_type.from_dict(item) for item in serialization.loads(encoded)])
+        results.append({
+            "record": record_type.__name__,
+            "dict_bytes": as_dicts / count,
+            "record_bytes": as_records / count,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'record':<15}{'dict (B)':>10}{'slots (B)':>11}{'saved':>8}")
+    for row in run(args.records):
+        saved = 1 - row["record_bytes"] / row["dict_bytes"]
+        print(f"{row['record']:<15}{row['dict_bytes']:>10.0f}{row['record_bytes']:>11.0f}{saved:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Load/save timings for a large user_profiles.json under every serializer and mode.
+
+    python benchmarks/serialization_benchmark.py --users 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from generators import generate_profiles
+from storage import JSONFileStore
+
+
+def run(users, repeat):
+    profiles = generate_profiles(users)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "user_profiles.json")
+        for backend in serialization.SERIALIZERS:
+            for mode in (serialization.COMPACT, serialization.PRETTY):
+                os.environ["FORMAMIND_JSON_BACKEND"] = backend
+                os.environ["FORMAMIND_JSON_MODE"] = mode
+                save_times, load_times = [], []
+                for _ in range(repeat):
+                    if os.path.exists(path):
+                        os.remove(path)
+                    start = time.perf_counter()
+                    JSONFileStore(path).save(profiles)
+                    save_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    JSONFileStore(path).load()
+                    load_times.append(time.perf_counter() - start)
+                results.append({
+                    "backend": backend,
+                    "mode": mode,
+                    "save_s": min(save_times),
+                    "load_s": min(load_times),
+                    "size_mb": os.path.getsize(path) / 1e6
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'mode':<10}{'save (s)':>10}{'load (s)':>10}{'size (MB)':>11}")
+    for row in run(args.users, args.repeat):
+        print(f"{row['backend']:<10}{row['mode']:<10}{row['save_s']:>10.3f}{row['load_s']:>10.3f}{row['size_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
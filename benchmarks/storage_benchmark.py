@@ -0,0 +1,243 @@
+"""
+Times the public methods of the storage-backed managers on synthetic datasets.
+
+For each dataset size and storage backend a fresh dataset is generated in a
+temporary directory, then every manager is timed on: load (construction plus
+first data access), a full save, and each query and mutation method called
+with random users. Results go to a JSON report for comparing runs.
+
+    python benchmarks/storage_benchmark.py --sizes 1000 10000 100000 --backends json log
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from generators import user_ids, write_dataset
+from timeutils import DAY, now_ts
+
+
+def _user_profile_cases(users, trainers, workouts):
+    return [
+        ("query", "get_profile", lambda m, rng: m.get_profile(rng.choice(users))),
+        ("query", "get_workout_history", lambda m, rng: m.get_workout_history(rng.choice(users))),
+        ("query", "get_emotion_history", lambda m, rng: m.get_emotion_history(rng.choice(users))),
+        ("query", "get_workout_history_range",
+         lambda m, rng: m.get_workout_history_range(rng.choice(users), start=now_ts() - 30 * DAY)),
+        ("query", "get_emotion_history_range",
+         lambda m, rng: m.get_emotion_history_range(rng.choice(users), start=now_ts() - 30 * DAY)),
+        ("mutate", "update_profile", lambda m, rng: m.update_profile(rng.choice(users), weight=70)),
+        ("mutate", "add_workout_record", lambda m, rng: m.add_workout_record(rng.choice(users), "cardio", 30, 5)),
+        ("mutate", "add_emotion_record", lambda m, rng: m.add_emotion_record(rng.choice(users), "calm", 4)),
+        ("mutate", "create_profile",
+         lambda m, rng: m.create_profile(f"new_{rng.random()}", "New", 30, "female", 60, 165)),
+    ]
+
+
+def _journal_cases(users, trainers, workouts):
+    return [
+        ("query", "get_entries", lambda m, rng: m.get_entries(rng.choice(users), days=30)),
+        ("query", "get_mood_history", lambda m, rng: m.get_mood_history(rng.choice(users), days=30)),
+        ("query", "get_gratitude_history", lambda m, rng: m.get_gratitude_history(rng.choice(users), days=30)),
+        ("query", "get_goals_progress", lambda m, rng: m.get_goals_progress(rng.choice(users))),
+        ("mutate", "add_entry", lambda m, rng: m.add_entry(rng.choice(users), "happy", "Benchmark entry")),
+        ("mutate", "add_gratitude", lambda m, rng: m.add_gratitude(rng.choice(users), -1, "coffee")),
+        ("mutate", "add_goal", lambda m, rng: m.add_goal(rng.choice(users), -1, "Sleep early")),
+        ("mutate", "add_reflection", lambda m, rng: m.add_reflection(rng.choice(users), -1, "Went well")),
+        ("mutate", "mark_goal_completed", lambda m, rng: m.mark_goal_completed(rng.choice(users), 0)),
+    ]
+
+
+def _social_cases(users, trainers, workouts):
+    return [
+        ("query", "get_friends", lambda m, rng: m.get_friends(rng.choice(users))),
+        ("query", "get_user_posts", lambda m, rng: m.get_user_posts(rng.choice(users))),
+        ("query", "get_feed", lambda m, rng: m.get_feed(rng.choice(users))),
+        ("query", "get_active_challenges", lambda m, rng: m.get_active_challenges()),
+        ("mutate", "create_post", lambda m, rng: m.create_post(rng.choice(users), "Benchmark post")),
+        ("mutate", "add_comment",
+         lambda m, rng: m.add_comment(rng.choice(users), f"post_{rng.choice(users)}_0", "Benchmark comment")),
+        ("mutate", "like_post", lambda m, rng: m.like_post(rng.choice(users), f"post_{rng.choice(users)}_0")),
+        ("mutate", "add_friend", lambda m, rng: m.add_friend(rng.choice(users), rng.choice(users))),
+    ]
+
+
+def _support_cases(users, trainers, workouts):
+    return [
+        ("query", "get_ticket", lambda m, rng: m.get_ticket(f"ticket_{rng.choice(users)}_0")),
+        ("query", "get_user_tickets", lambda m, rng: m.get_user_tickets(rng.choice(users))),
+        ("query", "get_faqs", lambda m, rng: m.get_faqs()),
+        ("mutate", "create_ticket",
+         lambda m, rng: m.create_ticket(rng.choice(users), "Benchmark", "Details", "general")),
+        ("mutate", "add_ticket_response",
+         lambda m, rng: m.add_ticket_response(f"ticket_{rng.choice(users)}_0", "staff", "Reply", True)),
+        ("mutate", "update_ticket_status",
+         lambda m, rng: m.update_ticket_status(f"ticket_{rng.choice(users)}_0", "resolved")),
+    ]
+
+
+def _payment_cases(users, trainers, workouts):
+    return [
+        ("query", "get_trainer_earnings", lambda m, rng: m.get_trainer_earnings(rng.choice(trainers))),
+        ("query", "get_payment_history", lambda m, rng: m.get_payment_history(rng.choice(trainers))),
+        ("query", "get_withdrawal_history", lambda m, rng: m.get_withdrawal_history(rng.choice(trainers))),
+        ("query", "calculate_monthly_earnings",
+         lambda m, rng: m.calculate_monthly_earnings(rng.choice(trainers), 2024, 1)),
+        ("mutate", "add_payment_method",
+         lambda m, rng: m.add_payment_method(rng.choice(trainers), {"type": "card"})),
+        ("mutate", "request_withdrawal", lambda m, rng: m.request_withdrawal(rng.choice(trainers), 1.0, "pm_0")),
+    ]
+
+
+def _data_manager_cases(users, trainers, workouts):
+    workout = {"id": "bench", "type": "cardio", "level": "beginner", "duration": 30, "calories_burn": 200,
+               "equipment_needed": ["none"], "exercises": [], "tags": ["cardio"], "benefits": []}
+    return [
+        ("query", "get_workouts_df", lambda m, rng: m.get_workouts_df()),
+        ("query", "get_workouts_df[duration,level]", lambda m, rng: m.get_workouts_df(["duration", "level"])),
+        ("query", "get_user_feedback_df", lambda m, rng: m.get_user_feedback_df()),
+        ("query", "get_workout_progress_df", lambda m, rng: m.get_workout_progress_df()),
+        ("query", "prepare_training_data", lambda m, rng: m.prepare_training_data()),
+        ("mutate", "add_workout", lambda m, rng: m.add_workout(dict(workout))),
+        ("mutate", "add_workouts_bulk[100]", lambda m, rng: m.add_workouts_bulk([dict(workout)] * 100)),
+        ("mutate", "add_user_feedback",
+         lambda m, rng: m.add_user_feedback({"workout_id": rng.choice(workouts), "rating": 4})),
+        ("mutate", "add_workout_progress",
+         lambda m, rng: m.add_workout_progress({"workout_id": rng.choice(workouts), "duration": 30})),
+    ]
+
+
+# name: (module, class, first data access, full save, cases)
+MANAGERS = {
+    "UserProfile": ("user_profile", "UserProfile", lambda m: m.profiles, lambda m: m._save_profiles(),
+                    _user_profile_cases),
+    "JournalManager": ("journal", "JournalManager", lambda m: m.get_entries("user_0"),
+                       lambda m: m._save_journals(), _journal_cases),
+    "SocialSystem": ("social", "SocialSystem", lambda m: m.social_data, lambda m: m._save_social_data(),
+                     _social_cases),
+    "SupportSystem": ("support", "SupportSystem", lambda m: m.support_data, lambda m: m._save_support_data(),
+                      _support_cases),
+    "TrainerPaymentManager": ("trainer_payment", "TrainerPaymentManager", lambda m: (m.payments, m.accounts),
+                              lambda m: m._save_data(), _payment_cases),
+    "DataManager": ("data_manager", "DataManager", lambda m: m.data, lambda m: m.save_data(),
+                    _data_manager_cases),
+}
+
+
+def time_calls(fn, repeat):
+    """Wall-clock seconds of `repeat` calls to fn(i)"""
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    return {
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+    }
+
+
+def benchmark_manager(name, users, trainers, workouts, repeat, load_repeat, seed):
+    """Time load, full save and every case of one manager in the current directory"""
+    module_name, class_name, first_access, full_save, cases = MANAGERS[name]
+    try:
+        manager_class = getattr(importlib.import_module(module_name), class_name)
+    except ImportError as e:
+        return [{"manager": name, "method": None, "kind": "skipped", "reason": str(e)}]
+
+    def load(_):
+        first_access(manager_class())
+
+    results = [{"manager": name, "method": "load", "kind": "load", **summarize(time_calls(load, load_repeat))}]
+    manager = manager_class()
+    first_access(manager)
+    results.append({"manager": name, "method": "save", "kind": "save",
+                    **summarize(time_calls(lambda _: full_save(manager), load_repeat))})
+
+    rng = random.Random(seed)
+    for kind, method, case in cases(users, trainers, workouts):
+        results.append({"manager": name, "method": method, "kind": kind,
+                        **summarize(time_calls(lambda _: case(manager, rng), repeat))})
+    return results
+
+
+def run(sizes, backends, managers, repeat, load_repeat, seed=42):
+    report = {
+        "meta": {
+            "created_at": now_ts(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "serializer": serialization.backend_name(),
+            "json_mode": os.getenv("FORMAMIND_JSON_MODE", serialization.COMPACT),
+            "repeat": repeat,
+            "load_repeat": load_repeat,
+        },
+        "results": [],
+    }
+    cwd = os.getcwd()
+    for size in sizes:
+        for backend in backends:
+            os.environ["FORMAMIND_STORAGE"] = backend
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                write_dataset(directory, size, seed=seed)
+                print(f"[{size} users, {backend}] dataset written in {time.perf_counter() - start:.1f}s")
+                users = user_ids(size)
+                trainers = [f"trainer_{i}" for i in range(max(1, size // 100))]
+                workouts = [f"w{i}" for i in range(max(1, size // 10))]
+                os.chdir(directory)
+                try:
+                    for name in managers:
+                        for row in benchmark_manager(name, users, trainers, workouts, repeat, load_repeat, seed):
+                            report["results"].append({"users": size, "backend": backend, **row})
+                finally:
+                    os.chdir(cwd)
+    return report
+
+
+def print_report(report):
+    print(f"{'users':>7} {'backend':<8}{'manager':<23}{'method':<28}{'median (ms)':>12}{'max (ms)':>10}")
+    for row in report["results"]:
+        if row["kind"] == "skipped":
+            print(f"{row['users']:>7} {row['backend']:<8}{row['manager']:<23}skipped: {row['reason']}")
+            continue
+        print(f"{row['users']:>7} {row['backend']:<8}{row['manager']:<23}{row['method']:<28}"
+              f"{row['median_s'] * 1000:>12.3f}{row['max_s'] * 1000:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["json", "log"])
+    parser.add_argument("--managers", nargs="+", default=list(MANAGERS), choices=list(MANAGERS))
+    parser.add_argument("--repeat", type=int, default=20, help="calls per query/mutation method")
+    parser.add_argument("--load-repeat", type=int, default=3, help="runs of each load and full save")
+    parser.add_argument("--output", default="storage_benchmark.json", help="path of the JSON report")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    report = run(args.sizes, args.backends, args.managers, args.repeat, args.load_repeat)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    print_report(report)
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import numpy as np
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
 import random
-from datetime import datetime, timedelta
+from timeutils import DAY, now_ts
 
 class WorkoutDataGenerator:
     def __init__(self):
@@ -10,32 +10,41 @@ class WorkoutDataGenerator:
         self.workout_types = ['cardio', 'strength', 'flexibility', 'hiit', 'yoga']
         self.levels = ['beginner', 'intermediate', 'advanced']
         self.equipment = ['none', 'dumbbells', 'resistance_band', 'yoga_mat', 'full_gym']
-        
-    def generate_workout(self) -> Dict:
-        """تولید یک تمرین ورزشی تصادفی"""
-        workout_type = np.random.choice(self.workout_types)
-        level = np.random.choice(self.levels)
-        
-        # تولید مدت زمان تمرین با توزیع نرمال
-        duration = int(np.random.normal(45, 15))  # میانگین 45 دقیقه، انحراف معیار 15
-        duration = max(20, min(120, duration))  # محدود کردن بین 20 تا 120 دقیقه
-        
-        # تولید کالری سوزانده شده بر اساس نوع و سطح تمرین
-        base_calories = {
+
+        # کالری پایه هر نوع تمرین و ضریب هر سطح
+        self.base_calories = {
             'cardio': 300,
             'strength': 200,
             'flexibility': 150,
             'hiit': 400,
             'yoga': 180
         }
-        
-        level_multiplier = {
+        self.level_multiplier = {
             'beginner': 0.8,
             'intermediate': 1.0,
             'advanced': 1.2
         }
+
+        # مزایای هر نوع تمرین
+        self.benefits = {
+            'cardio': ['افزایش استقامت', 'سوزاندن کالری', 'بهبود سلامت قلب', 'افزایش انرژی'],
+            'strength': ['افزایش قدرت', 'ساخت عضله', 'بهبود متابولیسم', 'تقویت استخوان‌ها'],
+            'flexibility': ['افزایش انعطاف‌پذیری', 'کاهش درد مفاصل', 'بهبود تعادل', 'کاهش استرس'],
+            'hiit': ['سوزاندن چربی', 'افزایش متابولیسم', 'بهبود استقامت', 'صرفه‌جویی در زمان'],
+            'yoga': ['کاهش استرس', 'بهبود تمرکز', 'افزایش انعطاف‌پذیری', 'تعادل ذهن و بدن']
+        }
         
-        calories = int(base_calories[workout_type] * level_multiplier[level] * (duration/45))
+    def generate_workout(self) -> Dict:
+        """تولید یک تمرین ورزشی تصادفی"""
+        workout_type = np.random.choice(self.workout_types)
+        level = np.random.choice(self.levels)
+        
+        # تولید مدت زمان تمرین با توزیع نرمال
+        duration = int(np.random.normal(45, 15))  # میانگین 45 دقیقه، انحراف معیار 15
+        duration = max(20, min(120, duration))  # محدود کردن بین 20 تا 120 دقیقه
+        
+        # تولید کالری سوزانده شده بر اساس نوع و سطح تمرین
+        calories = int(self.base_calories[workout_type] * self.level_multiplier[level] * (duration/45))
         
         # تولید تجهیزات مورد نیاز
         num_equipment = np.random.binomial(len(self.equipment), 0.3)  # احتمال 30% برای هر تجهیزات
@@ -97,21 +106,163 @@ class WorkoutDataGenerator:
     
     def _generate_benefits(self, workout_type: str) -> List[str]:
         """تولید مزایای تمرین بر اساس نوع آن"""
-        all_benefits = {
-            'cardio': ['افزایش استقامت', 'سوزاندن کالری', 'بهبود سلامت قلب', 'افزایش انرژی'],
-            'strength': ['افزایش قدرت', 'ساخت عضله', 'بهبود متابولیسم', 'تقویت استخوان‌ها'],
-            'flexibility': ['افزایش انعطاف‌پذیری', 'کاهش درد مفاصل', 'بهبود تعادل', 'کاهش استرس'],
-            'hiit': ['سوزاندن چربی', 'افزایش متابولیسم', 'بهبود استقامت', 'صرفه‌جویی در زمان'],
-            'yoga': ['کاهش استرس', 'بهبود تمرکز', 'افزایش انعطاف‌پذیری', 'تعادل ذهن و بدن']
-        }
-        
         num_benefits = np.random.randint(2, 4)
-        return np.random.choice(all_benefits[workout_type], num_benefits, replace=False).tolist()
+        return np.random.choice(self.benefits[workout_type], num_benefits, replace=False).tolist()
     
     def generate_dataset(self, size: int = 100) -> List[Dict]:
         """تولید مجموعه داده با اندازه مشخص"""
         return [self.generate_workout() for _ in range(size)]
+
+    @staticmethod
+    def _rng(seed) -> np.random.Generator:
+        return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    @staticmethod
+    def _sample_subsets(rng: np.random.Generator, counts: np.ndarray, n_items: int) -> np.ndarray:
+        """انتخاب counts عضو بدون تکرار از n_items برای هر سطر، به صورت بیت‌ماسک"""
+        # رتبه هر عضو در یک جایگشت تصادفی؛ اعضای با رتبه کمتر از count انتخاب می‌شوند
+        ranks = np.argsort(np.argsort(rng.random((len(counts), n_items)), axis=1), axis=1)
+        chosen = ranks < counts[:, None]
+        return chosen @ (1 << np.arange(n_items))
+
+    def generate_dataset_batch(self, size: int = 100, seed=None, start_id: int = 0) -> pd.DataFrame:
+        """
+        تولید ستونی مجموعه داده با نمونه‌گیری برداری NumPy.
+
+        همه ستون‌ها یک‌جا به صورت آرایه ساخته می‌شوند و نتیجه یک DataFrame است.
+        ستون‌های لیستی (equipment_needed، tags، benefits) tuple هستند و شناسه‌ها
+        از start_id به بعد یکتا هستند. تمرینات هر برنامه با generate_exercises_batch
+        به صورت جدول جداگانه ساخته می‌شوند.
+        """
+        rng = self._rng(seed)
+        types = np.array(self.workout_types, dtype=object)
+        levels = np.array(self.levels, dtype=object)
+        type_idx = rng.integers(0, len(types), size)
+        level_idx = rng.integers(0, len(levels), size)
+
+        # مدت زمان با توزیع نرمال، محدود بین 20 تا 120 دقیقه
+        duration = np.clip(rng.normal(45, 15, size).astype(int), 20, 120)
+
+        base_calories = np.array([self.base_calories[t] for t in self.workout_types])
+        level_multiplier = np.array([self.level_multiplier[l] for l in self.levels])
+        calories = (base_calories[type_idx] * level_multiplier[level_idx] * (duration / 45)).astype(int)
+
+        # تجهیزات: هر ترکیب ممکن یک بیت‌ماسک است و فهرست آن از جدول از پیش ساخته خوانده می‌شود
+        n_equipment = len(self.equipment)
+        equipment_bits = self._sample_subsets(rng, rng.binomial(n_equipment, 0.3, size), n_equipment)
+        equipment_bits[equipment_bits == 0] = 1 << self.equipment.index('none')
+        equipment_table = np.empty(1 << n_equipment, dtype=object)
+        equipment_table[:] = [tuple(e for i, e in enumerate(self.equipment) if bits >> i & 1)
+                              for bits in range(1 << n_equipment)]
+        equipment_needed = equipment_table[equipment_bits]
+
+        tags_table = np.empty((len(types), len(levels), 1 << n_equipment), dtype=object)
+        for t, workout_type in enumerate(self.workout_types):
+            for l, level in enumerate(self.levels):
+                for bits in range(1 << n_equipment):
+                    tags_table[t, l, bits] = (workout_type, level) + equipment_table[bits]
+
+        # مزایا: 2 یا 3 مورد بدون تکرار از 4 مزیت هر نوع تمرین
+        benefits_bits = self._sample_subsets(rng, rng.integers(2, 4, size), 4)
+        benefits_table = np.empty((len(types), 16), dtype=object)
+        for t, workout_type in enumerate(self.workout_types):
+            options = self.benefits[workout_type]
+            benefits_table[t] = [tuple(b for i, b in enumerate(options) if bits >> i & 1) for bits in range(16)]
+
+        names = np.array([[f"{t.capitalize()} Workout - {l.capitalize()}" for l in self.levels]
+                          for t in self.workout_types], dtype=object)
+
+        return pd.DataFrame({
+            "id": "w" + pd.Series(np.arange(start_id, start_id + size)).astype(str),
+            "name": names[type_idx, level_idx],
+            "type": types[type_idx],
+            "level": levels[level_idx],
+            "duration": duration,
+            "calories_burn": calories,
+            "equipment_needed": equipment_needed,
+            "tags": tags_table[type_idx, level_idx, equipment_bits],
+            "benefits": benefits_table[type_idx, benefits_bits]
+        })
+
+    def generate_exercises_batch(self, workouts: pd.DataFrame, seed=None) -> pd.DataFrame:
+        """
+        تولید برداری تمرینات برنامه‌های generate_dataset_batch به صورت جدول بلند.
+
+        هر سطر یک تمرین با workout_id برنامه خود است؛ تعداد و مدت تمرینات
+        همان قواعد _generate_exercises را دنبال می‌کند.
+        """
+        rng = self._rng(seed)
+        size = len(workouts)
+        # بازه تعداد تمرینات هر سطح: [کمینه، بیشینه)
+        count_range = np.array([{'beginner': (3, 5), 'intermediate': (4, 6), 'advanced': (5, 8)}[l]
+                                for l in self.levels])
+        level_idx = pd.Categorical(workouts["level"], categories=self.levels).codes
+        num_exercises = rng.integers(count_range[level_idx, 0], count_range[level_idx, 1])
+        max_exercises = count_range[:, 1].max() - 1
+
+        # ستون به ستون: مدت هر تمرین از زمان باقی‌مانده کم می‌شود و آخرین تمرین باقی‌مانده را می‌گیرد
+        remaining = workouts["duration"].to_numpy().copy()
+        durations = np.zeros((size, max_exercises), dtype=int)
+        present = np.zeros((size, max_exercises), dtype=bool)
+        for i in range(max_exercises):
+            active = (i < num_exercises) & (remaining > 0)
+            sampled = np.maximum(5, np.minimum(remaining, rng.normal(10, 3, size).astype(int)))
+            duration = np.where(i == num_exercises - 1, remaining, sampled)
+            durations[:, i] = np.where(active, duration, 0)
+            present[:, i] = active
+            remaining = remaining - durations[:, i]
+
+        rows, positions = np.nonzero(present)
+        intensities = ['low', 'medium', 'high']
+        intensity_idx = rng.choice(len(intensities), len(rows), p=[0.3, 0.4, 0.3])
+        duration = durations[rows, positions]
+
+        # متن‌ها از جدول همه ترکیب‌های ممکن خوانده می‌شوند، نه با قالب‌بندی سطر به سطر
+        names = np.array([f"Exercise {i + 1}" for i in range(max_exercises)], dtype=object)
+        max_duration = int(duration.max()) if len(duration) else 0
+        descriptions = np.array([[f"{intensity.capitalize()} intensity exercise for {d} minutes"
+                                  for d in range(max_duration + 1)] for intensity in intensities], dtype=object)
+        return pd.DataFrame({
+            "workout_id": workouts["id"].to_numpy()[rows],
+            "name": names[positions],
+            "duration": duration,
+            "intensity": np.array(intensities, dtype=object)[intensity_idx],
+            "description": descriptions[intensity_idx, duration]
+        })
     
+    def generate_feedback_batch(self, workout_ids, seed=None, now: Optional[int] = None) -> pd.DataFrame:
+        """
+        تولید برداری بازخورد کاربران، یک سطر برای هر شناسه در workout_ids.
+
+        تاریخ‌ها مانند بقیه داده‌های ذخیره‌شده ثانیه epoch هستند.
+        """
+        rng = self._rng(seed)
+        workout_ids = np.asarray(workout_ids, dtype=object)
+        size = len(workout_ids)
+        now = now_ts() if now is None else now
+        return pd.DataFrame({
+            "workout_id": workout_ids,
+            "rating": rng.integers(1, 6, size),
+            "difficulty": np.array(['too_easy', 'just_right', 'too_hard'], dtype=object)[rng.integers(0, 3, size)],
+            "completion_time": rng.normal(45, 10, size),
+            "date": now - rng.integers(0, 30, size) * DAY,
+            "comments": np.full(size, "Generated feedback for testing", dtype=object)
+        })
+
+    def generate_progress_batch(self, workout_ids, seed=None, now: Optional[int] = None) -> pd.DataFrame:
+        """تولید برداری داده‌های پیشرفت، یک سطر برای هر شناسه در workout_ids"""
+        rng = self._rng(seed)
+        workout_ids = np.asarray(workout_ids, dtype=object)
+        size = len(workout_ids)
+        now = now_ts() if now is None else now
+        return pd.DataFrame({
+            "workout_id": workout_ids,
+            "calories_burned": rng.normal(200, 50, size),
+            "heart_rate_avg": rng.normal(140, 20, size),
+            "duration": rng.normal(45, 5, size),
+            "date": now - rng.integers(0, 30, size) * DAY
+        })
+
     def generate_user_feedback(self, workout_id: str) -> Dict:
         """تولید بازخورد کاربر برای یک تمرین"""
         return {
@@ -119,7 +270,7 @@ class WorkoutDataGenerator:
             "rating": np.random.randint(1, 6),  # امتیاز 1 تا 5
             "difficulty": np.random.choice(['too_easy', 'just_right', 'too_hard']),
             "completion_time": np.random.normal(45, 10),  # زمان تکمیل با توزیع نرمال
-            "date": (datetime.now() - timedelta(days=np.random.randint(0, 30))).isoformat(),
+            "date": now_ts() - int(np.random.randint(0, 30)) * DAY,
             "comments": "Generated feedback for testing"
         }
     
@@ -130,5 +281,5 @@ class WorkoutDataGenerator:
             "calories_burned": np.random.normal(200, 50),  # کالری سوزانده شده
             "heart_rate_avg": np.random.normal(140, 20),  # ضربان قلب متوسط
             "duration": np.random.normal(45, 5),  # مدت زمان واقعی
-            "date": (datetime.now() - timedelta(days=np.random.randint(0, 30))).isoformat()
+            "date": now_ts() - int(np.random.randint(0, 30)) * DAY
         } 
\ No newline at end of file
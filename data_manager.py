@@ -1,59 +1,303 @@
-import json
+import os
+import operator
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Union
+from functools import cached_property
+from scipy import sparse
+from storage import AppendPath, open_store
+from parquet_store import ParquetStore
+from feature_encoding import MultiHotEncoder
+from ml_models import MULTI_HOT_COLUMNS, multi_hot_encoders
+
+TABLES = ("workouts", "user_feedback", "workout_progress")
+
+# آمار بازخورد و پیشرفت هر تمرین که از جدول‌های دیگر به سطر تمرین افزوده می‌شود
+AGGREGATE_FEATURES = [
+    "feedback_count", "rating_mean", "completion_time_mean", "too_easy_share", "too_hard_share",
+    "sessions", "completion_ratio", "heart_rate_mean", "heart_rate_std", "heart_rate_max", "calories_burned_mean",
+]
+# ستون‌های عددی ماتریس ویژگی، به ترتیب
+NUMERIC_FEATURES = ["duration", "calories_burn"] + AGGREGATE_FEATURES
+
+# عملگرهای فیلتر، با همان معنای فیلترهای pyarrow
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, values: column.isin(values),
+    "not in": lambda column, values: ~column.isin(values),
+}
+
+
+def select_frame(df: pd.DataFrame, columns: Optional[Sequence[str]] = None, filters: Any = None) -> pd.DataFrame:
+    """اعمال فیلترهای [(ستون، عملگر، مقدار)] و انتخاب ستون‌ها روی DataFrame"""
+    if filters and not df.empty:
+        # فهرستی از فهرست‌ها یعنی OR میان گروه‌هایی که درونشان AND است
+        groups = filters if isinstance(filters[0], list) else [filters]
+        mask = pd.Series(False, index=df.index)
+        for group in groups:
+            group_mask = pd.Series(True, index=df.index)
+            for column, op, value in group:
+                group_mask &= FILTER_OPERATORS[op](df[column], value)
+            mask |= group_mask
+        df = df[mask].reset_index(drop=True)
+    if columns is not None:
+        df = df.reindex(columns=list(columns))
+    return df
+
+
+def to_records(rows: Union[pd.DataFrame, Iterable[Dict]]) -> List[Dict]:
+    """تبدیل DataFrame یا هر iterable از دیکشنری‌ها به فهرست رکوردهای قابل ذخیره در JSON"""
+    if not isinstance(rows, pd.DataFrame):
+        return list(rows)
+    rows = rows.copy(deep=False)
+    for column in rows.columns:
+        if rows[column].dtype == object:
+            # ستون‌های فهرستی (tuple یا آرایه) به list تبدیل می‌شوند
+            rows[column] = rows[column].map(lambda v: list(v) if isinstance(v, (tuple, np.ndarray)) else v)
+    return rows.to_dict("records")
+
+
+class TrainingData:
+    """
+    ویژگی‌های آمادهٔ آموزش: جدول ترکیب‌شده، ماتریس sparse ویژگی‌ها و برچسب‌ها.
+
+    aggregates همان آمار تجمیعی ماتریس است با شناسهٔ تمرین به‌عنوان index، تا
+    مدل هنگام پیش‌بینی سطرهای خام تمرین را با همان مقادیر کامل کند.
+    """
+
+    def __init__(self, frame: pd.DataFrame, features: sparse.csr_matrix, feature_names: List[str],
+                 labels: np.ndarray, numeric: List[str], encoders: Dict[str, MultiHotEncoder],
+                 aggregates: Optional[pd.DataFrame] = None):
+        self.frame = frame
+        self.features = features
+        self.feature_names = feature_names
+        self.labels = labels
+        self.numeric = numeric
+        self.encoders = encoders
+        self.aggregates = aggregates
+
+    def __len__(self) -> int:
+        return self.features.shape[0]
+
 
 class DataManager:
-    def __init__(self, data_path: str = "data/workout_data.json"):
+    def __init__(self, data_path: str = "data/workout_data.json", backend: Optional[str] = None):
         self.data_path = Path(data_path)
-        self.data = self._load_data()
-        
+        # FORMAMIND_DATA_BACKEND=parquet جدول‌ها را ستونی در data/workout_data/ نگه می‌دارد
+        self.backend = backend or os.getenv("FORMAMIND_DATA_BACKEND", "json")
+        if self.backend == "parquet":
+            self._store = ParquetStore(str(self.data_path.with_suffix("")), TABLES, legacy_path=str(self.data_path))
+        else:
+            self._store = open_store(str(self.data_path))
+        # table -> (version, {(columns, filters): DataFrame})؛ با تغییر نسخه کل جدول کنار گذاشته می‌شود
+        self._frames = {}
+        # حداکثر تعداد DataFrameهای نگه‌داشته‌شده برای هر جدول (ترکیب‌های مختلف ستون و فیلتر)
+        self.frame_cache_size = int(os.getenv("FORMAMIND_FRAME_CACHE_SIZE", "16"))
+        self._versions = dict.fromkeys(TABLES, 0)
+        # (data version, TrainingData)
+        self._training_data = None
+
+    @property
+    def columnar(self) -> bool:
+        return isinstance(self._store, ParquetStore)
+
+    @cached_property
+    def data(self):
+        """داده‌ها، در اولین دسترسی بارگذاری می‌شوند"""
+        return self._load_data()
+
     def _load_data(self) -> Dict:
         """بارگذاری داده‌ها از فایل JSON"""
-        if not self.data_path.exists():
-            return {"workouts": [], "user_feedback": [], "workout_progress": []}
-        
-        with open(self.data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    def save_data(self) -> None:
+        return self._store.load({table: [] for table in TABLES})
+
+    def save_data(self, *paths) -> None:
         """ذخیره داده‌ها در فایل JSON"""
-        with open(self.data_path, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=4)
-    
+        self._store.save(self.data, *paths)
+        for table in {path[0] for path in paths} if paths else TABLES:
+            self._invalidate(table)
+
+    def batch(self):
+        """گروه‌بندی چند تغییر در یک ذخیره‌سازی"""
+        return self._store.batch()
+
+    def data_version(self, table: Optional[str] = None) -> Any:
+        """نسخهٔ داده‌های یک جدول (یا همهٔ جدول‌ها) که با هر تغییر عوض می‌شود"""
+        if table is None:
+            return tuple(self.data_version(name) for name in TABLES)
+        if self.columnar:
+            # فایل‌های parquet تغییرات پردازه‌های دیگر را هم نشان می‌دهند
+            return self._versions[table], self._store.version(table)
+        return self._versions[table]
+
+    def _invalidate(self, table: str) -> None:
+        """کنار گذاشتن DataFrameهای ذخیره‌شدهٔ یک جدول پس از تغییر"""
+        self._versions[table] += 1
+        self._frames.pop(table, None)
+
+    def _append(self, table: str, record: Dict) -> None:
+        """افزودن یک رکورد به انتهای جدول"""
+        self._append_bulk(table, [record])
+
+    def _append_bulk(self, table: str, rows: Union[pd.DataFrame, Iterable[Dict]]) -> int:
+        """افزودن چند رکورد به انتهای جدول با یک بار نوشتن"""
+        if self.columnar:
+            # بدون خواندن کل جدول؛ نمای data در دسترسی بعدی دوباره خوانده می‌شود
+            if not isinstance(rows, pd.DataFrame):
+                rows = list(rows)
+            self._store.append(table, rows)
+            self.__dict__.pop("data", None)
+            self._invalidate(table)
+            return len(rows)
+        records = self.data[table]
+        start = len(records)
+        records.extend(to_records(rows))
+        if len(records) > start:
+            self.save_data(*[AppendPath((table, index)) for index in range(start, len(records))])
+        return len(records) - start
+
     def add_workout(self, workout: Dict) -> None:
         """اضافه کردن یک تمرین جدید"""
-        self.data["workouts"].append(workout)
-        self.save_data()
-    
+        self._append("workouts", workout)
+
     def add_user_feedback(self, feedback: Dict) -> None:
         """اضافه کردن بازخورد کاربر"""
-        self.data["user_feedback"].append(feedback)
-        self.save_data()
-    
+        self._append("user_feedback", feedback)
+
     def add_workout_progress(self, progress: Dict) -> None:
         """ثبت پیشرفت تمرین"""
-        self.data["workout_progress"].append(progress)
-        self.save_data()
-    
-    def get_workouts_df(self) -> pd.DataFrame:
+        self._append("workout_progress", progress)
+
+    def add_workouts_bulk(self, workouts: Union[pd.DataFrame, Iterable[Dict]]) -> int:
+        """اضافه کردن چند تمرین با یک بار ذخیره‌سازی؛ تعداد افزوده‌ها را برمی‌گرداند"""
+        return self._append_bulk("workouts", workouts)
+
+    def add_feedback_bulk(self, feedback: Union[pd.DataFrame, Iterable[Dict]]) -> int:
+        """اضافه کردن چند بازخورد با یک بار ذخیره‌سازی"""
+        return self._append_bulk("user_feedback", feedback)
+
+    def add_progress_bulk(self, progress: Union[pd.DataFrame, Iterable[Dict]]) -> int:
+        """ثبت چند رکورد پیشرفت با یک بار ذخیره‌سازی"""
+        return self._append_bulk("workout_progress", progress)
+
+    def _table_df(self, table: str, columns: Optional[Sequence[str]] = None, filters: Any = None) -> pd.DataFrame:
+        """خواندن یک جدول؛ در حالت parquet فقط ستون‌ها و row groupهای لازم خوانده می‌شوند"""
+        key = (tuple(columns) if columns is not None else None, repr(filters))
+        version = self.data_version(table)
+        cached = self._frames.get(table)
+        if cached is None or cached[0] != version:
+            cached = self._frames[table] = (version, {})
+        frames = cached[1]
+        df = frames.pop(key, None)
+        if df is None:
+            if self.columnar:
+                df = self._store.read(table, columns, filters)
+            else:
+                df = select_frame(pd.DataFrame(self.data[table]), columns, filters)
+            while frames and len(frames) >= self.frame_cache_size:
+                # قدیمی‌ترین استفاده کنار گذاشته می‌شود
+                frames.pop(next(iter(frames)))
+        frames[key] = df
+        # کپی کامل، تا تغییر مقادیر در کد فراخواننده (بدون copy-on-write در pandas < 3) به نسخهٔ ذخیره‌شده نرسد
+        return df.copy()
+
+    def get_workouts_df(self, columns: Optional[Sequence[str]] = None, filters: Any = None) -> pd.DataFrame:
         """تبدیل داده‌های تمرینات به DataFrame"""
-        return pd.DataFrame(self.data["workouts"])
-    
-    def get_user_feedback_df(self) -> pd.DataFrame:
+        return self._table_df("workouts", columns, filters)
+
+    def get_user_feedback_df(self, columns: Optional[Sequence[str]] = None, filters: Any = None) -> pd.DataFrame:
         """تبدیل بازخوردهای کاربر به DataFrame"""
-        return pd.DataFrame(self.data["user_feedback"])
-    
-    def get_workout_progress_df(self) -> pd.DataFrame:
+        return self._table_df("user_feedback", columns, filters)
+
+    def get_workout_progress_df(self, columns: Optional[Sequence[str]] = None, filters: Any = None) -> pd.DataFrame:
         """تبدیل داده‌های پیشرفت به DataFrame"""
-        return pd.DataFrame(self.data["workout_progress"])
-    
-    def prepare_training_data(self) -> pd.DataFrame:
-        """آماده‌سازی داده‌ها برای یادگیری ماشین"""
-        workouts_df = self.get_workouts_df()
-        feedback_df = self.get_user_feedback_df()
-        progress_df = self.get_workout_progress_df()
-        
-        # اینجا می‌توانیم داده‌ها را برای یادگیری ماشین آماده کنیم
-        # مثلاً ترکیب داده‌ها، نرمال‌سازی، و غیره
-        return workouts_df 
\ No newline at end of file
+        return self._table_df("workout_progress", columns, filters)
+
+    def _feedback_aggregates(self) -> pd.DataFrame:
+        """میانگین امتیاز، زمان تکمیل و سهم پاسخ‌های «خیلی آسان/سخت» برای هر تمرین"""
+        feedback = self.get_user_feedback_df(["workout_id", "rating", "difficulty", "completion_time"])
+        return feedback.assign(
+            rating=pd.to_numeric(feedback["rating"], errors="coerce"),
+            completion_time=pd.to_numeric(feedback["completion_time"], errors="coerce"),
+            too_easy=feedback["difficulty"].eq("too_easy"),
+            too_hard=feedback["difficulty"].eq("too_hard"),
+        ).groupby("workout_id").agg(
+            feedback_count=("rating", "size"),
+            rating_mean=("rating", "mean"),
+            completion_time_mean=("completion_time", "mean"),
+            too_easy_share=("too_easy", "mean"),
+            too_hard_share=("too_hard", "mean"),
+        )
+
+    def _progress_aggregates(self, planned: pd.Series) -> pd.DataFrame:
+        """تعداد جلسات، نسبت تکمیل و آمار ضربان قلب برای هر تمرین"""
+        progress = self.get_workout_progress_df(["workout_id", "heart_rate_avg", "duration", "calories_burned"])
+        # نسبت مدت واقعی به مدت برنامه‌ریزی‌شدهٔ تمرین
+        planned_duration = progress["workout_id"].map(planned)
+        return progress.assign(
+            heart_rate_avg=pd.to_numeric(progress["heart_rate_avg"], errors="coerce"),
+            calories_burned=pd.to_numeric(progress["calories_burned"], errors="coerce"),
+            completion_ratio=pd.to_numeric(progress["duration"], errors="coerce") / planned_duration,
+        ).groupby("workout_id").agg(
+            sessions=("workout_id", "size"),
+            completion_ratio=("completion_ratio", "mean"),
+            heart_rate_mean=("heart_rate_avg", "mean"),
+            heart_rate_std=("heart_rate_avg", "std"),
+            heart_rate_max=("heart_rate_avg", "max"),
+            calories_burned_mean=("calories_burned", "mean"),
+        )
+
+    def _aggregate_table(self, ids: pd.Series, numeric: pd.DataFrame) -> pd.DataFrame:
+        """ستون‌های تجمیعی ماتریس ویژگی، یک سطر برای هر شناسهٔ تمرین"""
+        table = numeric[AGGREGATE_FEATURES].astype(np.float32).set_axis(ids.to_numpy(), axis=0)
+        return table[~table.index.duplicated()]
+
+    def prepare_training_data(self) -> TrainingData:
+        """
+        آماده‌سازی داده‌ها برای یادگیری ماشین.
+
+        تمرینات با آمار بازخورد و پیشرفتشان (بر اساس workout_id) ترکیب می‌شوند و
+        ستون‌های فهرستی ml_models.MULTI_HOT_COLUMNS به ستون‌های sparse چندداغی تبدیل می‌شوند.
+        نتیجه تا تغییر بعدی داده‌ها نگه داشته می‌شود.
+        """
+        version = self.data_version()
+        if self._training_data is not None and self._training_data[0] == version:
+            return self._training_data[1]
+
+        workouts = self.get_workouts_df(["id", "level", "duration", "calories_burn", *MULTI_HOT_COLUMNS])
+        planned = pd.to_numeric(workouts["duration"], errors="coerce")
+        # شناسه‌های تکراری در داده‌های قدیمی یک مدت برنامه‌ریزی‌شده می‌گیرند
+        planned = planned.groupby(workouts["id"]).first()
+        frame = (workouts
+                 .join(self._feedback_aggregates(), on="id")
+                 .join(self._progress_aggregates(planned), on="id"))
+        numeric = frame[NUMERIC_FEATURES].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+
+        encoders = multi_hot_encoders()
+        blocks = [sparse.csr_matrix(numeric.to_numpy(dtype=np.float32))]
+        feature_names = list(NUMERIC_FEATURES)
+        for column, encoder in encoders.items():
+            blocks.append(encoder.fit_transform(frame[column]))
+            feature_names.extend(encoder.feature_names)
+
+        training_data = TrainingData(
+            frame=frame,
+            features=sparse.hstack(blocks, format="csr"),
+            feature_names=feature_names,
+            labels=frame["level"].to_numpy(dtype=object),
+            numeric=list(NUMERIC_FEATURES),
+            encoders=encoders,
+            aggregates=self._aggregate_table(frame["id"], numeric),
+        )
+        self._training_data = (version, training_data)
+        return training_data
+
+    def prepare_training_frame(self) -> pd.DataFrame:
+        """جدول آموزش به‌صورت DataFrame (تمرینات همراه با آمار بازخورد و پیشرفت)، برای کدی که پیش‌تر از prepare_training_data جدول می‌گرفت"""
+        return self.prepare_training_data().frame.copy()
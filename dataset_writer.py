@@ -0,0 +1,151 @@
+"""
+Streaming writer for large synthetic WorkoutDataGenerator datasets.
+
+Rows are generated shard by shard with the vectorized batch generators and
+written straight to disk as NDJSON or Parquet, so memory use is bounded by
+one shard per worker process whatever the total size. Every shard draws from
+its own child of a single SeedSequence, so the output depends only on the
+seed and shard size, not on the number of workers. Shards already on disk
+are skipped, which makes an interrupted run resumable.
+
+    python dataset_writer.py --rows 100000000 --shard-size 1000000 --output data/synthetic --format parquet
+
+Layout: <output>/<table>/part-NNNNN.<ext> for the workouts, exercises,
+user_feedback and workout_progress tables, plus manifest.json.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import serialization
+from data_generator import WorkoutDataGenerator
+from storage import write_atomic
+from timeutils import now_ts
+
+TABLES = ("workouts", "exercises", "user_feedback", "workout_progress")
+FORMATS = {"ndjson": "ndjson", "parquet": "parquet"}
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def shard_path(output, table, index, fmt):
+    return os.path.join(output, table, f"part-{index:05d}.{FORMATS[fmt]}")
+
+
+def generate_shard(seed_sequence, start_id, rows, feedback_per_workout=1, progress_per_workout=1, now=None):
+    """All tables for `rows` workouts with ids from start_id, as DataFrames"""
+    generator = WorkoutDataGenerator()
+    rng = np.random.default_rng(seed_sequence)
+    workouts = generator.generate_dataset_batch(rows, seed=rng, start_id=start_id)
+    ids = workouts["id"].to_numpy()
+    return {
+        "workouts": workouts,
+        "exercises": generator.generate_exercises_batch(workouts, seed=rng),
+        "user_feedback": generator.generate_feedback_batch(np.repeat(ids, feedback_per_workout), seed=rng, now=now),
+        "workout_progress": generator.generate_progress_batch(np.repeat(ids, progress_per_workout), seed=rng, now=now),
+    }
+
+
+def _write_table(path, frame, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_json(tmp_path, orient="records", lines=True, force_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_shard(output, fmt, seed_sequence, index, start_id, rows, feedback_per_workout=1,
+                progress_per_workout=1, now=None):
+    """Process pool worker: generate and write one shard of every table, returning rows written"""
+    paths = {table: shard_path(output, table, index, fmt) for table in TABLES}
+    if os.path.exists(paths["workouts"]):
+        return 0
+    tables = generate_shard(seed_sequence, start_id, rows, feedback_per_workout, progress_per_workout, now)
+    # Workouts go last: a shard counts as done once its workouts file exists
+    for table in reversed(TABLES):
+        _write_table(paths[table], tables[table], fmt)
+    return rows
+
+
+def write_dataset(output, rows, shard_size=1_000_000, fmt="ndjson", workers=None, seed=42,
+                  feedback_per_workout=1, progress_per_workout=1):
+    """Write `rows` synthetic workouts and their related rows as shards under output"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {sorted(FORMATS)}")
+    if fmt == "parquet" and not _parquet_available():
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+    if workers is None:
+        workers = int(os.getenv("FORMAMIND_DATASET_WORKERS", os.cpu_count() or 1))
+
+    start = time.perf_counter()
+    shards = -(-rows // shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    manifest = {
+        "rows": rows, "shard_size": shard_size, "shards": shards, "format": fmt, "seed": seed,
+        "feedback_per_workout": feedback_per_workout, "progress_per_workout": progress_per_workout,
+        "tables": list(TABLES)
+    }
+    # A resumed run must continue the same dataset, including its reference time
+    manifest_path = os.path.join(output, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'rb') as f:
+            previous = serialization.loads(f.read())
+        if any(previous.get(key) != value for key, value in manifest.items()):
+            raise ValueError(f"{output} holds a dataset written with different settings")
+        now = previous["now"]
+    else:
+        now = now_ts()
+    os.makedirs(output, exist_ok=True)
+    manifest.update(now=now, complete=False)
+    write_atomic(manifest_path, serialization.dumps(manifest, serialization.PRETTY))
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(write_shard, output, fmt, seeds[index], index, index * shard_size,
+                            min(shard_size, rows - index * shard_size), feedback_per_workout,
+                            progress_per_workout, now)
+            for index in range(shards)
+        ]
+        for future in as_completed(futures):
+            written += future.result()
+
+    manifest["complete"] = True
+    write_atomic(manifest_path, serialization.dumps(manifest, serialization.PRETTY))
+    elapsed = time.perf_counter() - start
+    return {"shards": shards, "rows_written": written, "seconds": elapsed,
+            "rows_per_second": written / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a sharded synthetic workout dataset")
+    parser.add_argument("--rows", type=int, required=True, help="number of workouts")
+    parser.add_argument("--shard-size", type=int, default=1_000_000, help="workouts per shard")
+    parser.add_argument("--output", required=True, help="output directory")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes (default: FORMAMIND_DATASET_WORKERS or all CPUs)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--feedback-per-workout", type=int, default=1)
+    parser.add_argument("--progress-per-workout", type=int, default=1)
+    args = parser.parse_args()
+
+    stats = write_dataset(args.output, args.rows, args.shard_size, args.format, args.workers, args.seed,
+                          args.feedback_per_workout, args.progress_per_workout)
+    print(f"{stats['rows_written']} workouts in {stats['shards']} shards written in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
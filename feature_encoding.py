@@ -0,0 +1,240 @@
+"""
+Numeric encoding of the activity, emotion and weather patterns AIEngine learns from.
+
+Each encoder turns pattern dicts into fixed-width float vectors: numbers pass
+through, ordinal values map to ranks, categories are one-hot over a
+vocabulary with a trailing "other" column, and timestamps become the sine and
+cosine of the local hour so 23:00 sits next to 00:00. The module encoders use
+the default vocabularies below, so vectors stored at ingest time stay
+comparable; FeatureEncoder.fit() adds the categories found in data, and a
+model keeps the fitted encoder it was trained with.
+
+MultiHotEncoder does the same for list-valued workout columns such as
+equipment_needed and tags, learning its vocabulary from training data and
+producing sparse matrices whose "other" column counts values it never saw.
+"""
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+INTENSITY_LEVELS = {"low": 1, "medium": 2, "high": 3}
+
+ACTIVITY_TYPES = ("cardio", "strength", "flexibility", "hiit", "yoga", "walking", "running",
+                  "cycling", "swimming", "meditation")
+LOCATIONS = ("home", "gym", "outdoor", "studio")
+EMOTIONS = ("happy", "sad", "stressed", "calm", "tired", "energetic", "anxious", "angry")
+WEATHER_CONDITIONS = ("clear", "clouds", "rain", "snow", "storm", "fog")
+
+
+def to_number(value: Any, ranks: Optional[Dict[str, int]] = None) -> float:
+    """Float value of a number, numeric string or ranked label; 0.0 when missing or unknown"""
+    if isinstance(value, str) and ranks is not None:
+        rank = ranks.get(value.lower())
+        if rank is not None:
+            return float(rank)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def hour_of_day(timestamps: Iterable[Any]) -> np.ndarray:
+    """Local fractional hour of each epoch timestamp, NaN where missing"""
+    hours = []
+    for ts in timestamps:
+        if isinstance(ts, (int, float)):
+            local = time.localtime(ts)
+            hours.append(local.tm_hour + local.tm_min / 60)
+        else:
+            hours.append(np.nan)
+    return np.array(hours, dtype=float)
+
+
+def cyclical(values: np.ndarray, period: float) -> np.ndarray:
+    """(sin, cos) columns of a periodic value; missing values encode as (0, 0)"""
+    angles = 2 * np.pi * values / period
+    encoded = np.column_stack([np.sin(angles), np.cos(angles)])
+    return np.nan_to_num(encoded, nan=0.0)
+
+
+def one_hot(values: Iterable[Any], vocabulary: Sequence[str]) -> np.ndarray:
+    """One-hot columns over vocabulary plus an "other" column; missing values are all zeros"""
+    values = list(values)
+    index = {name: i for i, name in enumerate(vocabulary)}
+    other = len(vocabulary)
+    rows = []
+    columns = []
+    for row, value in enumerate(values):
+        if value is None:
+            continue
+        rows.append(row)
+        columns.append(index.get(str(value).lower(), other))
+    encoded = np.zeros((len(values), other + 1))
+    encoded[rows, columns] = 1.0
+    return encoded
+
+
+class FeatureEncoder:
+    """Fixed-width vector encoding of one kind of pattern"""
+
+    def __init__(self, numeric: Sequence[str] = (), ordinal: Optional[Dict[str, Dict[str, int]]] = None,
+                 categorical: Optional[Dict[str, Sequence[str]]] = None, counted: Sequence[str] = (),
+                 timestamps: Sequence[str] = ()):
+        self.numeric = tuple(numeric)
+        self.ordinal = dict(ordinal or {})
+        self.categorical = {key: tuple(vocabulary) for key, vocabulary in (categorical or {}).items()}
+        self.counted = tuple(counted)
+        self.timestamps = tuple(timestamps)
+        self.feature_names = self._feature_names()
+
+    def _feature_names(self) -> List[str]:
+        names = list(self.numeric) + list(self.ordinal)
+        for key, vocabulary in self.categorical.items():
+            names.extend(f"{key}={value}" for value in vocabulary)
+            names.append(f"{key}=other")
+        names.extend(f"{key}_count" for key in self.counted)
+        for key in self.timestamps:
+            names.extend([f"{key}_sin", f"{key}_cos"])
+        return names
+
+    @property
+    def width(self) -> int:
+        return len(self.feature_names)
+
+    def fit(self, patterns: Iterable[Dict[str, Any]], min_count: int = 1) -> "FeatureEncoder":
+        """
+        A copy whose categorical vocabularies add every value seen at least
+        min_count times in patterns to this encoder's, sorted after them.
+        """
+        patterns = list(patterns)
+        categorical = {}
+        for key, vocabulary in self.categorical.items():
+            counts = Counter(str(p[key]).lower() for p in patterns if p.get(key) is not None)
+            seen = sorted(value for value, count in counts.items() if count >= min_count and value not in vocabulary)
+            categorical[key] = vocabulary + tuple(seen)
+        return FeatureEncoder(self.numeric, self.ordinal, categorical, self.counted, self.timestamps)
+
+    def extends(self, base: "FeatureEncoder") -> bool:
+        """Whether this encoder is base, or base fitted to data: same layout, vocabularies starting with base's"""
+        return ((self.numeric, self.ordinal, self.counted, self.timestamps) ==
+                (base.numeric, base.ordinal, base.counted, base.timestamps)
+                and self.categorical.keys() == base.categorical.keys()
+                and all(self.categorical[key][:len(vocabulary)] == vocabulary
+                        for key, vocabulary in base.categorical.items()))
+
+    def encode_many(self, patterns: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Matrix with one encoded row per pattern"""
+        patterns = list(patterns)
+        if not patterns:
+            return np.zeros((0, self.width))
+        blocks = []
+        for key in self.numeric:
+            blocks.append(np.array([to_number(p.get(key)) for p in patterns])[:, None])
+        for key, ranks in self.ordinal.items():
+            blocks.append(np.array([to_number(p.get(key), ranks) for p in patterns])[:, None])
+        for key, vocabulary in self.categorical.items():
+            blocks.append(one_hot([p.get(key) for p in patterns], vocabulary))
+        for key in self.counted:
+            blocks.append(np.array([len(p.get(key) or ()) for p in patterns], dtype=float)[:, None])
+        for key in self.timestamps:
+            blocks.append(cyclical(hour_of_day(p.get(key) for p in patterns), 24))
+        return np.hstack(blocks)
+
+    def encode(self, pattern: Dict[str, Any]) -> List[float]:
+        """Encoded vector of a single pattern, rounded for compact storage"""
+        return np.round(self.encode_many([pattern])[0], 4).tolist()
+
+
+ACTIVITY_ENCODER = FeatureEncoder(
+    numeric=["duration"],
+    ordinal={"intensity": INTENSITY_LEVELS},
+    categorical={"type": ACTIVITY_TYPES, "location": LOCATIONS},
+    timestamps=["time_of_day"]
+)
+
+EMOTION_ENCODER = FeatureEncoder(
+    ordinal={"intensity": INTENSITY_LEVELS},
+    categorical={"emotion": EMOTIONS},
+    counted=["triggers"],
+    timestamps=["time_of_day"]
+)
+
+WEATHER_ENCODER = FeatureEncoder(
+    numeric=["temperature", "humidity"],
+    categorical={"condition": WEATHER_CONDITIONS},
+    timestamps=["time_of_day"]
+)
+
+ENCODERS = {
+    "activity_patterns": ACTIVITY_ENCODER,
+    "emotion_patterns": EMOTION_ENCODER,
+    "weather_patterns": WEATHER_ENCODER,
+}
+
+
+def list_items(value: Any) -> List[str]:
+    """
+    Items of one list-valued cell as MultiHotEncoder sees them: None and NaN
+    are empty, a string or other scalar is a one-item list, and missing
+    items inside a list are skipped.
+    """
+    if isinstance(value, str):
+        return [value]
+    if pd.api.types.is_list_like(value):
+        return [str(item) for item in value if not (pd.api.types.is_scalar(item) and pd.isna(item))]
+    if value is None or pd.isna(value):
+        return []
+    return [str(value)]
+
+
+class MultiHotEncoder:
+    """
+    Sparse multi-hot columns for a list-valued column, over the values seen by fit().
+
+    Values missing from the vocabulary set the trailing "other" column rather
+    than failing, so new equipment at predict time needs no refit. Excluded
+    values are ignored altogether.
+    """
+
+    def __init__(self, name: str, exclude: Iterable[str] = ()):
+        self.name = name
+        self.exclude = frozenset(exclude)
+        self.vocabulary = ()
+
+    @staticmethod
+    def _explode(values: Iterable[Any]) -> pd.Series:
+        # One entry per list item, indexed by row; a plain string counts as a
+        # one-item list and empty or missing rows disappear
+        return pd.Series(list(values), dtype=object).explode().dropna().astype(str)
+
+    def fit(self, values: Iterable[Any]) -> "MultiHotEncoder":
+        self.vocabulary = tuple(sorted(set(self._explode(values).unique()) - self.exclude))
+        return self
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f"{self.name}={value}" for value in self.vocabulary] + [f"{self.name}=other"]
+
+    def transform(self, values: Iterable[Any]) -> sparse.csr_matrix:
+        """One row per input row with a 1 in the column of each value it holds"""
+        values = list(values)
+        items = self._explode(values)
+        if self.exclude:
+            items = items[~items.isin(self.exclude)]
+        other = len(self.vocabulary)
+        codes = pd.Index(self.vocabulary).get_indexer(items).astype(np.int64)
+        codes[codes < 0] = other
+        encoded = sparse.csr_matrix(
+            (np.ones(len(codes), dtype=np.float32), (items.index.to_numpy(), codes)),
+            shape=(len(values), other + 1))
+        # A value listed twice in one row still encodes as 1
+        encoded.data[:] = 1
+        return encoded
+
+    def fit_transform(self, values: Iterable[Any]) -> sparse.csr_matrix:
+        values = list(values)
+        return self.fit(values).transform(values)
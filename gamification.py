@@ -1,11 +1,13 @@
-import json
-import os
-from datetime import datetime, timedelta
 import random
+from storage import ShardedStore
+from timeutils import now_ts
 
 class GamificationEngine:
     def __init__(self):
         self.gamification_data_file = "gamification_data.json"
+        self.gamification_data_dir = "gamification_data"
+        self._store = ShardedStore(self.gamification_data_dir, legacy_path=self.gamification_data_file,
+                                   legacy_key="users")
         self.gamification_data = self._load_gamification_data()
         self.achievements = {
             "workout": {
@@ -89,16 +91,16 @@ class GamificationEngine:
         ]
 
     def _load_gamification_data(self):
-        """Load gamification data from JSON file"""
-        if os.path.exists(self.gamification_data_file):
-            with open(self.gamification_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"users": {}}
+        """Load gamification data lazily from per-user shards"""
+        return {"users": self._store.load({})}
 
-    def _save_gamification_data(self):
-        """Save gamification data to JSON file"""
-        with open(self.gamification_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.gamification_data, f, ensure_ascii=False, indent=4)
+    def _save_gamification_data(self, *paths):
+        """Save changed gamification paths to their users' shards"""
+        self._store.save(self.gamification_data["users"], *[path[1:] for path in paths])
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return self._store.batch()
 
     def initialize_user(self, user_id):
         """Initialize gamification data for a new user"""
@@ -116,7 +118,7 @@ class GamificationEngine:
                 "daily_challenges": [],
                 "rewards": []
             }
-            self._save_gamification_data()
+            self._save_gamification_data(("users", user_id))
             return True
         return False
 
@@ -125,20 +127,21 @@ class GamificationEngine:
         if user_id not in self.gamification_data["users"]:
             self.initialize_user(user_id)
 
-        user_data = self.gamification_data["users"][user_id]
-        user_data["points"] += points
+        with self.batch():
+            user_data = self.gamification_data["users"][user_id]
+            user_data["points"] += points
 
-        # Check for level up
-        current_level = user_data["level"]
-        for level in self.levels:
-            if user_data["points"] >= level["points_required"]:
-                current_level = level["level"]
+            # Check for level up
+            current_level = user_data["level"]
+            for level in self.levels:
+                if user_data["points"] >= level["points_required"]:
+                    current_level = level["level"]
 
-        if current_level > user_data["level"]:
-            user_data["level"] = current_level
-            self._add_reward(user_id, f"Level {current_level} Achieved!", "level_up")
+            if current_level > user_data["level"]:
+                user_data["level"] = current_level
+                self._add_reward(user_id, f"Level {current_level} Achieved!", "level_up")
 
-        self._save_gamification_data()
+            self._save_gamification_data(("users", user_id, "points"), ("users", user_id, "level"))
         return user_data["points"]
 
     def check_achievement(self, user_id, category, action, level="beginner"):
@@ -153,9 +156,11 @@ class GamificationEngine:
             if achievement["name"] not in [a["name"] for a in user_data["achievements"]]:
                 # Check achievement conditions based on action
                 if self._check_achievement_conditions(user_id, category, achievement, action):
-                    user_data["achievements"].append(achievement)
-                    self.add_points(user_id, achievement["points"], category)
-                    self._add_reward(user_id, f"Achievement Unlocked: {achievement['name']}", "achievement")
+                    with self.batch():
+                        user_data["achievements"].append(achievement)
+                        self._save_gamification_data(("users", user_id, "achievements", -1))
+                        self.add_points(user_id, achievement["points"], category)
+                        self._add_reward(user_id, f"Achievement Unlocked: {achievement['name']}", "achievement")
                     return achievement
 
         return None
@@ -184,11 +189,12 @@ class GamificationEngine:
         user_data = self.gamification_data["users"][user_id]
         user_data["streaks"][category] += 1
 
-        # Check for streak achievements
-        if user_data["streaks"][category] in [5, 10, 30]:
-            self._add_reward(user_id, f"{category.capitalize()} Streak: {user_data['streaks'][category]} days!", "streak")
+        with self.batch():
+            # Check for streak achievements
+            if user_data["streaks"][category] in [5, 10, 30]:
+                self._add_reward(user_id, f"{category.capitalize()} Streak: {user_data['streaks'][category]} days!", "streak")
 
-        self._save_gamification_data()
+            self._save_gamification_data(("users", user_id, "streaks", category))
         return user_data["streaks"][category]
 
     def get_daily_challenge(self, user_id):
@@ -208,7 +214,7 @@ class GamificationEngine:
             challenge = self._generate_advanced_challenge()
 
         user_data["daily_challenges"].append(challenge)
-        self._save_gamification_data()
+        self._save_gamification_data(("users", user_id, "daily_challenges", -1))
         return challenge
 
     def _generate_beginner_challenge(self):
@@ -246,10 +252,10 @@ class GamificationEngine:
         reward = {
             "description": description,
             "type": reward_type,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "date": now_ts()
         }
         self.gamification_data["users"][user_id]["rewards"].append(reward)
-        self._save_gamification_data()
+        self._save_gamification_data(("users", user_id, "rewards", -1))
 
     def get_user_stats(self, user_id):
         """Get user's gamification statistics"""
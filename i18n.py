@@ -1,16 +1,19 @@
-import json
 import os
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 import babel
 from babel.dates import format_date, format_time, format_datetime
 from babel.numbers import format_number, format_decimal, format_percent
+from storage import LazyDict, open_store
 
 class I18nManager:
     def __init__(self):
         self.translations_dir = "translations"
         self.default_locale = "en"
         self.current_locale = self.default_locale
-        self.translations = {}
+        self._stores = {}
+        # ExitStack of the open batch(); locale stores opened meanwhile join it
+        self._batch = None
         self.date_formats = {
             "short": "short",
             "medium": "medium",
@@ -33,22 +36,42 @@ class I18nManager:
         if not os.path.exists(self.translations_dir):
             os.makedirs(self.translations_dir)
         
-        # Load translations
-        self._load_translations()
+        # Locales are listed up front; each file is parsed on first use
+        self.translations = self._load_translations()
+
+    def _locale_store(self, locale):
+        """Get the storage backend for a locale's translation file"""
+        if locale not in self._stores:
+            store = self._stores[locale] = open_store(os.path.join(self.translations_dir, f"{locale}.json"))
+            if self._batch is not None:
+                self._batch.enter_context(store.batch())
+        return self._stores[locale]
 
     def _load_translations(self):
-        """Load all translation files"""
-        for filename in os.listdir(self.translations_dir):
-            if filename.endswith(".json"):
-                locale = filename[:-5]  # Remove .json extension
-                with open(os.path.join(self.translations_dir, filename), 'r', encoding='utf-8') as f:
-                    self.translations[locale] = json.load(f)
-
-    def _save_translations(self, locale):
+        """List translation files, loading each locale lazily"""
+        locales = [filename[:-5] for filename in os.listdir(self.translations_dir)  # Remove .json extension
+                   if filename.endswith(".json")]
+        return LazyDict(locales, lambda locale: self._locale_store(locale).load({}))
+
+    def _save_translations(self, locale, *keys):
         """Save translations for a specific locale"""
         if locale in self.translations:
-            with open(os.path.join(self.translations_dir, f"{locale}.json"), 'w', encoding='utf-8') as f:
-                json.dump(self.translations[locale], f, ensure_ascii=False, indent=4)
+            self._locale_store(locale).save(self.translations[locale], *[(key,) for key in keys])
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into a single save, including locales first used inside the block"""
+        if self._batch is not None:
+            yield self
+            return
+        with ExitStack() as stack:
+            for store in self._stores.values():
+                stack.enter_context(store.batch())
+            self._batch = stack
+            try:
+                yield self
+            finally:
+                self._batch = None
 
     def set_locale(self, locale):
         """Set the current locale"""
@@ -88,14 +111,14 @@ class I18nManager:
             self.translations[locale] = {}
         
         self.translations[locale][key] = value
-        self._save_translations(locale)
+        self._save_translations(locale, key)
         return True
 
     def remove_translation(self, locale, key):
         """Remove a translation"""
         if locale in self.translations and key in self.translations[locale]:
             del self.translations[locale][key]
-            self._save_translations(locale)
+            self._save_translations(locale, key)
             return True
         return False
 
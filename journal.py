@@ -1,41 +1,47 @@
-from datetime import datetime, timedelta
-import json
-import os
+from records import JournalEntry, decode_lists
+from storage import ShardedStore
+from timeutils import days_ago, now_ts, slice_range
 
 class JournalManager:
     def __init__(self):
         self.journal_file = "journals.json"
+        self.journal_dir = "journals"
+        self._store = ShardedStore(self.journal_dir, legacy_path=self.journal_file, decode=self._decode_journals)
         self.journals = self._load_journals()
 
     def _load_journals(self):
-        """Load journals from JSON file"""
-        if os.path.exists(self.journal_file):
-            with open(self.journal_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        """Load journals lazily from per-user shards"""
+        return self._store.load({})
 
-    def _save_journals(self):
-        """Save journals to JSON file"""
-        with open(self.journal_file, 'w', encoding='utf-8') as f:
-            json.dump(self.journals, f, ensure_ascii=False, indent=4)
+    def _decode_journals(self, shard):
+        """Convert a loaded shard's entries to JournalEntry records"""
+        return decode_lists(shard, JournalEntry)
+
+    def _save_journals(self, *paths):
+        """Save changed journal paths to their users' shards"""
+        self._store.save(self.journals, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return self._store.batch()
 
     def add_entry(self, user_id, mood, content, tags=None):
         """Add a new journal entry"""
         if user_id not in self.journals:
             self.journals[user_id] = []
 
-        entry = {
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "mood": mood,
-            "content": content,
-            "tags": tags or [],
-            "gratitude_list": [],
-            "goals": [],
-            "reflections": []
-        }
+        entry = JournalEntry(
+            date=now_ts(),
+            mood=mood,
+            content=content,
+            tags=tags or [],
+            gratitude_list=[],
+            goals=[],
+            reflections=[]
+        )
 
         self.journals[user_id].append(entry)
-        self._save_journals()
+        self._save_journals((user_id, -1))
         return entry
 
     def add_gratitude(self, user_id, entry_index, item):
@@ -45,7 +51,7 @@ class JournalManager:
                 self.journals[user_id][-1]["gratitude_list"].append(item)
             else:
                 self.journals[user_id][entry_index]["gratitude_list"].append(item)
-            self._save_journals()
+            self._save_journals((user_id, entry_index, "gratitude_list"))
 
     def add_goal(self, user_id, entry_index, goal):
         """Add a goal to a journal entry"""
@@ -54,15 +60,15 @@ class JournalManager:
                 self.journals[user_id][-1]["goals"].append({
                     "text": goal,
                     "completed": False,
-                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    "date": now_ts()
                 })
             else:
                 self.journals[user_id][entry_index]["goals"].append({
                     "text": goal,
                     "completed": False,
-                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    "date": now_ts()
                 })
-            self._save_journals()
+            self._save_journals((user_id, entry_index, "goals"))
 
     def add_reflection(self, user_id, entry_index, reflection):
         """Add a reflection to a journal entry"""
@@ -71,7 +77,7 @@ class JournalManager:
                 self.journals[user_id][-1]["reflections"].append(reflection)
             else:
                 self.journals[user_id][entry_index]["reflections"].append(reflection)
-            self._save_journals()
+            self._save_journals((user_id, entry_index, "reflections"))
 
     def get_entries(self, user_id, days=None, mood=None, tags=None):
         """Get journal entries with optional filters"""
@@ -81,8 +87,8 @@ class JournalManager:
         entries = self.journals[user_id]
         
         if days:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            entries = [e for e in entries if datetime.strptime(e["date"], "%Y-%m-%d %H:%M:%S") >= cutoff_date]
+            # Entries are appended in time order, so the window is a bisected slice
+            entries = slice_range(entries, start=days_ago(days))
         
         if mood:
             entries = [e for e in entries if e["mood"].lower() == mood.lower()]
@@ -127,10 +133,10 @@ class JournalManager:
     def mark_goal_completed(self, user_id, goal_index):
         """Mark a goal as completed"""
         if user_id in self.journals:
-            for entry in self.journals[user_id]:
+            for index, entry in enumerate(self.journals[user_id]):
                 for goal in entry["goals"]:
                     if goal_index == 0:
                         goal["completed"] = True
-                        self._save_journals()
+                        self._save_journals((user_id, index, "goals"))
                         return 
                     goal_index -= 1 
\ No newline at end of file
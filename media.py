@@ -1,15 +1,17 @@
 import os
-import json
 import uuid
-from datetime import datetime
 from PIL import Image
 import cv2
 import numpy as np
+from functools import cached_property
+from storage import open_store
+from timeutils import now_ts
 
 class MediaManager:
     def __init__(self):
         self.media_dir = "media"
         self.media_data_file = "media_data.json"
+        self._store = open_store(self.media_data_file)
         self.allowed_image_types = ['.jpg', '.jpeg', '.png', '.gif']
         self.allowed_video_types = ['.mp4', '.avi', '.mov']
         self.max_image_size = (1920, 1080)  # Maximum dimensions for images
@@ -22,20 +24,23 @@ class MediaManager:
             path = os.path.join(self.media_dir, subdir)
             if not os.path.exists(path):
                 os.makedirs(path)
-        
-        self.media_data = self._load_media_data()
+
+    @cached_property
+    def media_data(self):
+        """Media data, loaded from disk on first access"""
+        return self._load_media_data()
 
     def _load_media_data(self):
         """Load media data from JSON file"""
-        if os.path.exists(self.media_data_file):
-            with open(self.media_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"images": {}, "videos": {}}
+        return self._store.load({"images": {}, "videos": {}})
 
-    def _save_media_data(self):
+    def _save_media_data(self, *paths):
         """Save media data to JSON file"""
-        with open(self.media_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.media_data, f, ensure_ascii=False, indent=4)
+        self._store.save(self.media_data, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return self._store.batch()
 
     def upload_image(self, user_id, image_path, description=None, tags=None):
         """Upload and process an image"""
@@ -73,10 +78,10 @@ class MediaManager:
                 "thumbnail": f"thumb_{filename}",
                 "description": description,
                 "tags": tags or [],
-                "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "upload_date": now_ts(),
                 "type": "image"
             }
-            self._save_media_data()
+            self._save_media_data(("images", image_id))
 
             return image_id, "Success"
         except Exception as e:
@@ -124,12 +129,12 @@ class MediaManager:
                 "thumbnail": f"thumb_{filename}.jpg",
                 "description": description,
                 "tags": tags or [],
-                "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "upload_date": now_ts(),
                 "duration": duration,
                 "fps": fps,
                 "type": "video"
             }
-            self._save_media_data()
+            self._save_media_data(("videos", video_id))
 
             return video_id, "Success"
         except Exception as e:
@@ -166,7 +171,7 @@ class MediaManager:
                 os.remove(os.path.join(self.media_dir, 'thumbnails', media_info["thumbnail"]))
                 del self.media_data["videos"][media_id]
             
-            self._save_media_data()
+            self._save_media_data(("images", media_id), ("videos", media_id))
             return True
         return False
 
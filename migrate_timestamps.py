@@ -0,0 +1,176 @@
+"""
+One-time migration of stored timestamps to integer epoch seconds.
+
+Converts every timestamp field in the managers' data files (plain JSON
+documents, append-log files, user shards and the SQLite profile database)
+from the legacy isoformat()/"%Y-%m-%d %H:%M:%S" strings. Files are processed
+one at a time and logs line by line, so memory use is bounded by the largest
+single document. Values that are already integers are left alone, so the
+migration can be re-run safely.
+
+    python migrate_timestamps.py [--root DIR] [--dry-run]
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import tempfile
+
+import serialization
+from storage import file_lock, write_atomic
+from timeutils import to_epoch
+
+TIMESTAMP_FIELDS = {
+    "date", "created_at", "updated_at", "last_updated", "timestamp", "start_date", "end_date",
+    "started_at", "ended_at", "upload_date", "last_login", "last_triggered", "completed_at",
+    "requested_at", "submitted_at", "verified_at", "expires_at", "renewal_requested_at", "time_of_day",
+}
+
+DOCUMENTS = [
+    "user_profiles.json", "social_data.json", "support_data.json", "security_data.json",
+    "media_data.json", "nutrition_data.json", "reminders.json", "ai_data.json",
+    "trainer_payments.json", "trainer_accounts.json", "trainer_withdrawals.json",
+    "trainer_verifications.json", "certifications.json", "specializations.json",
+    "journals.json", "rewards.json", "gamification_data.json",
+]
+SHARD_DIRS = ["journals", "rewards", "gamification_data"]
+DATABASES = {"user_profiles.db": ["workout_history", "emotion_history"]}
+
+
+def convert_value(value):
+    """Epoch seconds for a legacy timestamp string, or the value unchanged"""
+    if isinstance(value, str):
+        try:
+            return to_epoch(value)
+        except ValueError:
+            return value
+    return value
+
+
+def convert(node):
+    """Convert timestamp fields in nested data in place, returning how many changed"""
+    changed = 0
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in TIMESTAMP_FIELDS and isinstance(value, str):
+                node[key] = convert_value(value)
+                changed += node[key] is not value
+            else:
+                changed += convert(value)
+    elif isinstance(node, list):
+        for item in node:
+            changed += convert(item)
+    return changed
+
+
+def migrate_document(path, dry_run=False):
+    """Migrate a JSON document and its append log, if any"""
+    changed = 0
+    with file_lock(path):
+        if os.path.exists(path):
+            data = serialization.load(path)
+            count = convert(data)
+            if count and not dry_run:
+                write_atomic(path, serialization.dumps(data))
+            changed += count
+        if os.path.exists(path + ".log"):
+            changed += migrate_log(path + ".log", dry_run)
+    return changed
+
+
+def migrate_log(log_path, dry_run=False):
+    """Rewrite an append log line by line, converting the values of each operation"""
+    changed = 0
+    directory = os.path.dirname(os.path.abspath(log_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as out, open(log_path, 'rb') as f:
+            for line in f:
+                try:
+                    operations = serialization.loads(line)
+                except serialization.DECODE_ERRORS:
+                    # Keep a torn trailing line as it is; replay skips it anyway
+                    out.write(line)
+                    continue
+                for operation in operations:
+                    if "v" not in operation:
+                        continue
+                    path = operation["p"]
+                    if path and path[-1] in TIMESTAMP_FIELDS and isinstance(operation["v"], str):
+                        value = convert_value(operation["v"])
+                        changed += value is not operation["v"]
+                        operation["v"] = value
+                    else:
+                        changed += convert(operation["v"])
+                out.write(serialization.dumps(operations, serialization.COMPACT) + b"\n")
+        if changed and not dry_run:
+            os.replace(tmp_path, log_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return changed
+
+
+def migrate_database(db_path, tables, dry_run=False):
+    """Convert history dates to epoch seconds, rebuilding tables whose date column is TEXT"""
+    from user_profile import SQLiteUserProfile
+
+    conn = sqlite3.connect(db_path)
+    conn.create_function("to_epoch", 1, convert_value, deterministic=True)
+    try:
+        changed = sum(conn.execute(f"SELECT COUNT(*) FROM {table} WHERE typeof(date) = 'text'").fetchone()[0]
+                      for table in tables)
+        changed += conn.execute("SELECT COUNT(*) FROM profiles WHERE typeof(created_at) = 'text' "
+                                "OR typeof(last_updated) = 'text'").fetchone()[0]
+        if dry_run or not changed:
+            return changed
+        with conn:
+            conn.execute("UPDATE profiles SET created_at = to_epoch(created_at), last_updated = to_epoch(last_updated)")
+            for table in tables:
+                conn.execute(f"DROP INDEX IF EXISTS idx_{table.split('_')[0]}_user_date")
+                conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+        # Recreate the tables with an INTEGER date column and their indexes
+        SQLiteUserProfile(db_path).close()
+        with conn:
+            for table in tables:
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table}_legacy)")]
+                selected = ["to_epoch(date)" if column == "date" else column for column in columns]
+                conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                             f"SELECT {', '.join(selected)} FROM {table}_legacy")
+                conn.execute(f"DROP TABLE {table}_legacy")
+        return changed
+    finally:
+        conn.close()
+
+
+def migrate(root=".", dry_run=False):
+    """Migrate every known store under root, returning converted values per file"""
+    results = {}
+    for name in DOCUMENTS:
+        path = os.path.join(root, name)
+        if os.path.exists(path) or os.path.exists(path + ".log"):
+            results[path] = migrate_document(path, dry_run)
+    for name in SHARD_DIRS:
+        for path in sorted(glob.glob(os.path.join(root, name, "shard_*.json"))):
+            results[path] = migrate_document(path, dry_run)
+    for name, tables in DATABASES.items():
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            results[path] = migrate_database(path, tables, dry_run)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored timestamps to integer epoch seconds")
+    parser.add_argument("--root", default=".", help="directory holding the data files")
+    parser.add_argument("--dry-run", action="store_true", help="count conversions without writing")
+    args = parser.parse_args()
+
+    results = migrate(args.root, args.dry_run)
+    for path, changed in results.items():
+        print(f"{path}: {changed} timestamps {'to convert' if args.dry_run else 'converted'}")
+    print(f"Total: {sum(results.values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,245 @@
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
+import io
+import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from scipy import sparse
+from typing import Dict, Any, Iterable, List, Union
+from feature_encoding import MultiHotEncoder, list_items, to_number
+from storage import write_atomic
+
+# ستون‌های فهرستی (و type به‌عنوان فهرست یک‌عضوی) که به ستون‌های چندداغی تبدیل می‌شوند
+MULTI_HOT_COLUMNS = ('type', 'equipment_needed', 'tags', 'benefits')
+LEVELS = ('beginner', 'intermediate', 'advanced')
+# شناسه‌ها فقط برای پیوند جدول‌ها هستند و نباید به ویژگی تبدیل شوند
+ID_COLUMNS = ('id', 'workout_id')
+
+
+def multi_hot_encoders(columns: Iterable[str] = MULTI_HOT_COLUMNS) -> Dict[str, MultiHotEncoder]:
+    """رمزگذارهای آموزش‌ندیدهٔ ستون‌های فهرستی، مشترک میان مدل و DataManager"""
+    # برچسب سطح در tags هم آمده و نباید به ویژگی تبدیل شود
+    return {col: MultiHotEncoder(col, exclude=LEVELS if col == 'tags' else ()) for col in columns}
+
 
 class WorkoutLevelPredictor:
+    # جنگل تصادفی روی ورودی sparse چند برابر کندتر آموزش می‌بیند؛ ماتریس‌های باریک‌تر از این متراکم می‌شوند
+    dense_max_features = 64
+    # تا این تعداد سطر، predict_batch از مسیر سریع بدون pandas استفاده می‌کند
+    fast_path_max_rows = 64
+
     def __init__(self):
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.label_encoders = {}
-        
-    def _prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        """آماده‌سازی ویژگی‌ها برای مدل"""
-        # کپی داده‌ها برای جلوگیری از تغییر داده‌های اصلی
-        df = data.copy()
-        
-        # تبدیل متغیرهای کیفی به عددی
-        categorical_columns = ['type', 'equipment_needed']
-        for col in categorical_columns:
-            if col in df.columns:
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    df[col] = self.label_encoders[col].fit_transform(df[col])
-                else:
-                    df[col] = self.label_encoders[col].transform(df[col])
-        
-        return df
-    
-    def train(self, data: pd.DataFrame) -> None:
-        """آموزش مدل"""
+        # چیدمان ویژگی‌ها، یک بار هنگام آموزش ساخته و همراه مدل ذخیره می‌شود
+        self.numeric_features = None
+        self.multi_hot_encoders = None
+        self.feature_names = None
+        # آمار تجمیعی زمان آموزش به تفکیک شناسهٔ تمرین (TrainingData.aggregates)؛ سطرهایی
+        # که این ستون‌ها را ندارند هنگام پیش‌بینی با همین مقادیر کامل می‌شوند
+        self.workout_aggregates = None
+        # جدول‌های مسیر سریع تک‌سطری؛ پس از آموزش یا بارگذاری در اولین پیش‌بینی ساخته می‌شود
+        self._compiled = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # از روی مدل دوباره ساخته می‌شود و نیازی به ذخیره ندارد
+        state['_compiled'] = None
+        return state
+
+    def _fit_encoders(self, data: pd.DataFrame) -> None:
+        """یادگیری ستون‌های عددی و واژگان ستون‌های فهرستی از داده‌های آموزش"""
+        self.numeric_features = [
+            col for col in data.columns
+            if col != 'level' and col not in ID_COLUMNS
+            and pd.api.types.is_numeric_dtype(data[col]) and not pd.api.types.is_bool_dtype(data[col])
+        ]
+        self.multi_hot_encoders = {
+            col: encoder.fit(data[col])
+            for col, encoder in multi_hot_encoders(c for c in MULTI_HOT_COLUMNS if c in data.columns).items()
+        }
+        self.feature_names = list(self.numeric_features)
+        for encoder in self.multi_hot_encoders.values():
+            self.feature_names.extend(encoder.feature_names)
+
+    def _missing_aggregates(self, columns: Iterable[str]) -> List[str]:
+        """ستون‌های تجمیعی که ورودی ندارد و باید از جدول زمان آموزش خوانده شوند"""
+        aggregates = getattr(self, 'workout_aggregates', None)
+        if aggregates is None:
+            return []
+        return [col for col in aggregates.columns if col not in columns]
+
+    def _prepare_features(self, data: pd.DataFrame) -> sparse.csr_matrix:
+        """آماده‌سازی ویژگی‌ها برای مدل به‌صورت ماتریس sparse"""
+        numeric = data.reindex(columns=self.numeric_features)
+        missing = self._missing_aggregates(data.columns)
+        if missing and 'id' in data.columns:
+            # تمرین‌های بدون آمار در زمان آموزش، مانند داده‌های آموزش، صفر می‌گیرند
+            numeric[missing] = self.workout_aggregates.reindex(data['id'])[missing].to_numpy()
+        numeric = numeric.apply(pd.to_numeric, errors="coerce").fillna(0.0)
+        blocks = [sparse.csr_matrix(numeric.to_numpy(dtype=np.float32))]
+        for col, encoder in self.multi_hot_encoders.items():
+            # مقادیر ناشناخته (مثلاً تجهیزات جدید) در ستون other شمرده می‌شوند
+            values = data[col] if col in data.columns else [None] * len(data)
+            blocks.append(encoder.transform(values))
+        return sparse.hstack(blocks, format="csr")
+
+    def _matrix(self, X: sparse.csr_matrix):
+        """ماتریس‌های باریک متراکم می‌شوند تا درخت‌ها سریع‌تر پیمایش شوند"""
+        return X.toarray() if X.shape[1] <= self.dense_max_features else X
+
+    def _fit(self, X: sparse.csr_matrix, y) -> None:
+        self._compiled = None
+        self.model.fit(self._matrix(X), y)
+
+    def _compile(self) -> Dict[str, Any]:
+        """جدول‌های جست‌وجوی رمزگذارها و درخت‌های جنگل در قالب آرایه‌های تخت"""
+        offset = len(self.numeric_features)
+        lookups = []
+        for col, encoder in self.multi_hot_encoders.items():
+            index = {value: offset + i for i, value in enumerate(encoder.vocabulary)}
+            lookups.append((col, index, offset + len(encoder.vocabulary), encoder.exclude))
+            offset += len(encoder.vocabulary) + 1
+
+        # همهٔ درخت‌ها در یک آرایه؛ برگ‌ها به خودشان اشاره می‌کنند تا پیمایش هم‌گام همهٔ درخت‌ها ساده بماند
+        trees = [estimator.tree_ for estimator in self.model.estimators_]
+        starts = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+        feature, threshold, left, right, proba = [], [], [], [], []
+        for start, tree in zip(starts, trees):
+            nodes = np.arange(tree.node_count) + start
+            leaf = tree.children_left < 0
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            left.append(np.where(leaf, nodes, tree.children_left + start))
+            right.append(np.where(leaf, nodes, tree.children_right + start))
+            values = tree.value[:, 0, :]
+            proba.append(values / values.sum(axis=1, keepdims=True))
+        aggregates = None
+        missing = self._missing_aggregates(())
+        if missing:
+            table = self.workout_aggregates[missing]
+            aggregates = (
+                {workout_id: row for row, workout_id in enumerate(table.index)},
+                [(col, self.numeric_features.index(col)) for col in missing],
+                table.to_numpy(dtype=np.float32),
+            )
+        return {
+            'numeric': [(col, i) for i, col in enumerate(self.numeric_features)],
+            'aggregates': aggregates,
+            'lookups': lookups,
+            'width': offset,
+            'roots': starts,
+            'depth': max(tree.max_depth for tree in trees),
+            'feature': np.concatenate(feature),
+            'threshold': np.concatenate(threshold),
+            'left': np.concatenate(left),
+            'right': np.concatenate(right),
+            'proba': np.concatenate(proba),
+        }
+
+    def _vector(self, features: Dict[str, Any], compiled: Dict[str, Any]) -> np.ndarray:
+        """بردار ویژگی یک سطر بدون pandas، با همان نتیجهٔ _prepare_features"""
+        x = np.zeros(compiled['width'], dtype=np.float32)
+        for col, i in compiled['numeric']:
+            value = to_number(features.get(col))
+            if value == value:
+                x[i] = value
+        if compiled['aggregates'] is not None:
+            rows, columns, values = compiled['aggregates']
+            row = rows.get(features.get('id'))
+            if row is not None:
+                for (col, i), value in zip(columns, values[row]):
+                    if col not in features:
+                        x[i] = value
+        for col, index, other, exclude in compiled['lookups']:
+            # NaN از ستون‌های خالی DataFrame می‌آید و مانند None نادیده گرفته می‌شود
+            for value in list_items(features.get(col)):
+                if value not in exclude:
+                    x[index.get(value, other)] = 1.0
+        return x
+
+    def train(self, data: Union[pd.DataFrame, Any]) -> None:
+        """آموزش مدل، با DataFrame تمرینات یا خروجی DataManager.prepare_training_data"""
+        if not isinstance(data, pd.DataFrame):
+            # TrainingData: ماتریس sparse آماده مستقیم به مدل داده می‌شود
+            self.numeric_features = list(data.numeric)
+            self.multi_hot_encoders = dict(data.encoders)
+            self.feature_names = list(data.feature_names)
+            self.workout_aggregates = data.aggregates
+            self._fit(data.features, data.labels)
+            return
+
         # آماده‌سازی داده‌ها
+        self.workout_aggregates = None
+        self._fit_encoders(data)
         X = self._prepare_features(data)
         y = data['level']
-        
+
         # آموزش مدل
-        self.model.fit(X, y)
-    
+        self._fit(X, y)
+
+    def _predict_rows(self, rows: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """مسیر سریع: بردار ویژگی‌ها با جدول‌های از پیش ساخته و پیمایش مستقیم درخت‌ها"""
+        compiled = getattr(self, '_compiled', None)
+        if compiled is None:
+            compiled = self._compiled = self._compile()
+        X = np.array([self._vector(row, compiled) for row in rows], dtype=np.float32).reshape(-1, compiled['width'])
+
+        # پیمایش هم‌گام همهٔ سطرها و درخت‌ها تا برگ و میانگین احتمال‌ها، مانند RandomForestClassifier.predict
+        nodes = np.tile(compiled['roots'], (len(X), 1))
+        row_index = np.arange(len(X))[:, None]
+        for _ in range(compiled['depth']):
+            go_left = X[row_index, compiled['feature'][nodes]] <= compiled['threshold'][nodes]
+            nodes = np.where(go_left, compiled['left'][nodes], compiled['right'][nodes])
+        return self.model.classes_[compiled['proba'][nodes].sum(axis=1).argmax(axis=1)]
+
     def predict(self, features: Dict[str, Any]) -> str:
         """پیش‌بینی سطح مناسب تمرین"""
-        # تبدیل ویژگی‌ها به DataFrame
-        df = pd.DataFrame([features])
-        
-        # آماده‌سازی ویژگی‌ها
-        X = self._prepare_features(df)
-        
-        # پیش‌بینی
-        prediction = self.model.predict(X)[0]
-        
+        # بدون DataFrame؛ کسری از میلی‌ثانیه به‌جای ده‌ها میلی‌ثانیه
+        prediction = self._predict_rows([features])[0]
+
         return prediction
-    
+
+    def predict_batch(self, data: Union[pd.DataFrame, Iterable[Dict[str, Any]], np.ndarray]) -> np.ndarray:
+        """
+        پیش‌بینی سطح برای چند سطر با یک فراخوانی مدل.
+
+        ورودی DataFrame، فهرستی از دیکشنری‌ها یا ماتریس ویژگی‌های رمزگذاری‌شده
+        (با ستون‌های feature_names) است.
+        """
+        if isinstance(data, np.ndarray):
+            return self.model.predict(data.astype(np.float32, copy=False))
+        if sparse.issparse(data):
+            X = sparse.csr_matrix(data, dtype=np.float32)
+        else:
+            if not isinstance(data, pd.DataFrame):
+                data = list(data)
+                if len(data) <= self.fast_path_max_rows:
+                    return self._predict_rows(data)
+                data = pd.DataFrame(data)
+            elif len(data) <= self.fast_path_max_rows:
+                return self._predict_rows(data.to_dict('records'))
+            X = self._prepare_features(data)
+        return self.model.predict(self._matrix(X))
+
     def evaluate(self, X_test: pd.DataFrame, y_test: pd.Series) -> Dict[str, float]:
         """ارزیابی مدل"""
         X_test_prepared = self._prepare_features(X_test)
-        score = self.model.score(X_test_prepared, y_test)
-        
+        score = self.model.score(self._matrix(X_test_prepared), y_test)
+
         return {
             'accuracy': score
-        } 
\ No newline at end of file
+        }
+
+    def save(self, path: str) -> None:
+        """ذخیرهٔ مدل همراه با رمزگذارهای ویژگی"""
+        buffer = io.BytesIO()
+        joblib.dump(self, buffer)
+        write_atomic(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path: str) -> "WorkoutLevelPredictor":
+        """بارگذاری مدلی که با save ذخیره شده است"""
+        with open(path, 'rb') as f:
+            predictor = joblib.load(f)
+        if not isinstance(predictor, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}")
+        return predictor
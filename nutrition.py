@@ -1,43 +1,50 @@
-import json
-import os
 from datetime import datetime, timedelta
 import random
+from functools import cached_property
+from storage import batch, open_store
+from timeutils import days_ago, now_ts, to_epoch
 
 class NutritionManager:
     def __init__(self):
         self.nutrition_data_file = "nutrition_data.json"
         self.meals_data_file = "meals_data.json"
-        self.nutrition_data = self._load_nutrition_data()
-        self.meals_data = self._load_meals_data()
+        self._nutrition_store = open_store(self.nutrition_data_file)
+        self._meals_store = open_store(self.meals_data_file)
+
+    @cached_property
+    def nutrition_data(self):
+        """Nutrition data, loaded from disk on first access"""
+        return self._load_nutrition_data()
 
     def _load_nutrition_data(self):
         """Load nutrition data from JSON file"""
-        if os.path.exists(self.nutrition_data_file):
-            with open(self.nutrition_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"users": {}}
+        return self._nutrition_store.load({"users": {}})
+
+    @cached_property
+    def meals_data(self):
+        """Meals data, loaded from disk on first access"""
+        return self._load_meals_data()
 
     def _load_meals_data(self):
         """Load meals data from JSON file"""
-        if os.path.exists(self.meals_data_file):
-            with open(self.meals_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
+        return self._meals_store.load({
             "breakfast": [],
             "lunch": [],
             "dinner": [],
             "snacks": []
-        }
+        })
 
-    def _save_nutrition_data(self):
+    def _save_nutrition_data(self, *paths):
         """Save nutrition data to JSON file"""
-        with open(self.nutrition_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.nutrition_data, f, ensure_ascii=False, indent=4)
+        self._nutrition_store.save(self.nutrition_data, *paths)
 
-    def _save_meals_data(self):
+    def _save_meals_data(self, *paths):
         """Save meals data to JSON file"""
-        with open(self.meals_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.meals_data, f, ensure_ascii=False, indent=4)
+        self._meals_store.save(self.meals_data, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return batch(self._nutrition_store, self._meals_store)
 
     def add_meal(self, meal_type, name, calories, protein, carbs, fat, ingredients, instructions):
         """Add a new meal to the database"""
@@ -52,7 +59,7 @@ class NutritionManager:
             "type": meal_type
         }
         self.meals_data[meal_type].append(meal)
-        self._save_meals_data()
+        self._save_meals_data((meal_type, -1))
         return True
 
     def get_meal_plan(self, user_id, days=7, preferences=None):
@@ -90,8 +97,7 @@ class NutritionManager:
 
     def log_meal(self, user_id, meal_type, meal_name, date=None):
         """Log a meal for a user"""
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
+        date = to_epoch(date) if date is not None else now_ts()
         
         if user_id not in self.nutrition_data["users"]:
             self.nutrition_data["users"][user_id] = {"meals": []}
@@ -102,7 +108,7 @@ class NutritionManager:
             "name": meal_name
         }
         self.nutrition_data["users"][user_id]["meals"].append(meal_entry)
-        self._save_nutrition_data()
+        self._save_nutrition_data(("users", user_id, "meals", -1))
         return True
 
     def get_nutrition_summary(self, user_id, days=7):
@@ -110,11 +116,12 @@ class NutritionManager:
         if user_id not in self.nutrition_data["users"]:
             return None
         
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        end_date = now_ts()
+        start_date = days_ago(days)
         
+        # Meals from before migrate_timestamps.py may still hold date strings
         meals = [m for m in self.nutrition_data["users"][user_id]["meals"]
-                if start_date <= datetime.strptime(m["date"], "%Y-%m-%d") <= end_date]
+                if start_date <= to_epoch(m["date"]) <= end_date]
         
         summary = {
             "total_meals": len(meals),
@@ -168,7 +175,7 @@ class NutritionManager:
             self.nutrition_data["users"][user_id] = {"meals": [], "preferences": {}}
         
         self.nutrition_data["users"][user_id]["preferences"] = preferences
-        self._save_nutrition_data()
+        self._save_nutrition_data(("users", user_id, "preferences"))
         return True
 
     def get_user_preferences(self, user_id):
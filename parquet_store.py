@@ -0,0 +1,264 @@
+"""
+Columnar storage for DataManager's tables as Parquet datasets.
+
+Each table is a directory of Parquet part files. An append writes its rows as
+a new part, so nothing already on disk is rewritten, and reads go through
+pyarrow.dataset, which only decodes the requested columns and skips row
+groups whose statistics rule out the filter. Once a table has more than
+`max_files` parts they are compacted into one.
+"""
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+import serialization
+from storage import LazyDict, file_lock, write_atomic
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+_counter = itertools.count()
+
+
+def _is_number(data_type: "pa.DataType") -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def to_arrow(rows: Any) -> "pa.Table":
+    """Arrow table from a DataFrame, an Arrow table or an iterable of dicts"""
+    if isinstance(rows, pa.Table):
+        data = rows
+    elif isinstance(rows, pd.DataFrame):
+        data = pa.Table.from_pandas(rows, preserve_index=False)
+    else:
+        return pa.Table.from_pylist(list(rows))
+    # Categoricals arrive dictionary-encoded; plain values keep parts written
+    # from frames and from records on one schema
+    schema = pa.schema([field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                        for field in data.schema])
+    return data.cast(schema) if not schema.equals(data.schema) else data
+
+
+def to_expression(filters: Any) -> Optional["ds.Expression"]:
+    """
+    Dataset filter from [(column, op, value), ...] conjunctions, a list of
+    such lists (OR of ANDs), or an Arrow expression.
+    """
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+    return pq.filters_to_expression(filters) if filters else None
+
+
+class ParquetStore:
+    """
+    Tables of records stored as partitioned Parquet datasets under directory.
+
+    An existing single-file JSON document at legacy_path is split into the
+    tables when the directory is created. Appends inside batch() are buffered
+    and written as one part per table on exit.
+    """
+
+    def __init__(self, directory: str, tables: Sequence[str], legacy_path: Optional[str] = None,
+                 max_files: Optional[int] = None):
+        if pa is None:
+            raise ImportError("The parquet backend needs pyarrow (pip install pyarrow)")
+        self.directory = directory
+        self.tables = tuple(tables)
+        self.max_files = max_files or int(os.getenv("FORMAMIND_PARQUET_MAX_FILES", "64"))
+        self._lock = threading.RLock()
+        self._pending = None
+        # table -> (part files, unified schema) as of the last read
+        self._schemas = {}
+        for table in self.tables:
+            os.makedirs(self._table_dir(table), exist_ok=True)
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        with file_lock(self.manifest_path):
+            if not os.path.exists(self.manifest_path):
+                if legacy_path and os.path.exists(legacy_path):
+                    self._import_legacy(legacy_path)
+                # Written last so an interrupted migration is simply redone
+                write_atomic(self.manifest_path, serialization.dumps({"format": "parquet",
+                                                                      "tables": list(self.tables)}))
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        document = serialization.load(legacy_path)
+        for table in self.tables:
+            self._replace(table, document.get(table, []))
+
+    def _table_dir(self, table: str) -> str:
+        return os.path.join(self.directory, table)
+
+    def _parts(self, table: str) -> List[str]:
+        directory = self._table_dir(table)
+        # Part names start with a nanosecond timestamp, so name order is append order
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.startswith("part-") and name.endswith(".parquet")]
+
+    def _write_part(self, table: str, data: "pa.Table") -> str:
+        path = os.path.join(self._table_dir(table),
+                            f"part-{time.time_ns():020d}-{os.getpid()}-{next(_counter)}.parquet")
+        tmp_path = os.path.join(self._table_dir(table), "." + os.path.basename(path) + ".tmp")
+        pq.write_table(data, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def _schema(self, table: str, parts: List[str]) -> Optional["pa.Schema"]:
+        cached = self._schemas.get(table)
+        if cached is not None and cached[0] == parts:
+            return cached[1]
+        schemas = [pq.read_schema(path) for path in parts]
+        # Columns added later read as nulls from older parts, and ints written
+        # next to floats come back as floats
+        schema = pa.unify_schemas(schemas, promote_options="permissive") if schemas else None
+        self._schemas[table] = (parts, schema)
+        return schema
+
+    def version(self, table: str) -> Tuple[str, ...]:
+        """Names of table's part files, which change whenever its rows do"""
+        self.flush()
+        return tuple(os.path.basename(path) for path in self._parts(table))
+
+    def _dataset(self, table: str) -> Optional["ds.Dataset"]:
+        parts = self._parts(table)
+        if not parts:
+            return None
+        return ds.dataset(parts, schema=self._schema(table, parts), format="parquet")
+
+    def append(self, table: str, rows: Any) -> None:
+        """Add rows (dicts, a DataFrame or an Arrow table) to the end of table"""
+        data = to_arrow(rows)
+        if data.num_rows == 0:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.setdefault(table, []).append(data)
+                return
+        self._append(table, [data])
+
+    def _conform(self, table: str, data: "pa.Table", schema: Optional["pa.Schema"]) -> "pa.Table":
+        """
+        Cast data's columns to the types table already stores them as, so a
+        part can never make the dataset unreadable. Integers next to stored
+        floats (and the reverse) are left for the permissive read schema;
+        any other mismatch that does not cast raises TypeError.
+        """
+        if schema is None:
+            return data
+        for i, field in enumerate(data.schema):
+            index = schema.get_field_index(field.name)
+            if index < 0 or field.type.equals(schema.field(index).type):
+                continue
+            stored = schema.field(index).type
+            if pa.types.is_null(stored) or (_is_number(field.type) and _is_number(stored)):
+                continue
+            try:
+                column = data.column(i).cast(stored)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+                raise TypeError(f"Column {field.name!r} of {table} is stored as {stored}, "
+                                f"got {field.type}: {e}") from None
+            data = data.set_column(i, field.with_type(stored), column)
+        return data
+
+    def _append(self, table: str, chunks: List["pa.Table"]) -> None:
+        try:
+            data = pa.concat_tables(chunks, promote_options="permissive")
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise TypeError(f"Rows appended to {table} have incompatible column types: {e}") from None
+        with self._lock, file_lock(self._table_dir(table)):
+            parts = self._parts(table)
+            self._write_part(table, self._conform(table, data, self._schema(table, parts)))
+            if len(self._parts(table)) > self.max_files:
+                self._compact(table)
+
+    def _replace(self, table: str, rows: Any) -> None:
+        data = to_arrow(rows)
+        with self._lock, file_lock(self._table_dir(table)):
+            old_parts = self._parts(table)
+            if data.num_rows:
+                self._write_part(table, data)
+            for path in old_parts:
+                os.remove(path)
+
+    def compact(self, table: Optional[str] = None) -> None:
+        """Merge the parts of table, or of every table, into a single file"""
+        for name in [table] if table else self.tables:
+            with self._lock, file_lock(self._table_dir(name)):
+                self._compact(name)
+
+    def _compact(self, table: str) -> None:
+        old_parts = self._parts(table)
+        if len(old_parts) < 2:
+            return
+        self._write_part(table, self._dataset(table).to_table())
+        for path in old_parts:
+            os.remove(path)
+
+    def read_table(self, table: str, columns: Optional[Sequence[str]] = None,
+                   filters: Any = None) -> "pa.Table":
+        """Arrow table of the rows matching filters, decoding only columns"""
+        self.flush()
+        expression = to_expression(filters)
+        with self._lock, file_lock(self._table_dir(table)):
+            dataset = self._dataset(table)
+            if dataset is None:
+                return pa.table({name: pa.array([], pa.null()) for name in columns or []})
+            return dataset.to_table(columns=list(columns) if columns is not None else None, filter=expression)
+
+    def read(self, table: str, columns: Optional[Sequence[str]] = None, filters: Any = None) -> pd.DataFrame:
+        """read_table() as a DataFrame"""
+        return self.read_table(table, columns, filters).to_pandas()
+
+    def count(self, table: str, filters: Any = None) -> int:
+        """Number of rows matching filters, answered from metadata when unfiltered"""
+        self.flush()
+        with self._lock, file_lock(self._table_dir(table)):
+            dataset = self._dataset(table)
+            return dataset.count_rows(filter=to_expression(filters)) if dataset is not None else 0
+
+    def load(self, default: Optional[Dict] = None) -> LazyDict:
+        """Record lists per table, each read on first access"""
+        return LazyDict(self.tables, lambda table: self.read_table(table).to_pylist())
+
+    def save(self, data: Dict, *paths: Tuple) -> None:
+        """Append the records at (table, -1) paths; rewrite whole tables for any other save"""
+        for path in paths or [(table,) for table in data]:
+            table = path[0]
+            if tuple(path[1:]) == (-1,):
+                self.append(table, [data[table][-1]])
+            else:
+                self.flush()
+                self._replace(table, data[table])
+
+    def flush(self) -> None:
+        """Write appends buffered by an open batch()"""
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return
+            self._pending = {}
+            for table, chunks in pending.items():
+                self._append(table, chunks)
+
+    @contextmanager
+    def batch(self):
+        """Buffer appends inside the block and write them as one part per table on exit"""
+        with self._lock:
+            outermost = self._pending is None
+            if outermost:
+                self._pending = {}
+        try:
+            yield self
+        finally:
+            if outermost:
+                with self._lock:
+                    self.flush()
+                    self._pending = None
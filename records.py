@@ -0,0 +1,142 @@
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+
+class Record(MutableMapping):
+    """
+    Compact mapping with a fixed set of keys held in __slots__.
+
+    Records behave like the dicts they replace (record["date"], .get(),
+    "key" in record, item assignment), so manager code and callers need not
+    care which one they hold. Keys outside the declared fields go to a
+    small overflow dict that only exists when used.
+    """
+
+    __slots__ = ("_extra",)
+    _fields = frozenset()
+    # Field name -> Record type its list items are decoded to
+    nested = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+
+    def __init__(self, **values):
+        self._extra = None
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """Build a record from its JSON shape, decoding nested record lists"""
+        if isinstance(data, cls):
+            return data
+        record = cls(**data)
+        for key, record_type in cls.nested.items():
+            if key in record:
+                record[key] = [record_type.from_dict(item) for item in record[key]]
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The record in its JSON shape; nested records are serialized separately"""
+        return dict(self.items())
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._fields:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._fields:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.__slots__:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class JournalEntry(Record):
+    __slots__ = ("date", "mood", "content", "tags", "gratitude_list", "goals", "reflections")
+
+
+class WorkoutRecord(Record):
+    __slots__ = ("date", "type", "duration", "intensity", "notes")
+
+
+class EmotionRecord(Record):
+    __slots__ = ("date", "emotion", "intensity", "notes")
+
+
+class Comment(Record):
+    __slots__ = ("id", "user_id", "content", "created_at", "likes")
+
+
+class Post(Record):
+    __slots__ = ("id", "user_id", "content", "media_url", "visibility", "created_at", "likes", "comments")
+    nested = {"comments": Comment}
+
+
+class TicketResponse(Record):
+    __slots__ = ("id", "user_id", "message", "is_staff", "created_at")
+
+
+class Ticket(Record):
+    __slots__ = ("id", "user_id", "subject", "description", "category", "priority", "status",
+                 "created_at", "updated_at", "responses")
+    nested = {"responses": TicketResponse}
+
+
+class ChatMessage(Record):
+    __slots__ = ("id", "user_id", "message", "is_staff", "timestamp")
+
+
+class Reminder(Record):
+    __slots__ = ("type", "time", "message", "repeat_daily", "created_at", "last_triggered")
+
+
+def decode_values(mapping: Dict[str, Any], record_type: type) -> Dict[str, Any]:
+    """Convert every value of a dict to record_type in place"""
+    for key, value in mapping.items():
+        mapping[key] = record_type.from_dict(value)
+    return mapping
+
+
+def decode_lists(mapping: Dict[str, Any], record_type: type) -> Dict[str, Any]:
+    """Convert every list value of a dict to a list of record_type in place"""
+    for key, items in mapping.items():
+        mapping[key] = [record_type.from_dict(item) for item in items]
+    return mapping
@@ -1,42 +1,50 @@
 from datetime import datetime, timedelta
-import json
-import os
 import schedule
 import time
 import threading
+from functools import cached_property
+from records import Reminder, decode_lists
+from storage import open_store
+from timeutils import now_ts
 
 class ReminderSystem:
     def __init__(self):
         self.reminders_file = "reminders.json"
-        self.reminders = self._load_reminders()
+        self._store = open_store(self.reminders_file, decode=self._decode_reminders)
         self.notification_thread = None
         self.is_running = False
 
+    @cached_property
+    def reminders(self):
+        return self._load_reminders()
+
     def _load_reminders(self):
-        if os.path.exists(self.reminders_file):
-            with open(self.reminders_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        return self._store.load({})
+
+    def _decode_reminders(self, reminders):
+        return decode_lists(reminders, Reminder)
+
+    def _save_reminders(self, *paths):
+        self._store.save(self.reminders, *paths)
 
-    def _save_reminders(self):
-        with open(self.reminders_file, 'w', encoding='utf-8') as f:
-            json.dump(self.reminders, f, ensure_ascii=False, indent=4)
+    def batch(self):
+        return self._store.batch()
 
     def add_reminder(self, user_id, reminder_type, time, message, repeat_daily=False):
         if user_id not in self.reminders:
             self.reminders[user_id] = []
         
-        reminder = {
-            "type": reminder_type,  # workout, emotion, water, etc.
-            "time": time,  # HH:MM format
-            "message": message,
-            "repeat_daily": repeat_daily,
-            "created_at": datetime.now().isoformat(),
-            "last_triggered": None
-        }
+        reminder = Reminder(
+            type=reminder_type,  # workout, emotion, water, etc.
+            time=time,  # HH:MM format
+            message=message,
+            repeat_daily=repeat_daily,
+            created_at=now_ts(),
+            last_triggered=None
+        )
         
         self.reminders[user_id].append(reminder)
-        self._save_reminders()
+        self._save_reminders((user_id, -1))
         return reminder
 
     def get_reminders(self, user_id):
@@ -45,7 +53,7 @@ class ReminderSystem:
     def remove_reminder(self, user_id, reminder_index):
         if user_id in self.reminders and 0 <= reminder_index < len(self.reminders[user_id]):
             self.reminders[user_id].pop(reminder_index)
-            self._save_reminders()
+            self._save_reminders((user_id,))
             return True
         return False
 
@@ -65,11 +73,11 @@ class ReminderSystem:
         while self.is_running:
             current_time = datetime.now().strftime("%H:%M")
             for user_id, user_reminders in self.reminders.items():
-                for reminder in user_reminders:
+                for index, reminder in enumerate(user_reminders):
                     if reminder["time"] == current_time:
                         self._send_notification(user_id, reminder)
-                        reminder["last_triggered"] = datetime.now().isoformat()
-                        self._save_reminders()
+                        reminder["last_triggered"] = now_ts()
+                        self._save_reminders((user_id, index, "last_triggered"))
             time.sleep(30)  # Check every 30 seconds
 
     def _send_notification(self, user_id, reminder):
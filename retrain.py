@@ -0,0 +1,162 @@
+"""
+Nightly refit of every user's activity model.
+
+Walks all users in ai_data.json and fits their ActivityModel from the
+retained patterns in a process pool, writing the models into a new version
+directory under ai_models/. Finished users are appended to a checkpoint
+file, so an interrupted run picks up where it stopped when started again.
+Only when every user is done is ai_models/current.json switched to the new
+version; AIEngine reads models from there without ever fitting them while
+serving. Online updates go to ai_models/live/ instead, and current.json
+records when this run read the patterns, so AIEngine keeps serving a live
+model that saw patterns ingested after that. Older versions beyond --keep
+are removed, never the published one or one still being built.
+
+The same version also gets a WorkoutLevelPredictor trained on DataManager's
+workouts, feedback and progress, saved with its feature encoders.
+
+    python retrain.py [--root DIR] [--workers N] [--chunk-size N] [--keep N]
+"""
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import serialization
+from ai_engine import fit_activity_model, model_filename, write_activity_model
+from data_manager import DataManager
+from ml_models import WorkoutLevelPredictor
+from storage import open_store, write_atomic
+from timeutils import now_ts
+
+CURRENT = "current.json"
+BUILDING = "building.json"
+CHECKPOINT = "done.log"
+LEVEL_MODEL = "workout_level.joblib"
+
+
+def fit_users(version_dir, tasks):
+    """Process pool worker: fit and write the models of (user_id, patterns) tasks"""
+    done = []
+    for user_id, patterns in tasks:
+        if patterns:
+            write_activity_model(os.path.join(version_dir, model_filename(user_id)), fit_activity_model(patterns))
+        done.append(user_id)
+    return done
+
+
+def _read_json(path):
+    with open(path, 'rb') as f:
+        return serialization.loads(f.read())
+
+
+def _completed_users(checkpoint):
+    if not os.path.exists(checkpoint):
+        return set()
+    with open(checkpoint, 'r', encoding='utf-8') as f:
+        # A line cut short by a crash has no newline and is redone
+        return {line[:-1] for line in f if line.endswith("\n")}
+
+
+def _record_completed(checkpoint, user_ids):
+    with open(checkpoint, 'a', encoding='utf-8') as f:
+        f.write("".join(f"{serialization.dumps(user_id).decode()}\n" for user_id in user_ids))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def train_level_model(root, version_dir):
+    """Fit and save the workout level predictor, unless this version already has one"""
+    path = os.path.join(version_dir, LEVEL_MODEL)
+    if os.path.exists(path):
+        return False
+    training_data = DataManager(os.path.join(root, "data", "workout_data.json")).prepare_training_data()
+    if not len(training_data):
+        return False
+    predictor = WorkoutLevelPredictor()
+    predictor.train(training_data)
+    predictor.save(path)
+    return True
+
+
+def _prune_versions(models_dir, keep):
+    in_use = set()
+    for name in (CURRENT, BUILDING):
+        path = os.path.join(models_dir, name)
+        if os.path.exists(path):
+            in_use.add(_read_json(path)["version"])
+    versions = sorted(name for name in os.listdir(models_dir)
+                      if name.startswith("v") and os.path.isdir(os.path.join(models_dir, name)))
+    for name in versions[:-keep] if keep > 0 else []:
+        if name not in in_use:
+            shutil.rmtree(os.path.join(models_dir, name), ignore_errors=True)
+
+
+def retrain(root=".", workers=None, chunk_size=200, keep=3):
+    """Fit every user's model into a new version and publish it, resuming an interrupted run"""
+    start = time.perf_counter()
+    models_dir = os.path.join(root, "ai_models")
+    os.makedirs(models_dir, exist_ok=True)
+    building = os.path.join(models_dir, BUILDING)
+    if os.path.exists(building):
+        build = _read_json(building)
+        version, started_at = build["version"], build["started_at"]
+    else:
+        started_at = now_ts()
+        version = f"v{started_at}"
+        write_atomic(building, serialization.dumps({"version": version, "started_at": started_at}))
+    version_dir = os.path.join(models_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    checkpoint = os.path.join(version_dir, CHECKPOINT)
+    completed = _completed_users(checkpoint)
+
+    user_patterns = open_store(os.path.join(root, "ai_data.json")).load({}).get("user_patterns", {})
+    tasks = [(user_id, patterns.get("activity_patterns", [])) for user_id, patterns in user_patterns.items()
+             if serialization.dumps(user_id).decode() not in completed]
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    if workers is None:
+        workers = int(os.getenv("FORMAMIND_AI_WORKERS", os.cpu_count() or 1))
+
+    fitted = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(fit_users, version_dir, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            done = future.result()
+            _record_completed(checkpoint, done)
+            fitted += len(done)
+    level_model = train_level_model(root, version_dir)
+
+    write_atomic(os.path.join(models_dir, CURRENT),
+                 serialization.dumps({"version": version, "published_at": now_ts(), "users": len(user_patterns),
+                                      # Patterns were read after this; later online updates are only in live/
+                                      "snapshot_at": started_at}))
+    os.remove(building)
+    _prune_versions(models_dir, keep)
+    elapsed = time.perf_counter() - start
+    return {
+        "version": version,
+        "users": len(user_patterns),
+        "fitted": fitted,
+        "resumed": len(completed),
+        "level_model": level_model,
+        "seconds": elapsed,
+        "users_per_second": fitted / elapsed if elapsed else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refit every user's activity model into a new version")
+    parser.add_argument("--root", default=".", help="directory holding ai_data.json")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: FORMAMIND_AI_WORKERS or all CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="users per worker task and checkpoint")
+    parser.add_argument("--keep", type=int, default=3, help="model versions to keep")
+    args = parser.parse_args()
+
+    stats = retrain(args.root, args.workers, args.chunk_size, args.keep)
+    print(f"Published {stats['version']}: {stats['fitted']} users fitted, {stats['resumed']} resumed "
+          f"in {stats['seconds']:.1f}s ({stats['users_per_second']:.0f} users/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from datetime import datetime
-import json
-import os
+from storage import ShardedStore
 
 class RewardSystem:
     def __init__(self):
         self.rewards_file = "rewards.json"
+        self.rewards_dir = "rewards"
+        self._store = ShardedStore(self.rewards_dir, legacy_path=self.rewards_file)
         self.rewards = self._load_rewards()
         self.achievements = {
             "workout_streak": {
@@ -30,14 +31,13 @@ class RewardSystem:
         }
 
     def _load_rewards(self):
-        if os.path.exists(self.rewards_file):
-            with open(self.rewards_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        return self._store.load({})
 
-    def _save_rewards(self):
-        with open(self.rewards_file, 'w', encoding='utf-8') as f:
-            json.dump(self.rewards, f, ensure_ascii=False, indent=4)
+    def _save_rewards(self, *paths):
+        self._store.save(self.rewards, *paths)
+
+    def batch(self):
+        return self._store.batch()
 
     def initialize_user(self, user_id):
         if user_id not in self.rewards:
@@ -51,13 +51,13 @@ class RewardSystem:
                 },
                 "last_activity": None
             }
-            self._save_rewards()
+            self._save_rewards((user_id,))
 
     def add_points(self, user_id, points):
         if user_id in self.rewards:
             self.rewards[user_id]["points"] += points
             self._check_level_up(user_id)
-            self._save_rewards()
+            self._save_rewards((user_id, "points"), (user_id, "level"))
             return True
         return False
 
@@ -71,23 +71,24 @@ class RewardSystem:
         return False
 
     def check_achievement(self, user_id, achievement_type, data=None):
-        if user_id not in self.rewards:
-            self.initialize_user(user_id)
+        with self.batch():
+            if user_id not in self.rewards:
+                self.initialize_user(user_id)
 
-        if achievement_type == "workout_streak":
-            self.rewards[user_id]["streaks"]["workout"] += 1
-            if self.rewards[user_id]["streaks"]["workout"] >= 7:
-                self._award_achievement(user_id, "workout_streak")
-        elif achievement_type == "emotion_tracking":
-            self.rewards[user_id]["streaks"]["emotion"] += 1
-            if self.rewards[user_id]["streaks"]["emotion"] >= 5:
-                self._award_achievement(user_id, "emotion_tracking")
-        elif achievement_type == "goal_achieved":
-            self._award_achievement(user_id, "goal_achieved")
-        elif achievement_type == "perfect_week":
-            self._award_achievement(user_id, "perfect_week")
+            if achievement_type == "workout_streak":
+                self.rewards[user_id]["streaks"]["workout"] += 1
+                if self.rewards[user_id]["streaks"]["workout"] >= 7:
+                    self._award_achievement(user_id, "workout_streak")
+            elif achievement_type == "emotion_tracking":
+                self.rewards[user_id]["streaks"]["emotion"] += 1
+                if self.rewards[user_id]["streaks"]["emotion"] >= 5:
+                    self._award_achievement(user_id, "emotion_tracking")
+            elif achievement_type == "goal_achieved":
+                self._award_achievement(user_id, "goal_achieved")
+            elif achievement_type == "perfect_week":
+                self._award_achievement(user_id, "perfect_week")
 
-        self._save_rewards()
+            self._save_rewards((user_id, "streaks"), (user_id, "achievements"))
 
     def _award_achievement(self, user_id, achievement_type):
         if achievement_type in self.achievements:
@@ -8,33 +8,41 @@ import jwt
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from functools import cached_property
+from storage import open_store
+from timeutils import now_ts
 
 class SecurityManager:
     def __init__(self):
         self.security_data_file = "security_data.json"
-        self.security_data = self._load_security_data()
+        self._store = open_store(self.security_data_file)
         self.encryption_key = self._generate_encryption_key()
         self.fernet = Fernet(self.encryption_key)
         self.jwt_secret = os.getenv("JWT_SECRET", secrets.token_hex(32))
         self.jwt_algorithm = "HS256"
         self.jwt_expiry = timedelta(days=1)
 
+    @cached_property
+    def security_data(self):
+        """Security data, loaded from disk on first access"""
+        return self._load_security_data()
+
     def _load_security_data(self):
         """Load security data from JSON file"""
-        if os.path.exists(self.security_data_file):
-            with open(self.security_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
+        return self._store.load({
             "users": {},
             "sessions": {},
             "backups": [],
             "privacy_settings": {}
-        }
+        })
 
-    def _save_security_data(self):
+    def _save_security_data(self, *paths):
         """Save security data to JSON file"""
-        with open(self.security_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.security_data, f, ensure_ascii=False, indent=4)
+        self._store.save(self.security_data, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return self._store.batch()
 
     def _generate_encryption_key(self):
         """Generate encryption key for data encryption"""
@@ -74,7 +82,7 @@ class SecurityManager:
             "password_hash": hashed_password,
             "salt": salt,
             "email": self.encrypt_data(email),
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "created_at": now_ts(),
             "last_login": None,
             "failed_attempts": 0,
             "two_factor_enabled": False,
@@ -90,7 +98,7 @@ class SecurityManager:
             "notifications": True
         }
         
-        self._save_security_data()
+        self._save_security_data(("users", user_id), ("privacy_settings", user_id))
         return True, "User registered successfully"
 
     def authenticate_user(self, user_id, password):
@@ -108,13 +116,13 @@ class SecurityManager:
         hashed_password, _ = self._hash_password(password, user_data["salt"])
         if hashed_password != user_data["password_hash"]:
             user_data["failed_attempts"] += 1
-            self._save_security_data()
+            self._save_security_data(("users", user_id, "failed_attempts"))
             return False, "Invalid password"
 
         # Reset failed attempts and update last login
         user_data["failed_attempts"] = 0
-        user_data["last_login"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._save_security_data()
+        user_data["last_login"] = now_ts()
+        self._save_security_data(("users", user_id, "failed_attempts"), ("users", user_id, "last_login"))
 
         # Generate JWT token
         token = self._generate_jwt_token(user_id)
@@ -147,7 +155,7 @@ class SecurityManager:
         secret = secrets.token_hex(16)
         self.security_data["users"][user_id]["two_factor_enabled"] = True
         self.security_data["users"][user_id]["two_factor_secret"] = self.encrypt_data(secret)
-        self._save_security_data()
+        self._save_security_data(("users", user_id, "two_factor_enabled"), ("users", user_id, "two_factor_secret"))
         return True, secret
 
     def verify_two_factor(self, user_id, code):
@@ -182,7 +190,7 @@ class SecurityManager:
             return False, "User not found"
 
         self.security_data["privacy_settings"][user_id].update(settings)
-        self._save_security_data()
+        self._save_security_data(("privacy_settings", user_id))
         return True, "Privacy settings updated"
 
     def get_privacy_settings(self, user_id):
@@ -198,12 +206,12 @@ class SecurityManager:
 
         backup = {
             "user_id": user_id,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": now_ts(),
             "data": self.encrypt_data(json.dumps(self.security_data["users"][user_id]))
         }
         
         self.security_data["backups"].append(backup)
-        self._save_security_data()
+        self._save_security_data(("backups", -1))
         return True, "Backup created successfully"
 
     def restore_backup(self, user_id, backup_timestamp):
@@ -222,7 +230,7 @@ class SecurityManager:
         try:
             decrypted_data = json.loads(self.decrypt_data(backup["data"]))
             self.security_data["users"][user_id] = decrypted_data
-            self._save_security_data()
+            self._save_security_data(("users", user_id))
             return True, "Backup restored successfully"
         except Exception as e:
             return False, f"Error restoring backup: {str(e)}"
@@ -240,7 +248,7 @@ class SecurityManager:
         self.security_data["backups"] = [b for b in self.security_data["backups"]
                                        if b["user_id"] != user_id]
         
-        self._save_security_data()
+        self._save_security_data(("users", user_id), ("privacy_settings", user_id), ("backups",))
         return True, "User data deleted successfully"
 
     def get_security_logs(self, user_id):
@@ -276,5 +284,5 @@ class SecurityManager:
         user_data["salt"] = new_salt
         user_data["failed_attempts"] = 0
         
-        self._save_security_data()
+        self._save_security_data(("users", user_id))
         return True, "Password changed successfully" 
\ No newline at end of file
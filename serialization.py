@@ -0,0 +1,112 @@
+import gc
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+PRETTY = "pretty"
+COMPACT = "compact"
+
+
+def _default(obj: Any) -> Any:
+    """Serialize objects with a to_dict() method, such as records.Record"""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=4, default=_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def _orjson_dumps(obj: Any, pretty: bool) -> bytes:
+    # orjson only indents by two spaces, which is fine for a debug view
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if pretty:
+        options |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=_default, option=options)
+
+
+def _msgspec_dumps(obj: Any, pretty: bool) -> bytes:
+    encoded = msgspec.json.encode(obj, enc_hook=_default)
+    return msgspec.json.format(encoded, indent=4) if pretty else encoded
+
+
+SERIALIZERS = {"json": (_stdlib_dumps, json.loads)}
+DECODE_ERRORS = (ValueError,)
+if msgspec is not None:
+    SERIALIZERS["msgspec"] = (_msgspec_dumps, msgspec.json.decode)
+    DECODE_ERRORS += (msgspec.DecodeError,)
+if orjson is not None:
+    SERIALIZERS["orjson"] = (_orjson_dumps, orjson.loads)
+
+
+def backend_name() -> str:
+    """Serializer in use: FORMAMIND_JSON_BACKEND if installed, else the fastest available"""
+    name = os.getenv("FORMAMIND_JSON_BACKEND")
+    if name in SERIALIZERS:
+        return name
+    for name in ("orjson", "msgspec", "json"):
+        if name in SERIALIZERS:
+            return name
+
+
+def is_pretty(mode: Optional[str] = None) -> bool:
+    """Whether to indent output; FORMAMIND_JSON_MODE selects compact (default) or pretty"""
+    return (mode or os.getenv("FORMAMIND_JSON_MODE", COMPACT)) == PRETTY
+
+
+def dumps(obj: Any, mode: Optional[str] = None, backend: Optional[str] = None) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes"""
+    return SERIALIZERS[backend or backend_name()][0](obj, is_pretty(mode))
+
+
+_gc_lock = threading.Lock()
+# Threads currently inside gc_paused(), and whether the collector was on before the first
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Keep the cyclic collector off while any thread is inside the block, restoring it after the last one"""
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def loads(data: Union[bytes, str], backend: Optional[str] = None) -> Any:
+    """Parse JSON from bytes or str"""
+    # Parsing allocates millions of containers that can't form cycles, and
+    # letting the cyclic collector chase them roughly doubles the parse time
+    with gc_paused():
+        return SERIALIZERS[backend or backend_name()][1](data)
+
+
+def load(path: str, backend: Optional[str] = None) -> Any:
+    """Read and parse a JSON file"""
+    with open(path, 'rb') as f:
+        return loads(f.read(), backend)
@@ -1,30 +1,41 @@
-import json
-import os
-from datetime import datetime
 import uuid
+from functools import cached_property
+from records import Comment, Post, decode_values
+from storage import open_store
+from timeutils import now_ts
 
 class SocialSystem:
     def __init__(self):
         self.social_file = "social_data.json"
-        self.social_data = self._load_social_data()
+        self._store = open_store(self.social_file, decode=self._decode_social_data)
+
+    @cached_property
+    def social_data(self):
+        """Social data, loaded from disk on first access"""
+        return self._load_social_data()
 
     def _load_social_data(self):
         """Load social data from JSON file"""
-        if os.path.exists(self.social_file):
-            with open(self.social_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
+        return self._store.load({
             "challenges": {},
             "groups": {},
             "posts": {},
             "friends": {},
             "comments": {}
-        }
+        })
+
+    def _decode_social_data(self, social_data):
+        """Convert loaded posts and their comments to records"""
+        decode_values(social_data.get("posts", {}), Post)
+        return social_data
 
-    def _save_social_data(self):
+    def _save_social_data(self, *paths):
         """Save social data to JSON file"""
-        with open(self.social_file, 'w', encoding='utf-8') as f:
-            json.dump(self.social_data, f, ensure_ascii=False, indent=4)
+        self._store.save(self.social_data, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return self._store.batch()
 
     def create_challenge(self, creator_id, title, description, duration_days, goal_type, target):
         """Create a new challenge"""
@@ -37,7 +48,7 @@ class SocialSystem:
             "duration_days": duration_days,
             "goal_type": goal_type,
             "target": target,
-            "start_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "start_date": now_ts(),
             "end_date": None,
             "participants": [creator_id],
             "progress": {creator_id: 0},
@@ -45,7 +56,7 @@ class SocialSystem:
         }
         
         self.social_data["challenges"][challenge_id] = challenge
-        self._save_social_data()
+        self._save_social_data(("challenges", challenge_id))
         return challenge_id
 
     def join_challenge(self, user_id, challenge_id):
@@ -55,7 +66,8 @@ class SocialSystem:
             if challenge["status"] == "active" and user_id not in challenge["participants"]:
                 challenge["participants"].append(user_id)
                 challenge["progress"][user_id] = 0
-                self._save_social_data()
+                self._save_social_data(("challenges", challenge_id, "participants"),
+                                       ("challenges", challenge_id, "progress", user_id))
                 return True
         return False
 
@@ -65,7 +77,7 @@ class SocialSystem:
             challenge = self.social_data["challenges"][challenge_id]
             if user_id in challenge["participants"]:
                 challenge["progress"][user_id] = progress
-                self._save_social_data()
+                self._save_social_data(("challenges", challenge_id, "progress", user_id))
                 return True
         return False
 
@@ -77,13 +89,13 @@ class SocialSystem:
             "creator_id": creator_id,
             "name": name,
             "description": description,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "created_at": now_ts(),
             "members": [creator_id],
             "admins": [creator_id]
         }
         
         self.social_data["groups"][group_id] = group
-        self._save_social_data()
+        self._save_social_data(("groups", group_id))
         return group_id
 
     def join_group(self, user_id, group_id):
@@ -92,42 +104,42 @@ class SocialSystem:
             group = self.social_data["groups"][group_id]
             if user_id not in group["members"]:
                 group["members"].append(user_id)
-                self._save_social_data()
+                self._save_social_data(("groups", group_id, "members", -1))
                 return True
         return False
 
     def create_post(self, user_id, content, media_url=None, visibility="public"):
         """Create a new post"""
         post_id = str(uuid.uuid4())
-        post = {
-            "id": post_id,
-            "user_id": user_id,
-            "content": content,
-            "media_url": media_url,
-            "visibility": visibility,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "likes": [],
-            "comments": []
-        }
+        post = Post(
+            id=post_id,
+            user_id=user_id,
+            content=content,
+            media_url=media_url,
+            visibility=visibility,
+            created_at=now_ts(),
+            likes=[],
+            comments=[]
+        )
         
         self.social_data["posts"][post_id] = post
-        self._save_social_data()
+        self._save_social_data(("posts", post_id))
         return post_id
 
     def add_comment(self, user_id, post_id, content):
         """Add a comment to a post"""
         if post_id in self.social_data["posts"]:
             comment_id = str(uuid.uuid4())
-            comment = {
-                "id": comment_id,
-                "user_id": user_id,
-                "content": content,
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "likes": []
-            }
+            comment = Comment(
+                id=comment_id,
+                user_id=user_id,
+                content=content,
+                created_at=now_ts(),
+                likes=[]
+            )
             
             self.social_data["posts"][post_id]["comments"].append(comment)
-            self._save_social_data()
+            self._save_social_data(("posts", post_id, "comments", -1))
             return comment_id
         return None
 
@@ -137,7 +149,7 @@ class SocialSystem:
             post = self.social_data["posts"][post_id]
             if user_id not in post["likes"]:
                 post["likes"].append(user_id)
-                self._save_social_data()
+                self._save_social_data(("posts", post_id, "likes", -1))
                 return True
         return False
 
@@ -151,7 +163,7 @@ class SocialSystem:
         if friend_id not in self.social_data["friends"][user_id]:
             self.social_data["friends"][user_id].append(friend_id)
             self.social_data["friends"][friend_id].append(user_id)
-            self._save_social_data()
+            self._save_social_data(("friends", user_id), ("friends", friend_id))
             return True
         return False
 
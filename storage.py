@@ -0,0 +1,617 @@
+import os
+import tempfile
+import threading
+import zlib
+from collections.abc import MutableMapping
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import serialization
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StorageConflictError(Exception):
+    """Raised when a full-document save would overwrite another process's changes"""
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive advisory lock on path + '.lock' across processes"""
+    with open(path + ".lock", 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_atomic(path: str, serialized: bytes) -> None:
+    """Write a file through a temporary sibling and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(serialized)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Identify a file's current version by inode, size and modification time"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def resolve_path(data: Any, path: Tuple) -> Tuple[bool, Any, list]:
+    """Follow a key path into nested dicts/lists, returning (found, value, concrete path)"""
+    node = data
+    concrete_path = []
+    for key in path:
+        if isinstance(node, MutableMapping):
+            if key not in node:
+                return False, None, concrete_path + list(path[len(concrete_path):])
+            node = node[key]
+        elif isinstance(node, list) and isinstance(key, int) and -len(node) <= key < len(node):
+            # Negative indices are pinned so that replaying the log is repeatable
+            key = key % len(node)
+            node = node[key]
+        else:
+            return False, None, concrete_path + list(path[len(concrete_path):])
+        concrete_path.append(key)
+    return True, node, concrete_path
+
+
+class AppendPath(tuple):
+    """Save path of a list item that was appended, merged as an append rather than a set of that slot"""
+
+
+def _is_append(path: Tuple, concrete_path: list) -> bool:
+    # A trailing -1 on a list always marks the item just appended
+    if isinstance(path, AppendPath):
+        return True
+    return bool(path) and path[-1] == -1 and isinstance(concrete_path[-1], int) and concrete_path[-1] >= 0
+
+
+def pin_path(data: Any, path: Tuple) -> Tuple:
+    """Path with its list indices made concrete, keeping whether it records an append"""
+    found, _, concrete_path = resolve_path(data, path)
+    if found and _is_append(path, concrete_path):
+        return AppendPath(concrete_path)
+    return tuple(concrete_path)
+
+
+def path_operation(data: Any, path: Tuple) -> Dict:
+    """Describe the current state of a path as a set, delete or list append operation"""
+    found, value, concrete_path = resolve_path(data, path)
+    if found and _is_append(path, concrete_path):
+        # "i" is where the item sits now; apply_operation moves it to wherever it lands
+        return {"p": concrete_path[:-1], "a": value, "i": concrete_path[-1]}
+    operation = {"p": concrete_path}
+    if found:
+        operation["v"] = value
+    else:
+        operation["d"] = True
+    return operation
+
+
+def apply_operation(data: Any, operation: Dict) -> None:
+    """Apply one set/delete/append operation to nested data in place"""
+    path = operation["p"]
+    if "a" in operation:
+        # An append lands after whatever the list holds now, so concurrent
+        # appends from several processes all survive
+        items = data
+        for key, next_key in zip(path, list(path[1:]) + [None]):
+            if isinstance(items, list):
+                items = items[key]
+            else:
+                items = items.setdefault(key, {} if isinstance(next_key, str) else [])
+        items.append(operation["a"])
+        operation["i"] = len(items) - 1
+        return
+    if not path:
+        if "v" in operation:
+            data.clear()
+            data.update(operation["v"])
+        return
+
+    node = data
+    for key, next_key in zip(path[:-1], path[1:]):
+        if isinstance(node, list):
+            node = node[key]
+        else:
+            node = node.setdefault(key, [] if isinstance(next_key, int) else {})
+
+    key = path[-1]
+    if operation.get("d"):
+        if isinstance(node, MutableMapping):
+            node.pop(key, None)
+        elif isinstance(node, list) and -len(node) <= key < len(node):
+            del node[key]
+    elif isinstance(node, list):
+        if key == len(node):
+            node.append(operation["v"])
+        else:
+            node[key] = operation["v"]
+    else:
+        node[key] = operation["v"]
+
+
+def concrete_operation(operation: Dict) -> Dict:
+    """An applied append as a set of the slot it landed in, which replays idempotently"""
+    if "a" not in operation:
+        return operation
+    return {"p": list(operation["p"]) + [operation["i"]], "v": operation["a"]}
+
+
+def adopt(data: Dict, fresh: Dict, operations: list) -> None:
+    """Replace data's contents in place with fresh data plus our own pending operations"""
+    for operation in operations:
+        apply_operation(fresh, operation)
+    data.clear()
+    data.update(fresh)
+
+
+class JSONFileStore:
+    """
+    Stores a manager's data as a single JSON document, rewritten on every save.
+
+    Writes go through a temporary file and an atomic rename while holding an
+    advisory lock, so a crash never leaves a half-written document and two
+    processes never interleave their writes. If another process changed the
+    file since we last read it, our changed paths are re-applied on top of
+    its version instead of overwriting it wholesale.
+    """
+
+    def __init__(self, path: str, decode: Optional[Callable[[Any], Any]] = None):
+        self.path = path
+        # Turns a freshly read document into the manager's in-memory form (e.g. record types)
+        self.decode = decode
+        self.data = None
+        self._lock = threading.RLock()
+        self._version = None
+        self._batch_depth = 0
+        self._pending_paths = []
+        self._pending_full = False
+        self._has_pending = False
+
+    def load(self, default: Optional[Any] = None) -> Any:
+        """Load the document, or return default if the file does not exist"""
+        with self._lock:
+            self._version = file_signature(self.path)
+            self.data = self._decode(self._read_document(default))
+            return self.data
+
+    def _decode(self, data: Any) -> Any:
+        return self.decode(data) if self.decode is not None else data
+
+    def _read_document(self, default: Optional[Any] = None) -> Any:
+        if os.path.exists(self.path):
+            return serialization.load(self.path)
+        return default if default is not None else {}
+
+    def refresh(self) -> bool:
+        """Reload the document in place if another process has changed it"""
+        with self._lock, file_lock(self.path):
+            if file_signature(self.path) == self._version:
+                return False
+            self._version = file_signature(self.path)
+            adopt(self.data, self._decode(self._read_document()), [])
+            return True
+
+    def save(self, data: Any, *paths: Tuple) -> None:
+        """Persist data, or defer it until the enclosing batch exits"""
+        self.data = data
+        if self._batch_depth:
+            self._has_pending = True
+            if not paths:
+                self._pending_full = True
+            for path in paths:
+                # Pin list indices now; the values are read when the batch flushes
+                self._pending_paths.append(pin_path(data, path))
+            return
+        self._write(data, *paths)
+
+    @contextmanager
+    def batch(self):
+        """Defer every save made inside the block and write them once on exit"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._has_pending:
+                paths = [] if self._pending_full else list(dict.fromkeys(self._pending_paths))
+                self._pending_paths = []
+                self._pending_full = False
+                self._has_pending = False
+                self._write(self.data, *paths)
+
+    def _check_conflict(self, paths: Tuple) -> None:
+        if not paths:
+            raise StorageConflictError(f"{self.path} was modified by another process")
+
+    def _write(self, data: Any, *paths: Tuple) -> None:
+        """Write the whole document, merging with concurrent changes to other paths"""
+        with self._lock, file_lock(self.path):
+            if file_signature(self.path) != self._version:
+                self._check_conflict(paths)
+                # Appends are re-applied to the fresh document, landing after other processes' items
+                operations = [path_operation(data, path) for path in paths]
+                adopt(data, self._decode(self._read_document()), operations)
+            write_atomic(self.path, serialization.dumps(data))
+            self._version = file_signature(self.path)
+
+
+class AppendLogStore(JSONFileStore):
+    """
+    Stores a manager's data as a snapshot plus an append-only mutation log.
+
+    Each save appends one line holding the new value of every changed path,
+    so its cost depends on the size of the change rather than the size of the
+    document. Once the log grows past compact_threshold bytes it is folded
+    into a fresh snapshot on a background thread. Logged operations only ever
+    set or delete a path (an append is logged as a set of the slot it landed
+    in once synced), so replaying a log on top of a snapshot that already
+    contains it is harmless. Before appending, lines written by other
+    processes are replayed first, so every process converges on the same
+    per-path last-writer-wins state.
+    """
+
+    def __init__(self, path: str, compact_threshold: int = 1024 * 1024,
+                 decode: Optional[Callable[[Any], Any]] = None):
+        super().__init__(path, decode)
+        self.log_path = path + ".log"
+        self.compact_threshold = compact_threshold
+        self._log_inode = None
+        self._log_offset = 0
+        self._compaction_thread = None
+
+    def load(self, default: Optional[Any] = None) -> Any:
+        """Load the snapshot and replay any pending log entries on top of it"""
+        with self._lock, file_lock(self.path):
+            self.data = self._read_state(default)
+            return self.data
+
+    def _read_state(self, default: Optional[Any] = None) -> Any:
+        """Read snapshot plus log and remember which versions of them we have seen"""
+        self._version = file_signature(self.path)
+        data = self._read_document(default)
+        log_signature = file_signature(self.log_path)
+        self._log_inode = log_signature[0] if log_signature else None
+        self._log_offset = self._replay(data, 0)
+        return self._decode(data)
+
+    def _replay(self, data: Any, offset: int) -> int:
+        """Apply every complete transaction in the log after offset, returning the new offset"""
+        if not os.path.exists(self.log_path):
+            return 0
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A torn final line from an interrupted write is skipped
+                    break
+                try:
+                    operations = serialization.loads(line)
+                except serialization.DECODE_ERRORS:
+                    break
+                for operation in operations:
+                    apply_operation(data, operation)
+                offset += len(line)
+        return offset
+
+    def _log_changed(self) -> bool:
+        log_signature = file_signature(self.log_path)
+        if log_signature is None:
+            return self._log_inode is not None
+        return log_signature[0] != self._log_inode or log_signature[1] != self._log_offset
+
+    def _sync(self, data: Any, operations: list) -> None:
+        """Catch up with other processes' writes, then re-apply our own operations"""
+        log_signature = file_signature(self.log_path)
+        log_inode = log_signature[0] if log_signature else None
+        if file_signature(self.path) != self._version or log_inode != self._log_inode:
+            # The snapshot was rewritten or the log was replaced, so start from scratch
+            adopt(data, self._read_state(), operations)
+        elif log_signature and log_signature[1] > self._log_offset and any("a" in op for op in operations):
+            # Our unsynced appended items sit in the slots other processes' lines
+            # fill, so rebuild from disk rather than replaying over them
+            adopt(data, self._read_state(), operations)
+        elif log_signature and log_signature[1] > self._log_offset:
+            self._log_offset = self._replay(data, self._log_offset)
+            for operation in operations:
+                apply_operation(data, operation)
+
+    def refresh(self) -> bool:
+        """Apply snapshot and log changes made by other processes"""
+        with self._lock, file_lock(self.path):
+            if file_signature(self.path) == self._version and not self._log_changed():
+                return False
+            self._sync(self.data, [])
+            return True
+
+    def _write(self, data: Any, *paths: Tuple) -> None:
+        """Append the changed paths to the log as one line, or write a snapshot if none are given"""
+        with self._lock, file_lock(self.path):
+            operations = [path_operation(data, path) for path in paths]
+            if not paths or not os.path.exists(self.path):
+                if file_signature(self.path) != self._version or self._log_changed():
+                    self._check_conflict(paths)
+                    adopt(data, self._read_state(), operations)
+                self._write_snapshot(data)
+                return
+
+            self._sync(data, operations)
+            line = serialization.dumps([concrete_operation(op) for op in operations], serialization.COMPACT) + b"\n"
+            with open(self.log_path, 'ab') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if self._log_inode is None:
+                self._log_inode = file_signature(self.log_path)[0]
+            self._log_offset += len(line)
+
+            if self._log_offset >= self.compact_threshold:
+                self.compact_in_background()
+
+    def compact_in_background(self) -> None:
+        """Start folding the log into the snapshot unless a compaction is running"""
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact)
+            self._compaction_thread.daemon = True
+            self._compaction_thread.start()
+
+    def compact(self) -> None:
+        """Write the current data as a new snapshot and drop the log it covers"""
+        with self._lock, file_lock(self.path):
+            if not os.path.exists(self.log_path):
+                return
+            # Fold what is on disk rather than live data another thread may be mutating
+            in_sync = file_signature(self.path) == self._version and not self._log_changed()
+            fresh = self._read_document()
+            self._replay(fresh, 0)
+            write_atomic(self.path, serialization.dumps(fresh))
+            os.remove(self.log_path)
+            if in_sync:
+                self._version = file_signature(self.path)
+                self._log_inode = None
+                self._log_offset = 0
+
+    def _write_snapshot(self, data: Any) -> None:
+        """Replace the snapshot with data and drop the log (caller holds the locks)"""
+        write_atomic(self.path, serialization.dumps(data))
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._version = file_signature(self.path)
+        self._log_inode = None
+        self._log_offset = 0
+
+
+STORAGE_BACKENDS = {
+    "json": JSONFileStore,
+    "log": AppendLogStore,
+}
+
+
+@contextmanager
+def batch(*stores: JSONFileStore):
+    """Batch saves across several stores, flushing each of them once on exit"""
+    with ExitStack() as stack:
+        for store in stores:
+            stack.enter_context(store.batch())
+        yield
+
+
+def save_sections(owner: Any, stores: Dict[str, JSONFileStore], *paths: Tuple) -> None:
+    """
+    Save a manager whose data is split into sections, each in its own store
+    and loaded into the attribute of the same name.
+
+    Paths are prefixed with their section. Without paths every section is
+    saved whole, except one that was never loaded (a cached_property not yet
+    in vars(owner)), which has nothing to save.
+    """
+    for section, store in stores.items():
+        if not paths:
+            if section in vars(owner):
+                store.save(getattr(owner, section))
+            continue
+        section_paths = [path[1:] for path in paths if path[0] == section]
+        if section_paths:
+            store.save(getattr(owner, section), *section_paths)
+
+
+def open_store(path: str, backend: Optional[str] = None, **options) -> JSONFileStore:
+    """Create the configured storage backend for a manager's data file"""
+    backend = backend or os.getenv("FORMAMIND_STORAGE", "json")
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return STORAGE_BACKENDS[backend](path, **options)
+
+
+class LazyDict(MutableMapping):
+    """Dict with known keys whose values are produced by loader(key) on first access"""
+
+    _UNLOADED = object()
+
+    def __init__(self, keys, loader):
+        self._values = dict.fromkeys(keys, self._UNLOADED)
+        self._loader = loader
+
+    def __getitem__(self, key):
+        value = self._values[key]
+        if value is self._UNLOADED:
+            value = self._values[key] = self._loader(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        del self._values[key]
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+class ShardedDict(MutableMapping):
+    """Dict view over a ShardedStore that loads a key's shard on first access"""
+
+    def __init__(self, store: "ShardedStore"):
+        self._store = store
+
+    def __getitem__(self, key):
+        return self._store.shard(key)[key]
+
+    def __setitem__(self, key, value):
+        self._store.shard(key)[key] = value
+
+    def __delitem__(self, key):
+        del self._store.shard(key)[key]
+
+    def __contains__(self, key):
+        return key in self._store.shard(key)
+
+    def __iter__(self):
+        # Iterating needs every user, so this is the one place all shards are loaded
+        for index in range(self._store.shards):
+            yield from list(self._store.load_shard(index))
+
+    def __len__(self):
+        return sum(len(self._store.load_shard(index)) for index in range(self._store.shards))
+
+
+class ShardedStore:
+    """
+    Splits a dict keyed by user id across hash-bucketed shard files.
+
+    Shards live in directory as shard_NNN.json, each backed by the configured
+    storage backend, and are only read when one of their users is accessed,
+    so memory use and save cost follow the number of active users. The first
+    element of every saved path names the user, which picks the shard the
+    rest of the path is written to. The shard count is fixed in a manifest
+    when the directory is created; an existing single-file document at
+    legacy_path is split into shards at that point.
+    """
+
+    def __init__(self, directory: str, shards: Optional[int] = None, legacy_path: Optional[str] = None,
+                 legacy_key: Optional[str] = None, backend: Optional[str] = None,
+                 decode: Optional[Callable[[Any], Any]] = None):
+        self.directory = directory
+        self.backend = backend
+        self.decode = decode
+        self._lock = threading.RLock()
+        self._stores = {}
+        self._shard_data = {}
+        self._batch_stack = None
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        with file_lock(self.manifest_path):
+            if os.path.exists(self.manifest_path):
+                self.shards = serialization.load(self.manifest_path)["shards"]
+            else:
+                self.shards = shards or int(os.getenv("FORMAMIND_SHARDS", "64"))
+                if legacy_path and os.path.exists(legacy_path):
+                    self._import_legacy(legacy_path, legacy_key)
+                # Written last so an interrupted migration is simply redone
+                write_atomic(self.manifest_path, serialization.dumps({"shards": self.shards}))
+
+    def _import_legacy(self, legacy_path: str, legacy_key: Optional[str]) -> None:
+        """Split a single-file document into shard files"""
+        document = serialization.load(legacy_path)
+        if legacy_key is not None:
+            document = document.get(legacy_key, {})
+        for key, value in document.items():
+            self.shard(key)[key] = value
+        for index, data in self._shard_data.items():
+            self._stores[index].save(data)
+        self._stores.clear()
+        self._shard_data.clear()
+
+    def shard_index(self, key: Any) -> int:
+        """Stable bucket for a key, identical across processes and runs"""
+        return zlib.crc32(str(key).encode('utf-8')) % self.shards
+
+    def load_shard(self, index: int) -> Dict:
+        """Return a shard's data, reading it from disk on first use"""
+        with self._lock:
+            if index not in self._shard_data:
+                store = open_store(os.path.join(self.directory, f"shard_{index:03d}.json"), self.backend,
+                                   decode=self.decode)
+                self._shard_data[index] = store.load({})
+                self._stores[index] = store
+                if self._batch_stack is not None:
+                    self._batch_stack.enter_context(store.batch())
+            return self._shard_data[index]
+
+    def shard(self, key: Any) -> Dict:
+        """Return the data of the shard holding key"""
+        return self.load_shard(self.shard_index(key))
+
+    def load(self, default: Optional[Any] = None) -> ShardedDict:
+        """Return a lazy dict over all shards; nothing is read until a key is accessed"""
+        return ShardedDict(self)
+
+    def refresh(self) -> bool:
+        """Pick up other processes' changes to every loaded shard"""
+        with self._lock:
+            return any([store.refresh() for store in self._stores.values()])
+
+    def save(self, data: Any, *paths: Tuple) -> None:
+        """Save each path to its user's shard, or every loaded shard if no paths are given"""
+        with self._lock:
+            if not paths:
+                for index, store in self._stores.items():
+                    store.save(self._shard_data[index])
+                return
+            for path in paths:
+                index = self.shard_index(path[0])
+                shard_data = self.load_shard(index)
+                self._stores[index].save(shard_data, path)
+
+    @contextmanager
+    def batch(self):
+        """Defer saves to every shard touched inside the block and flush each once on exit"""
+        with self._lock:
+            outermost = self._batch_stack is None
+            if outermost:
+                self._batch_stack = ExitStack()
+                for store in self._stores.values():
+                    self._batch_stack.enter_context(store.batch())
+        try:
+            yield self
+        finally:
+            if outermost:
+                with self._lock:
+                    stack, self._batch_stack = self._batch_stack, None
+                stack.close()
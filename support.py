@@ -1,12 +1,13 @@
-import json
-import os
-from datetime import datetime
 import uuid
+from functools import cached_property
+from records import ChatMessage, Ticket, TicketResponse, decode_values
+from storage import open_store
+from timeutils import now_ts
 
 class SupportSystem:
     def __init__(self):
         self.support_data_file = "support_data.json"
-        self.support_data = self._load_support_data()
+        self._store = open_store(self.support_data_file, decode=self._decode_support_data)
         self.faq_categories = [
             "general",
             "account",
@@ -17,42 +18,54 @@ class SupportSystem:
             "privacy"
         ]
 
+    @cached_property
+    def support_data(self):
+        """Support data, loaded from disk on first access"""
+        return self._load_support_data()
+
     def _load_support_data(self):
         """Load support data from JSON file"""
-        if os.path.exists(self.support_data_file):
-            with open(self.support_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
+        return self._store.load({
             "tickets": {},
             "faqs": {},
             "chat_sessions": {},
             "guides": {},
             "reports": {}
-        }
+        })
 
-    def _save_support_data(self):
+    def _decode_support_data(self, support_data):
+        """Convert loaded tickets and chat messages to records"""
+        decode_values(support_data.get("tickets", {}), Ticket)
+        for session in support_data.get("chat_sessions", {}).values():
+            session["messages"] = [ChatMessage.from_dict(m) for m in session.get("messages", [])]
+        return support_data
+
+    def _save_support_data(self, *paths):
         """Save support data to JSON file"""
-        with open(self.support_data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.support_data, f, ensure_ascii=False, indent=4)
+        self._store.save(self.support_data, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return self._store.batch()
 
     def create_ticket(self, user_id, subject, description, category, priority="medium"):
         """Create a new support ticket"""
         ticket_id = str(uuid.uuid4())
-        ticket = {
-            "id": ticket_id,
-            "user_id": user_id,
-            "subject": subject,
-            "description": description,
-            "category": category,
-            "priority": priority,
-            "status": "open",
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "responses": []
-        }
+        ticket = Ticket(
+            id=ticket_id,
+            user_id=user_id,
+            subject=subject,
+            description=description,
+            category=category,
+            priority=priority,
+            status="open",
+            created_at=now_ts(),
+            updated_at=now_ts(),
+            responses=[]
+        )
         
         self.support_data["tickets"][ticket_id] = ticket
-        self._save_support_data()
+        self._save_support_data(("tickets", ticket_id))
         return ticket_id
 
     def add_ticket_response(self, ticket_id, user_id, message, is_staff=False):
@@ -60,17 +73,17 @@ class SupportSystem:
         if ticket_id not in self.support_data["tickets"]:
             return False, "Ticket not found"
 
-        response = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "message": message,
-            "is_staff": is_staff,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        response = TicketResponse(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            message=message,
+            is_staff=is_staff,
+            created_at=now_ts()
+        )
 
         self.support_data["tickets"][ticket_id]["responses"].append(response)
-        self.support_data["tickets"][ticket_id]["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._save_support_data()
+        self.support_data["tickets"][ticket_id]["updated_at"] = now_ts()
+        self._save_support_data(("tickets", ticket_id, "responses", -1), ("tickets", ticket_id, "updated_at"))
         return True, "Response added successfully"
 
     def update_ticket_status(self, ticket_id, status):
@@ -83,8 +96,8 @@ class SupportSystem:
             return False, "Invalid status"
 
         self.support_data["tickets"][ticket_id]["status"] = status
-        self.support_data["tickets"][ticket_id]["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._save_support_data()
+        self.support_data["tickets"][ticket_id]["updated_at"] = now_ts()
+        self._save_support_data(("tickets", ticket_id, "status"), ("tickets", ticket_id, "updated_at"))
         return True, "Status updated successfully"
 
     def get_ticket(self, ticket_id):
@@ -107,15 +120,15 @@ class SupportSystem:
             "question": question,
             "answer": answer,
             "category": category,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "created_at": now_ts(),
+            "updated_at": now_ts()
         }
 
         if category not in self.support_data["faqs"]:
             self.support_data["faqs"][category] = {}
         
         self.support_data["faqs"][category][faq_id] = faq
-        self._save_support_data()
+        self._save_support_data(("faqs", category, faq_id))
         return True, "FAQ added successfully"
 
     def get_faqs(self, category=None):
@@ -149,14 +162,14 @@ class SupportSystem:
         session = {
             "id": session_id,
             "user_id": user_id,
-            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "started_at": now_ts(),
             "ended_at": None,
             "messages": [],
             "status": "active"
         }
         
         self.support_data["chat_sessions"][session_id] = session
-        self._save_support_data()
+        self._save_support_data(("chat_sessions", session_id))
         return session_id
 
     def add_chat_message(self, session_id, user_id, message, is_staff=False):
@@ -164,16 +177,16 @@ class SupportSystem:
         if session_id not in self.support_data["chat_sessions"]:
             return False, "Session not found"
 
-        chat_message = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "message": message,
-            "is_staff": is_staff,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        chat_message = ChatMessage(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            message=message,
+            is_staff=is_staff,
+            timestamp=now_ts()
+        )
 
         self.support_data["chat_sessions"][session_id]["messages"].append(chat_message)
-        self._save_support_data()
+        self._save_support_data(("chat_sessions", session_id, "messages", -1))
         return True, "Message added successfully"
 
     def end_chat_session(self, session_id):
@@ -181,9 +194,9 @@ class SupportSystem:
         if session_id not in self.support_data["chat_sessions"]:
             return False, "Session not found"
 
-        self.support_data["chat_sessions"][session_id]["ended_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.support_data["chat_sessions"][session_id]["ended_at"] = now_ts()
         self.support_data["chat_sessions"][session_id]["status"] = "ended"
-        self._save_support_data()
+        self._save_support_data(("chat_sessions", session_id, "ended_at"), ("chat_sessions", session_id, "status"))
         return True, "Session ended successfully"
 
     def get_chat_session(self, session_id):
@@ -206,15 +219,15 @@ class SupportSystem:
             "title": title,
             "content": content,
             "category": category,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "created_at": now_ts(),
+            "updated_at": now_ts()
         }
 
         if category not in self.support_data["guides"]:
             self.support_data["guides"][category] = {}
         
         self.support_data["guides"][category][guide_id] = guide
-        self._save_support_data()
+        self._save_support_data(("guides", category, guide_id))
         return True, "Guide added successfully"
 
     def get_guides(self, category=None):
@@ -252,13 +265,13 @@ class SupportSystem:
             "description": description,
             "severity": severity,
             "status": "open",
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "created_at": now_ts(),
+            "updated_at": now_ts(),
             "resolution": None
         }
         
         self.support_data["reports"][report_id] = report
-        self._save_support_data()
+        self._save_support_data(("reports", report_id))
         return report_id
 
     def update_issue_status(self, report_id, status, resolution=None):
@@ -273,8 +286,8 @@ class SupportSystem:
         self.support_data["reports"][report_id]["status"] = status
         if resolution:
             self.support_data["reports"][report_id]["resolution"] = resolution
-        self.support_data["reports"][report_id]["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._save_support_data()
+        self.support_data["reports"][report_id]["updated_at"] = now_ts()
+        self._save_support_data(("reports", report_id))
         return True, "Status updated successfully"
 
     def get_issue_report(self, report_id):
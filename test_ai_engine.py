@@ -0,0 +1,161 @@
+import os
+from collections import Counter
+
+import pytest
+
+import ai_engine
+from ai_engine import AIEngine, fit_activity_model, model_filename, read_activity_model, write_activity_model
+import serialization
+from timeutils import days_ago
+
+WEATHER = {"condition": "clear", "temperature": 20, "humidity": 50}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = AIEngine()
+    with engine.batch():
+        for i in range(5):
+            engine.learn_user_patterns("u1", {"type": "run", "duration": 30, "intensity": "medium",
+                                              "time_of_day": 1700000000 + i * 3600}, None, None)
+    return engine
+
+
+def test_cached_recommendations_are_not_shared_with_callers(engine):
+    first = engine.get_personalized_recommendations("u1", "happy", WEATHER)
+    expected = repr(first)
+    first["activities"].clear()
+    first["emotion_support"]["tips"].append("mutated")
+
+    second = engine.get_personalized_recommendations("u1", "happy", WEATHER)
+    second["weather_considerations"].append("mutated")
+
+    assert repr(engine.get_personalized_recommendations("u1", "happy", WEATHER)) == expected
+    assert engine.recommendation_cache_stats()["hits"] == 2
+
+
+def test_publishing_a_model_version_clears_the_cache(engine, tmp_path):
+    engine.get_personalized_recommendations("u1", "happy", WEATHER)
+    (tmp_path / "ai_models" / "v1").mkdir(parents=True)
+    (tmp_path / "ai_models" / "current.json").write_bytes(serialization.dumps({"version": "v1"}))
+
+    engine.get_personalized_recommendations("u1", "happy", WEATHER)
+
+    assert engine.recommendation_cache_stats()["hits"] == 0
+
+
+def test_batch_results_do_not_share_lists(engine):
+    engine.learn_user_patterns("u2", {"type": "swim", "time_of_day": 1700000000}, None, None)
+    results = dict(engine.get_personalized_recommendations_batch(["u1", "u2"], "happy", WEATHER))
+    results["u1"]["emotion_support"]["tips"].clear()
+
+    assert results["u2"]["emotion_support"]["tips"]
+
+
+def test_emotion_analysis_covers_exactly_the_requested_days(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FORMAMIND_EMOTION_DAYS", "5")
+    engine = AIEngine()
+    with engine.batch():
+        for offset in range(5):
+            engine.learn_user_patterns("u1", None, {"emotion": "happy", "intensity": 5,
+                                                    "time_of_day": days_ago(offset)}, None)
+
+    for days in (1, 3):
+        analysis = engine.analyze_emotion_patterns("u1", days=days)
+        assert analysis["days"] == days
+        assert analysis["emotion_frequency"] == {"happy": days}
+        assert len(analysis["intensity_trends"]["happy"]) == days
+
+    # Windows beyond the retention are capped and say so
+    analysis = engine.analyze_emotion_patterns("u1", days=30)
+    assert analysis["days"] == 5
+    assert analysis["emotion_frequency"] == {"happy": 5}
+
+
+def test_models_updated_in_a_batch_are_written_once_per_user(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writes = Counter()
+    write = ai_engine.write_activity_model
+    monkeypatch.setattr(ai_engine, "write_activity_model",
+                        lambda path, model: (writes.update([os.path.basename(path)]), write(path, model)))
+    engine = AIEngine()
+
+    with engine.batch():
+        for i in range(10):
+            for user_id in ("u1", "u2"):
+                engine.learn_user_patterns(user_id, {"type": "run", "duration": 30,
+                                                     "time_of_day": 1700000000 + i * 3600}, None, None)
+        assert not writes
+    assert writes == {model_filename("u1"): 1, model_filename("u2"): 1}
+
+    served = AIEngine()._get_activity_model("u1")
+    assert sum(served.cluster_activities, Counter()) == {"run": 10}
+
+    # Outside a batch every update is written straight away
+    engine.learn_user_patterns("u1", {"type": "swim", "time_of_day": 1700100000}, None, None)
+    assert writes[model_filename("u1")] == 2
+
+
+def test_activity_models_keep_the_vocabulary_they_were_fitted_on(tmp_path):
+    patterns = [{"type": activity_type, "duration": 30, "time_of_day": 1700000000 + i * 3600}
+                for i, activity_type in enumerate(["climbing", "rowing", "climbing", "rowing"])]
+    path = str(tmp_path / "model.joblib")
+    write_activity_model(path, fit_activity_model(patterns))
+
+    model = read_activity_model(path)
+    assert {"type=climbing", "type=rowing"} <= set(model.feature_names)
+    assert model.encode(patterns).shape == (4, model.encoder.width)
+    # Models pickled without an encoder predate fitted vocabularies and are refit
+    del model.encoder
+    write_activity_model(path, model)
+    assert read_activity_model(path) is None
+
+
+def test_batch_recommendations_match_single_user_calls(engine):
+    engine.learn_user_patterns("u2", {"type": "swim", "location": "outdoor", "time_of_day": 1700000000}, None, None)
+    user_ids = ["u1", "u2", "new"]
+    emotions = ["happy", "stressed", "sad"]
+    weather = [WEATHER, {"condition": "rain", "temperature": 12, "humidity": 90},
+               {"condition": "clear", "temperature": 35, "humidity": 20}]
+
+    results = list(engine.get_personalized_recommendations_batch(user_ids, emotions, weather))
+
+    assert [user_id for user_id, _ in results] == user_ids
+    for (user_id, batched), emotion, current in zip(results, emotions, weather):
+        single = engine.get_personalized_recommendations(user_id, emotion, current)
+        assert sorted(batched.pop("activities")) == sorted(single.pop("activities"))
+        assert batched == single
+    assert engine.batch_stats["users"] == 3
+
+
+def test_batch_recommendations_check_their_arguments(engine):
+    with pytest.raises(ValueError, match="emotions"):
+        list(engine.get_personalized_recommendations_batch(["u1", "u2"], ["happy"], WEATHER))
+    with pytest.raises(ValueError, match="weather or locations"):
+        list(engine.get_personalized_recommendations_batch(["u1"], "happy"))
+
+
+def test_pattern_history_is_a_ring_buffer_with_a_full_summary(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FORMAMIND_PATTERN_RETENTION", "3")
+    engine = AIEngine()
+    with engine.batch():
+        for i in range(5):
+            engine.learn_user_patterns("u1", {"type": ["run", "swim"][i % 2], "duration": 10 * (i + 1),
+                                              "time_of_day": 1700000000 + i * 3600}, None, None)
+
+    kept = engine._ordered_patterns("u1", "activity_patterns")
+    assert [p["duration"] for p in kept] == [30, 40, 50]
+    summary = engine.get_pattern_summary("u1")
+    assert summary["count"] == 5
+    assert summary["means"]["duration"] == {"n": 5, "mean": 30.0}
+    assert summary["histograms"]["type"] == {"run": 3, "swim": 2}
+
+    # A reloaded engine with a smaller window folds the excess on the next ingest
+    monkeypatch.setenv("FORMAMIND_PATTERN_RETENTION", "2")
+    engine = AIEngine()
+    engine.learn_user_patterns("u1", {"type": "run", "duration": 60, "time_of_day": 1700020000}, None, None)
+    assert [p["duration"] for p in engine._ordered_patterns("u1", "activity_patterns")] == [50, 60]
+    assert engine.get_pattern_summary("u1")["count"] == 6
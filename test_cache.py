@@ -0,0 +1,59 @@
+from cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 59.9
+    assert cache.get("a") == 1
+    clock.now = 60
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_every_entry_with_the_tag():
+    cache = TTLCache(maxsize=10, ttl=60, clock=FakeClock())
+    cache.set(("u1", "happy"), 1, tag="u1")
+    cache.set(("u1", "sad"), 2, tag="u1")
+    cache.set(("u2", "happy"), 3, tag="u2")
+
+    assert cache.invalidate("u1") == 2
+    assert cache.get(("u1", "happy")) is None
+    assert cache.get(("u2", "happy")) == 3
+    assert cache.invalidate("u1") == 0
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_replacing_or_evicting_an_entry_untags_it():
+    cache = TTLCache(maxsize=1, ttl=60, clock=FakeClock())
+    cache.set("a", 1, tag="u1")
+    cache.set("a", 2, tag="u2")
+    cache.set("b", 3, tag="u2")
+
+    assert cache.invalidate("u1") == 0
+    assert cache.invalidate("u2") == 1
+    assert len(cache) == 0
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from data_generator import WorkoutDataGenerator
+
+
+def test_batch_rows_follow_the_per_row_rules():
+    generator = WorkoutDataGenerator()
+    workouts = generator.generate_dataset_batch(2000, seed=0, start_id=100)
+
+    assert len(workouts) == 2000
+    assert workouts["id"].iloc[0] == "w100" and workouts["id"].is_unique
+    assert workouts["duration"].between(20, 120).all()
+    assert set(workouts["type"]) == set(generator.workout_types)
+    assert set(workouts["level"]) == set(generator.levels)
+    for row in workouts.itertuples():
+        assert row.equipment_needed and set(row.equipment_needed) <= set(generator.equipment)
+        assert row.tags == (row.type, row.level) + row.equipment_needed
+        assert len(row.benefits) in (2, 3) and set(row.benefits) <= set(generator.benefits[row.type])
+
+
+def test_same_seed_gives_the_same_dataset():
+    generator = WorkoutDataGenerator()
+
+    pd.testing.assert_frame_equal(generator.generate_dataset_batch(500, seed=7),
+                                  generator.generate_dataset_batch(500, seed=7))
+    assert not generator.generate_dataset_batch(500, seed=7).equals(generator.generate_dataset_batch(500, seed=8))
+
+
+def test_exercises_cover_each_workouts_duration():
+    generator = WorkoutDataGenerator()
+    workouts = generator.generate_dataset_batch(500, seed=1)
+    exercises = generator.generate_exercises_batch(workouts, seed=2)
+
+    grouped = exercises.groupby("workout_id")["duration"]
+    # As in _generate_exercises, the 5 minute minimum can overshoot short workouts
+    assert (grouped.sum().reindex(workouts["id"]).to_numpy() >= workouts["duration"].to_numpy()).all()
+    most = workouts.set_index("id")["level"].map({"beginner": 4, "intermediate": 5, "advanced": 7})
+    assert (grouped.size().reindex(most.index) <= most).all()
+    assert exercises["intensity"].isin(["low", "medium", "high"]).all()
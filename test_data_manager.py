@@ -0,0 +1,64 @@
+from data_generator import WorkoutDataGenerator
+from data_manager import DataManager
+
+
+def make_manager(tmp_path):
+    manager = DataManager(str(tmp_path / "workout_data.json"))
+    manager.add_workouts_bulk([{"id": f"w{i}", "duration": 30 + i, "level": "beginner"} for i in range(5)])
+    return manager
+
+
+def test_cached_frames_are_not_changed_through_returned_copies(tmp_path):
+    manager = make_manager(tmp_path)
+    first = manager.get_workouts_df(["id", "duration"])
+    first.loc[0, "duration"] = -1
+    first["extra"] = 1
+
+    again = manager.get_workouts_df(["id", "duration"])
+    assert again.loc[0, "duration"] == 30
+    assert list(again.columns) == ["id", "duration"]
+
+
+def test_frame_cache_is_bounded_per_table(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.frame_cache_size = 2
+    for columns in (["id"], ["duration"], ["level"], ["id", "level"]):
+        manager.get_workouts_df(columns)
+
+    assert len(manager._frames["workouts"][1]) == 2
+
+
+def test_bulk_ingest_persists_a_generated_frame(tmp_path):
+    manager = DataManager(str(tmp_path / "workout_data.json"))
+    workouts = WorkoutDataGenerator().generate_dataset_batch(50, seed=1)
+
+    assert manager.add_workouts_bulk(workouts) == 50
+    assert manager.add_workouts_bulk([]) == 0
+
+    reloaded = DataManager(str(tmp_path / "workout_data.json")).get_workouts_df()
+    assert reloaded["id"].tolist() == workouts["id"].tolist()
+    assert reloaded["duration"].tolist() == workouts["duration"].tolist()
+    assert reloaded["tags"].map(tuple).tolist() == workouts["tags"].tolist()
+
+
+def test_appends_change_only_their_tables_version_and_frames(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.get_workouts_df()
+    manager.get_user_feedback_df()
+    workouts_version = manager.data_version("workouts")
+    feedback_frames = manager._frames["user_feedback"]
+
+    manager.add_workouts_bulk([{"id": "w5", "duration": 40, "level": "advanced"}])
+
+    assert manager.data_version("workouts") != workouts_version
+    assert manager._frames["user_feedback"] is feedback_frames
+    assert len(manager.get_workouts_df()) == 6
+
+
+def test_training_data_is_reused_until_the_data_changes(tmp_path):
+    manager = make_manager(tmp_path)
+    first = manager.prepare_training_data()
+
+    assert manager.prepare_training_data() is first
+    manager.add_feedback_bulk([{"workout_id": "w0", "rating": 5, "difficulty": "just_right", "date": 1700000000}])
+    assert manager.prepare_training_data() is not first
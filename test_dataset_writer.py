@@ -0,0 +1,41 @@
+import os
+
+import pandas as pd
+import pytest
+
+import serialization
+from dataset_writer import shard_path, write_dataset
+
+
+def read_table(output, table):
+    parts = sorted(os.listdir(os.path.join(output, table)))
+    return pd.concat([pd.read_json(os.path.join(output, table, part), lines=True) for part in parts],
+                     ignore_index=True)
+
+
+def test_shards_cover_every_row_and_do_not_depend_on_workers(tmp_path):
+    serial, parallel = str(tmp_path / "serial"), str(tmp_path / "parallel")
+    result = write_dataset(serial, 250, shard_size=100, workers=1, seed=3, feedback_per_workout=2)
+    write_dataset(parallel, 250, shard_size=100, workers=2, seed=3, feedback_per_workout=2)
+
+    assert result["shards"] == 3 and result["rows_written"] == 250
+    workouts = read_table(serial, "workouts")
+    assert workouts["id"].tolist() == [f"w{i}" for i in range(250)]
+    assert len(read_table(serial, "user_feedback")) == 500
+    for table in ("workouts", "exercises"):
+        pd.testing.assert_frame_equal(read_table(serial, table), read_table(parallel, table))
+    assert serialization.load(os.path.join(serial, "manifest.json"))["complete"]
+
+
+def test_interrupted_runs_resume_the_same_dataset(tmp_path):
+    output = str(tmp_path / "out")
+    write_dataset(output, 250, shard_size=100, workers=1, seed=3)
+    expected = read_table(output, "workouts")
+    os.remove(shard_path(output, "workouts", 1, "ndjson"))
+
+    result = write_dataset(output, 250, shard_size=100, workers=1, seed=3)
+
+    assert result["rows_written"] == 100
+    pd.testing.assert_frame_equal(read_table(output, "workouts"), expected)
+    with pytest.raises(ValueError, match="different settings"):
+        write_dataset(output, 250, shard_size=100, workers=1, seed=4)
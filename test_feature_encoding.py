@@ -0,0 +1,74 @@
+import pickle
+
+import numpy as np
+
+from feature_encoding import ACTIVITY_ENCODER, ACTIVITY_TYPES, INTENSITY_LEVELS, MultiHotEncoder
+
+
+def decode(encoder, row):
+    """Feature names of the non-zero columns of an encoded row"""
+    return {name for name, value in zip(encoder.feature_names, row) if value}
+
+
+def test_activity_encoding_round_trips_through_feature_names():
+    pattern = {"duration": 30, "intensity": "high", "type": "yoga", "location": "beach", "time_of_day": None}
+    row = ACTIVITY_ENCODER.encode(pattern)
+    values = dict(zip(ACTIVITY_ENCODER.feature_names, row))
+
+    assert len(row) == ACTIVITY_ENCODER.width
+    assert values["duration"] == 30
+    assert values["intensity"] == INTENSITY_LEVELS["high"]
+    assert {name for name in decode(ACTIVITY_ENCODER, row) if "=" in name} == {"type=yoga", "location=other"}
+
+
+def test_encode_matches_encode_many():
+    patterns = [{"duration": d, "intensity": "low", "type": t, "time_of_day": 1700000000 + d * 60}
+                for d, t in zip(range(5, 50, 9), ACTIVITY_TYPES)]
+    rows = ACTIVITY_ENCODER.encode_many(patterns)
+
+    assert rows.shape == (len(patterns), ACTIVITY_ENCODER.width)
+    np.testing.assert_allclose([ACTIVITY_ENCODER.encode(p) for p in patterns], rows, atol=1e-4)
+
+
+def test_multi_hot_round_trips_known_values():
+    rows = [["dumbbells", "yoga_mat"], [], None, "none", ["dumbbells", "dumbbells"]]
+    encoder = MultiHotEncoder("equipment_needed").fit(rows)
+    encoded = encoder.transform(rows).toarray()
+
+    assert [decode(encoder, row) for row in encoded] == [
+        {"equipment_needed=dumbbells", "equipment_needed=yoga_mat"},
+        set(),
+        set(),
+        {"equipment_needed=none"},
+        {"equipment_needed=dumbbells"},
+    ]
+
+
+def test_multi_hot_counts_unknown_values_as_other_and_drops_excluded():
+    encoder = MultiHotEncoder("tags", exclude=["beginner"]).fit([["beginner", "home"], ["outdoor"]])
+    encoded = encoder.transform([["home", "gym"], ["beginner"]]).toarray()
+
+    assert encoder.feature_names == ["tags=home", "tags=outdoor", "tags=other"]
+    assert [decode(encoder, row) for row in encoded] == [{"tags=home", "tags=other"}, set()]
+
+
+def test_fitted_multi_hot_encoder_survives_pickling():
+    encoder = MultiHotEncoder("tags").fit([["a", "b"], ["c"]])
+    restored = pickle.loads(pickle.dumps(encoder))
+
+    assert restored.feature_names == encoder.feature_names
+    assert (restored.transform([["b", "z"]]) != encoder.transform([["b", "z"]])).nnz == 0
+
+
+def test_fit_adds_categories_seen_in_data_after_the_defaults():
+    patterns = [{"type": "Climbing", "location": "gym"}, {"type": "climbing"}, {"type": "rowing"}]
+    fitted = ACTIVITY_ENCODER.fit(patterns)
+    rare_dropped = ACTIVITY_ENCODER.fit(patterns, min_count=2)
+
+    assert fitted.categorical["type"] == ACTIVITY_TYPES + ("climbing", "rowing")
+    assert rare_dropped.categorical["type"] == ACTIVITY_TYPES + ("climbing",)
+    assert fitted.categorical["location"] == ACTIVITY_ENCODER.categorical["location"]
+    assert "type=climbing" in decode(fitted, fitted.encode({"type": "climbing"}))
+    assert fitted.extends(ACTIVITY_ENCODER) and not ACTIVITY_ENCODER.extends(fitted)
+    # The shared default encoder is left alone
+    assert "type=climbing" not in ACTIVITY_ENCODER.feature_names
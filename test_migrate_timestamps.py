@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from ai_engine import AIEngine
+import serialization
+from migrate_timestamps import migrate_document
+from nutrition import NutritionManager
+from timeutils import to_epoch
+
+
+def write(path, data):
+    path.write_bytes(serialization.dumps(data))
+
+
+def test_migrate_document_converts_nested_timestamp_fields(tmp_path):
+    path = tmp_path / "user_profiles.json"
+    write(path, {"u1": {
+        "created_at": "2024-01-02T03:04:05",
+        "name": "2024-01-02T03:04:05",
+        "workout_history": [{"date": "2024-01-03 10:00:00", "type": "cardio"}, {"date": 1700000000}],
+    }})
+
+    assert migrate_document(str(path)) == 2
+    profile = serialization.load(str(path))["u1"]
+    assert profile["created_at"] == to_epoch("2024-01-02T03:04:05")
+    assert profile["workout_history"][0]["date"] == to_epoch("2024-01-03 10:00:00")
+    assert profile["workout_history"][1]["date"] == 1700000000
+    # Only timestamp fields are touched
+    assert profile["name"] == "2024-01-02T03:04:05"
+
+    # Already converted values are left alone, so re-running is safe
+    assert migrate_document(str(path)) == 0
+
+
+def test_dry_run_counts_without_writing(tmp_path):
+    path = tmp_path / "journals.json"
+    write(path, {"u1": [{"date": "2024-01-02T03:04:05"}]})
+    before = path.read_bytes()
+
+    assert migrate_document(str(path), dry_run=True) == 1
+    assert path.read_bytes() == before
+
+
+def test_append_log_operations_are_converted(tmp_path):
+    path = tmp_path / "ai_data.json"
+    write(path, {"user_patterns": {}})
+    (tmp_path / "ai_data.json.log").write_bytes(
+        serialization.dumps([{"p": ["user_patterns", "u1", "time_of_day"], "v": "2024-01-02T03:04:05"}]) + b"\n"
+        + serialization.dumps([{"p": ["user_patterns", "u2"], "v": {"date": "2024-01-03T00:00:00"}}]) + b"\n"
+        + serialization.dumps([{"p": ["user_patterns", "u3"]}]) + b"\n"
+    )
+
+    assert migrate_document(str(path)) == 2
+    lines = [serialization.loads(line) for line in (tmp_path / "ai_data.json.log").read_bytes().splitlines()]
+    assert lines[0][0]["v"] == to_epoch("2024-01-02T03:04:05")
+    assert lines[1][0]["v"] == {"date": to_epoch("2024-01-03T00:00:00")}
+    assert lines[2] == [{"p": ["user_patterns", "u3"]}]
+
+
+def test_nutrition_summary_reads_unmigrated_meal_dates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    nutrition = NutritionManager()
+    nutrition.log_meal("u1", "breakfast", "oatmeal")
+    legacy = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    nutrition.nutrition_data["users"]["u1"]["meals"].append({"date": legacy, "type": "lunch", "name": "salad"})
+
+    assert nutrition.get_nutrition_summary("u1")["total_meals"] == 2
+
+
+def test_ai_engine_rejects_times_that_are_not_timestamps(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = AIEngine()
+
+    with pytest.raises(ValueError, match="time_of_day"):
+        engine.learn_user_patterns("u1", {"type": "run", "time_of_day": "morning"}, None, None)
+    assert "u1" not in engine.ai_data["user_patterns"]
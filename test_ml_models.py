@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import WorkoutDataGenerator
+from data_manager import DataManager
+from ml_models import MULTI_HOT_COLUMNS, WorkoutLevelPredictor
+
+
+@pytest.fixture(scope="module")
+def data_manager(tmp_path_factory):
+    root = tmp_path_factory.mktemp("data")
+    generator = WorkoutDataGenerator()
+    manager = DataManager(str(root / "workout_data.json"))
+    workouts = generator.generate_dataset_batch(600, seed=1)
+    ids = workouts["id"].tolist()
+    manager.add_workouts_bulk(workouts)
+    manager.add_feedback_bulk(generator.generate_feedback_batch(ids * 3, seed=2))
+    manager.add_progress_bulk(generator.generate_progress_batch(ids * 2, seed=3))
+    return manager
+
+
+def test_bare_workout_rows_get_the_training_aggregates(data_manager):
+    training_data = data_manager.prepare_training_data()
+    predictor = WorkoutLevelPredictor()
+    predictor.train(training_data)
+    rows = data_manager.get_workouts_df().drop(columns=["level"]).to_dict("records")[:200]
+
+    expected = predictor.model.predict(training_data.features[:200].toarray())
+
+    assert list(predictor.predict_batch(rows)) == list(expected)
+    assert [predictor.predict(row) for row in rows] == list(expected)
+
+
+def test_training_data_encodes_every_multi_hot_column(data_manager):
+    training_data = data_manager.prepare_training_data()
+
+    assert tuple(training_data.encoders) == MULTI_HOT_COLUMNS
+    assert any(name.startswith("benefits=") for name in training_data.feature_names)
+
+
+def test_training_frame_is_a_dataframe_of_every_workout(data_manager):
+    frame = data_manager.prepare_training_frame()
+    frame["level"] = None
+
+    assert isinstance(frame, pd.DataFrame)
+    assert len(frame) == len(data_manager.get_workouts_df())
+    assert {"id", "level", *MULTI_HOT_COLUMNS} <= set(frame.columns)
+    assert data_manager.prepare_training_data().frame["level"].notna().all()
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    generator = WorkoutDataGenerator()
+    train = generator.generate_dataset_batch(2000, seed=4)
+    # Noisy durations keep the level from being a lookup on calories_burn
+    train["duration"] = train["duration"] + np.random.default_rng(4).normal(0, 3, len(train))
+    predictor = WorkoutLevelPredictor()
+    predictor.train(train)
+    return predictor
+
+
+def slow_predict(predictor, rows):
+    return list(predictor.model.predict(predictor._matrix(predictor._prepare_features(pd.DataFrame(rows)))))
+
+
+def test_fast_path_matches_random_forest_predict(predictor):
+    rows = WorkoutDataGenerator().generate_dataset_batch(300, seed=5).drop(columns=["level"]).to_dict("records")
+    rows[0]["equipment_needed"] = ["jump_rope"]
+    rows[1]["tags"] = []
+    del rows[2]["calories_burn"]
+    expected = slow_predict(predictor, rows)
+
+    assert [predictor.predict(row) for row in rows] == expected
+    assert list(predictor.predict_batch(rows[:predictor.fast_path_max_rows])) == expected[:predictor.fast_path_max_rows]
+    assert list(predictor.predict_batch(rows)) == expected
+
+
+def test_fast_and_slow_paths_agree_on_missing_list_values(predictor):
+    frame = WorkoutDataGenerator().generate_dataset_batch(10, seed=6).drop(columns=["level"])
+    frame["equipment_needed"] = frame["equipment_needed"].astype(object)
+    frame.loc[0, "equipment_needed"] = np.nan
+    frame.at[1, "equipment_needed"] = None
+    frame.at[2, "tags"] = ["outdoor", None, np.nan]
+    frame.loc[3, "type"] = np.nan
+    frame.at[4, "benefits"] = ()
+    expected = slow_predict(predictor, frame.to_dict("records"))
+
+    assert len(frame) <= predictor.fast_path_max_rows
+    assert list(predictor.predict_batch(frame)) == expected
+    assert [predictor.predict(row) for row in frame.to_dict("records")] == expected
+
+
+def test_identifier_columns_are_not_features():
+    train = WorkoutDataGenerator().generate_dataset_batch(200, seed=7)
+    train["id"] = np.arange(len(train))
+    predictor = WorkoutLevelPredictor()
+    predictor.train(train)
+
+    assert "id" not in predictor.numeric_features
+    assert "duration" in predictor.numeric_features
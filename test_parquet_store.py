@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from data_generator import WorkoutDataGenerator
+from data_manager import DataManager
+from parquet_store import ParquetStore
+
+
+def test_append_with_mismatched_column_type_is_rejected(tmp_path):
+    store = ParquetStore(str(tmp_path / "data"), ["feedback"])
+    store.append("feedback", [{"workout_id": "w1", "date": 1700000000}])
+
+    with pytest.raises(TypeError, match="date"):
+        store.append("feedback", [{"workout_id": "w2", "date": "2024-01-01T00:00:00"}])
+
+    store.append("feedback", [{"workout_id": "w3", "date": None, "rating": 4}])
+    assert store.read("feedback", columns=["workout_id"])["workout_id"].tolist() == ["w1", "w3"]
+
+
+def test_generated_rows_share_the_batch_schema(tmp_path):
+    generator = WorkoutDataGenerator()
+    store = ParquetStore(str(tmp_path / "data"), ["feedback", "progress"])
+    store.append("feedback", generator.generate_feedback_batch(["w1", "w2"], seed=1))
+    store.append("feedback", [generator.generate_user_feedback("w3")])
+    store.append("progress", generator.generate_progress_batch(["w1"], seed=1))
+    store.append("progress", [generator.generate_progress_data("w2")])
+
+    assert store.count("feedback") == 3
+    assert store.count("progress") == 2
+
+
+def test_filters_and_columns_are_pushed_down_to_the_dataset(tmp_path):
+    store = ParquetStore(str(tmp_path / "data"), ["workouts"])
+    workouts = WorkoutDataGenerator().generate_dataset_batch(300, seed=5)
+    store.append("workouts", workouts.iloc[:150])
+    store.append("workouts", workouts.iloc[150:])
+    filters = [("level", "==", "advanced"), ("duration", ">=", 45)]
+
+    selected = store.read("workouts", columns=["id", "duration"], filters=filters)
+
+    expected = workouts[(workouts["level"] == "advanced") & (workouts["duration"] >= 45)]
+    assert list(selected.columns) == ["id", "duration"]
+    assert selected["id"].tolist() == expected["id"].tolist()
+    assert store.count("workouts", filters) == len(expected)
+    assert store.count("workouts") == 300
+
+
+@pytest.mark.parametrize("filters", [
+    [("type", "in", ["yoga", "hiit"])],
+    [[("level", "==", "beginner")], [("calories_burn", ">", 400)]],
+])
+def test_json_and_parquet_backends_answer_queries_alike(tmp_path, filters):
+    workouts = WorkoutDataGenerator().generate_dataset_batch(300, seed=6)
+    frames = []
+    for backend in ("json", "parquet"):
+        (tmp_path / backend).mkdir()
+        manager = DataManager(str(tmp_path / backend / "workout_data.json"), backend=backend)
+        manager.add_workouts_bulk(workouts)
+        frames.append(manager.get_workouts_df(["id", "type", "level", "calories_burn"], filters))
+
+    assert len(frames[0]) > 0
+    pd.testing.assert_frame_equal(frames[0], frames[1], check_dtype=False)
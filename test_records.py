@@ -0,0 +1,43 @@
+import pytest
+
+import serialization
+from records import Comment, JournalEntry, Post, decode_lists
+
+
+def test_records_behave_like_the_dicts_they_replace():
+    entry = JournalEntry(date=1700000000, mood="happy", custom="kept")
+
+    assert entry["mood"] == "happy" and entry.get("tags") is None
+    assert "mood" in entry and "tags" not in entry and "custom" in entry
+    assert dict(entry) == {"date": 1700000000, "mood": "happy", "custom": "kept"}
+    entry["tags"] = ["calm"]
+    del entry["custom"]
+    assert entry == {"date": 1700000000, "mood": "happy", "tags": ["calm"]}
+    with pytest.raises(KeyError):
+        entry["content"]
+    with pytest.raises(KeyError):
+        del entry["custom"]
+
+
+def test_records_have_no_instance_dict():
+    entry = JournalEntry(mood="happy")
+
+    assert not hasattr(entry, "__dict__")
+    with pytest.raises(AttributeError):
+        entry.unknown = 1
+
+
+def test_nested_records_round_trip_through_json():
+    data = {"id": "p1", "content": "hi", "likes": [], "comments": [{"id": "c1", "content": "yo"}]}
+    post = Post.from_dict(data)
+
+    assert isinstance(post["comments"][0], Comment)
+    assert Post.from_dict(post) is post
+    assert serialization.loads(serialization.dumps(post)) == data
+
+
+def test_decode_lists_converts_every_users_entries():
+    journals = decode_lists({"u1": [{"mood": "sad"}], "u2": []}, JournalEntry)
+
+    assert isinstance(journals["u1"][0], JournalEntry)
+    assert journals["u2"] == []
@@ -0,0 +1,42 @@
+import os
+from collections import Counter
+
+from ai_engine import AIEngine, model_filename
+import serialization
+from retrain import BUILDING, CURRENT, _prune_versions, retrain
+
+
+def learn(engine, user_id, activity_type, count):
+    with engine.batch():
+        for i in range(count):
+            engine.learn_user_patterns(user_id, {"type": activity_type, "duration": 30, "intensity": "medium",
+                                                 "time_of_day": 1700000000 + i * 3600}, None, None)
+
+
+def test_online_updates_leave_the_published_version_untouched(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = AIEngine()
+    learn(engine, "u1", "run", 5)
+    version = retrain(str(tmp_path), workers=1)["version"]
+    published = tmp_path / "ai_models" / version / model_filename("u1")
+    before = published.read_bytes()
+
+    # Patterns arriving after the retrain read ai_data are only in the live model
+    learn(engine, "u1", "swim", 5)
+
+    assert published.read_bytes() == before
+    for served in (engine, AIEngine()):
+        counts = sum(served._get_activity_model("u1").cluster_activities, Counter())
+        assert counts == {"run": 5, "swim": 5}
+
+
+def test_pruning_skips_published_and_building_versions(tmp_path):
+    models_dir = tmp_path / "ai_models"
+    for version in ("v1", "v2", "v3", "v4"):
+        (models_dir / version).mkdir(parents=True)
+    (models_dir / CURRENT).write_bytes(serialization.dumps({"version": "v2"}))
+    (models_dir / BUILDING).write_bytes(serialization.dumps({"version": "v1"}))
+
+    _prune_versions(str(models_dir), keep=1)
+
+    assert sorted(os.listdir(models_dir)) == sorted(["v1", "v2", "v4", CURRENT, BUILDING])
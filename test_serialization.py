@@ -0,0 +1,57 @@
+import gc
+import threading
+
+import pytest
+
+import serialization
+
+
+@pytest.fixture(autouse=True)
+def collector_enabled():
+    gc.enable()
+    yield
+    gc.enable()
+
+
+def test_overlapping_pauses_restore_the_collector_after_the_last_one():
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with serialization.gc_paused():
+            entered.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    entered.wait()
+    # A parse finishing while another thread is still paused must not re-enable collection
+    serialization.loads(b'{"a": [1, 2, 3]}')
+    assert not gc.isenabled()
+
+    release.set()
+    holder.join()
+    assert gc.isenabled()
+
+
+def test_failed_parse_restores_the_collector():
+    with pytest.raises(serialization.DECODE_ERRORS):
+        serialization.loads(b'{"a": ')
+    assert gc.isenabled()
+
+
+def test_collector_left_off_by_the_caller_stays_off():
+    gc.disable()
+    serialization.loads(b'[]')
+    assert not gc.isenabled()
+
+
+def test_concurrent_loads_leave_the_collector_on():
+    documents = [serialization.dumps({"n": i, "items": list(range(100))}) for i in range(50)]
+    threads = [threading.Thread(target=lambda: [serialization.loads(d) for d in documents]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert gc.isenabled()
@@ -0,0 +1,209 @@
+import os
+from functools import cached_property
+
+import pytest
+
+from nutrition import NutritionManager
+import serialization
+from storage import AppendLogStore, ShardedStore, StorageConflictError, open_store, save_sections
+
+
+@pytest.fixture(params=["json", "log"])
+def backend(request):
+    return request.param
+
+
+def test_concurrent_appends_to_same_list_are_kept(tmp_path, backend):
+    path = str(tmp_path / "d.json")
+    setup = open_store(path, backend)
+    setup.save(setup.load({"posts": []}))
+
+    a, b = open_store(path, backend), open_store(path, backend)
+    data_a, data_b = a.load({}), b.load({})
+    data_a["posts"].append("from A")
+    a.save(data_a, ("posts", -1))
+    data_b["posts"].append("from B")
+    b.save(data_b, ("posts", -1))
+
+    assert open_store(path, backend).load({}) == {"posts": ["from A", "from B"]}
+
+
+def test_batched_appends_merge_with_another_writer(tmp_path, backend):
+    path = str(tmp_path / "d.json")
+    a, b = open_store(path, backend), open_store(path, backend)
+    a.save(a.load({"posts": []}))
+    data_a, data_b = a.load({}), b.load({})
+
+    data_b["posts"].append("b1")
+    b.save(data_b, ("posts", -1))
+    with a.batch():
+        for item in ("a1", "a2"):
+            data_a["posts"].append(item)
+            a.save(data_a, ("posts", -1))
+    data_b["posts"].append("b2")
+    b.save(data_b, ("posts", -1))
+
+    assert open_store(path, backend).load({})["posts"] == ["b1", "a1", "a2", "b2"]
+
+
+class Sections:
+    def __init__(self, directory, backend):
+        self.stores = {name: open_store(str(directory / f"{name}.json"), backend) for name in ("a", "b")}
+
+    @cached_property
+    def a(self):
+        return self.stores["a"].load({})
+
+    @cached_property
+    def b(self):
+        return self.stores["b"].load({})
+
+
+def test_save_sections_routes_paths_and_skips_unloaded_sections(tmp_path, backend):
+    sections = Sections(tmp_path, backend)
+    sections.a["k"] = 1
+    save_sections(sections, sections.stores, ("a", "k"))
+    save_sections(sections, sections.stores)
+
+    assert Sections(tmp_path, backend).a == {"k": 1}
+    assert not (tmp_path / "b.json").exists()
+
+
+def test_append_log_replays_lines_onto_the_snapshot(tmp_path):
+    path = str(tmp_path / "d.json")
+    store = AppendLogStore(path)
+    data = store.load({})
+    data["users"] = {"u1": {"name": "a"}}
+    store.save(data)
+    data["users"]["u1"]["name"] = "b"
+    store.save(data, ("users", "u1", "name"))
+    data["users"]["u2"] = {"name": "c"}
+    store.save(data, ("users", "u2"))
+    del data["users"]["u1"]
+    store.save(data, ("users", "u1"))
+
+    assert os.path.exists(path + ".log")
+    assert AppendLogStore(path).load({}) == {"users": {"u2": {"name": "c"}}}
+
+    # A torn final line from an interrupted write is ignored
+    with open(path + ".log", "ab") as f:
+        f.write(b'[{"p": ["users", "u3"], "v": {"na')
+    assert AppendLogStore(path).load({}) == {"users": {"u2": {"name": "c"}}}
+
+
+def test_compaction_folds_the_log_and_keeps_other_writers_working(tmp_path):
+    path = str(tmp_path / "d.json")
+    a, b = AppendLogStore(path), AppendLogStore(path)
+    data_a = a.load({"posts": [], "count": 0})
+    a.save(data_a)
+    data_b = b.load({})
+    for i in range(3):
+        data_a["posts"].append(i)
+        a.save(data_a, ("posts", -1))
+
+    a.compact()
+    assert not os.path.exists(path + ".log")
+    assert serialization.load(path) == {"posts": [0, 1, 2], "count": 0}
+
+    # b read before the compaction; its next save catches up with the new snapshot
+    data_b["count"] = 5
+    b.save(data_b, ("count",))
+    assert AppendLogStore(path).load({}) == {"posts": [0, 1, 2], "count": 5}
+
+
+def test_compaction_starts_past_the_threshold(tmp_path):
+    path = str(tmp_path / "d.json")
+    store = AppendLogStore(path, compact_threshold=200)
+    data = store.load({})
+    store.save(data)
+    for i in range(20):
+        data[f"k{i}"] = i
+        store.save(data, (f"k{i}",))
+    assert store._compaction_thread is not None
+    store._compaction_thread.join()
+
+    assert AppendLogStore(path).load({}) == {f"k{i}": i for i in range(20)}
+
+
+def test_full_save_over_another_writers_change_raises(tmp_path, backend):
+    path = str(tmp_path / "d.json")
+    a, b = open_store(path, backend), open_store(path, backend)
+    data_a = a.load({"x": 0})
+    a.save(data_a)
+    data_b = b.load({})
+    data_a["x"] = 1
+    a.save(data_a, ("x",))
+
+    data_b["y"] = 2
+    with pytest.raises(StorageConflictError):
+        b.save(data_b)
+
+
+def test_saves_to_different_paths_merge(tmp_path, backend):
+    path = str(tmp_path / "d.json")
+    a, b = open_store(path, backend), open_store(path, backend)
+    data_a = a.load({"profiles": {}})
+    a.save(data_a)
+    data_b = b.load({})
+
+    data_a["profiles"]["u1"] = {"name": "a"}
+    a.save(data_a, ("profiles", "u1"))
+    data_b["profiles"]["u2"] = {"name": "b"}
+    b.save(data_b, ("profiles", "u2"))
+
+    assert open_store(path, backend).load({}) == {"profiles": {"u1": {"name": "a"}, "u2": {"name": "b"}}}
+    assert data_b["profiles"] == {"u1": {"name": "a"}, "u2": {"name": "b"}}
+
+
+def test_manager_batch_writes_each_store_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    nutrition = NutritionManager()
+    writes = []
+    for store in (nutrition._nutrition_store, nutrition._meals_store):
+        write = store._write
+        monkeypatch.setattr(store, "_write", lambda data, *paths, store=store, write=write:
+                            (writes.append(store.path), write(data, *paths)))
+
+    with nutrition.batch():
+        with nutrition.batch():
+            for i in range(5):
+                nutrition.log_meal("u1", "snack", f"apple {i}")
+        assert not writes
+        nutrition.add_meal("snacks", "apple", 95, 0, 25, 0, ["apple"], "Wash")
+        assert not writes
+
+    assert sorted(writes) == sorted([nutrition.nutrition_data_file, nutrition.meals_data_file])
+    assert len(NutritionManager().nutrition_data["users"]["u1"]["meals"]) == 5
+
+
+def json_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def test_sharded_store_writes_and_reads_only_the_users_shard(tmp_path):
+    directory = str(tmp_path / "journals")
+    store = ShardedStore(directory, shards=8)
+    data = store.load()
+    data["u1"] = [{"mood": "happy"}]
+    store.save(data, ("u1",))
+
+    shard = f"shard_{store.shard_index('u1'):03d}.json"
+    assert json_files(directory) == sorted(["manifest.json", shard])
+
+    reader = ShardedStore(directory)
+    assert reader.load()["u1"] == [{"mood": "happy"}]
+    assert list(reader._shard_data) == [reader.shard_index("u1")]
+
+
+def test_sharded_store_splits_a_legacy_file_and_keeps_its_shard_count(tmp_path):
+    legacy = tmp_path / "journals.json"
+    legacy.write_bytes(serialization.dumps({f"u{i}": [i] for i in range(20)}))
+    directory = str(tmp_path / "journals")
+
+    ShardedStore(directory, shards=4, legacy_path=str(legacy))
+    # The manifest wins over a different count or environment later on
+    reopened = ShardedStore(directory, shards=16, legacy_path=str(legacy))
+
+    assert reopened.shards == 4
+    assert dict(reopened.load()) == {f"u{i}": [i] for i in range(20)}
+    assert len(json_files(directory)) <= 5
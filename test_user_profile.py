@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from records import EmotionRecord, WorkoutRecord
+from user_profile import SQLiteUserProfile, UserProfile
+
+
+@pytest.fixture
+def sqlite_profiles(tmp_path):
+    profiles = SQLiteUserProfile(str(tmp_path / "profiles.db"))
+    yield profiles
+    profiles.close()
+
+
+def test_sqlite_history_returns_records_like_json_backend(tmp_path, monkeypatch, sqlite_profiles):
+    monkeypatch.chdir(tmp_path)
+    for profiles in (UserProfile(), sqlite_profiles):
+        profiles.create_profile("u1", "Sara", 30, "f", 60, 165)
+        profiles.add_workout_record("u1", "cardio", 30, "high")
+        profiles.add_emotion_record("u1", "happy", 4)
+
+        workouts = profiles.get_workout_history_range("u1")
+        assert [type(r) for r in workouts] == [WorkoutRecord]
+        assert workouts[0]["type"] == "cardio"
+        assert [type(r) for r in profiles.get_profile("u1")["emotion_history"]] == [EmotionRecord]
+
+
+def test_sqlite_profile_has_no_json_store_attributes(sqlite_profiles):
+    assert not hasattr(sqlite_profiles, "profiles")
+
+
+def test_sqlite_writes_from_many_threads(sqlite_profiles):
+    sqlite_profiles.create_profile("u1", "Sara", 30, "f", 60, 165)
+
+    def add_records():
+        for _ in range(50):
+            sqlite_profiles.add_workout_record("u1", "cardio", 30, "high")
+            sqlite_profiles.get_workout_history("u1")
+
+    threads = [threading.Thread(target=add_records) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sqlite_profiles.get_workout_history("u1")) == 400
@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+import pytest
+
+from weather import FileWeatherProvider, WeatherProvider, WeatherService
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = tmp_path / "weather.json"
+    path.write_text(json.dumps({"default": {"temperature": 20, "condition": "clear"}}))
+    return WeatherService(FileWeatherProvider(str(path)))
+
+
+def test_provider_must_implement_fetch():
+    with pytest.raises(TypeError):
+        WeatherProvider()
+
+
+def test_sync_lookup_inside_running_loop_raises_clear_error(service):
+    async def lookup():
+        return service.get_many_sync([(35.7, 51.4)])
+
+    with pytest.raises(RuntimeError, match="running event loop"):
+        asyncio.run(lookup())
+
+
+def test_cached_areas_are_served_without_a_loop(service):
+    service.get_many_sync([(35.7, 51.4), (35.71, 51.41)])
+
+    async def lookup():
+        return service.get_many_sync([(35.7, 51.4)])
+
+    assert asyncio.run(lookup())[0]["condition"] == "clear"
+    assert service.provider.calls == 1
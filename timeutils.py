@@ -0,0 +1,48 @@
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Union
+
+DAY = 24 * 60 * 60
+
+Timestamp = Union[int, float, str, datetime]
+
+
+def now_ts() -> int:
+    """Current time as integer seconds since the epoch (UTC)"""
+    return int(time.time())
+
+
+def days_ago(days: float) -> int:
+    """Epoch seconds for the moment `days` days before now"""
+    return now_ts() - int(days * DAY)
+
+
+def to_epoch(value: Timestamp) -> int:
+    """Convert epoch seconds, a datetime or a legacy ISO/"%Y-%m-%d %H:%M:%S" string to epoch seconds"""
+
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        # Legacy strings were written with datetime.now(), so naive means local time
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def from_epoch(ts: Timestamp, tz: Optional[timezone] = None) -> datetime:
+    """Epoch seconds as a datetime, in local time unless tz is given"""
+    return datetime.fromtimestamp(to_epoch(ts), tz)
+
+
+def format_ts(ts: Timestamp, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
+    """Epoch seconds formatted as local time for display"""
+    return from_epoch(ts).strftime(fmt)
+
+
+def slice_range(records: List[Any], start: Optional[Timestamp] = None, end: Optional[Timestamp] = None,
+                key: Callable[[Any], Any] = lambda r: r["date"]) -> List[Any]:
+    """Records with start <= key(record) <= end, found by bisecting a list sorted by time"""
+    timestamp = lambda r: to_epoch(key(r))
+    lo = bisect_left(records, to_epoch(start), key=timestamp) if start is not None else 0
+    hi = bisect_right(records, to_epoch(end), key=timestamp) if end is not None else len(records)
+    return records[lo:hi]
@@ -1,47 +1,45 @@
-import json
-import os
 import uuid
-from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from decimal import Decimal
+from functools import cached_property
+from storage import batch, open_store, save_sections
+from timeutils import from_epoch, now_ts, to_epoch
 
 class TrainerPaymentManager:
     def __init__(self):
         self.payments_file = "trainer_payments.json"
         self.accounts_file = "trainer_accounts.json"
         self.withdrawals_file = "trainer_withdrawals.json"
-        self._load_data()
-
-    def _load_data(self):
-        """Load payment and account data from JSON files"""
-        if os.path.exists(self.payments_file):
-            with open(self.payments_file, 'r', encoding='utf-8') as f:
-                self.payments = json.load(f)
-        else:
-            self.payments = {}
-
-        if os.path.exists(self.accounts_file):
-            with open(self.accounts_file, 'r', encoding='utf-8') as f:
-                self.accounts = json.load(f)
-        else:
-            self.accounts = {}
-
-        if os.path.exists(self.withdrawals_file):
-            with open(self.withdrawals_file, 'r', encoding='utf-8') as f:
-                self.withdrawals = json.load(f)
-        else:
-            self.withdrawals = {}
-
-    def _save_data(self):
+        self._payments_store = open_store(self.payments_file)
+        self._accounts_store = open_store(self.accounts_file)
+        self._withdrawals_store = open_store(self.withdrawals_file)
+
+    @cached_property
+    def payments(self):
+        """Payments, loaded from disk on first access"""
+        return self._payments_store.load({})
+
+    @cached_property
+    def accounts(self):
+        """Accounts, loaded from disk on first access"""
+        return self._accounts_store.load({})
+
+    @cached_property
+    def withdrawals(self):
+        """Withdrawals, loaded from disk on first access"""
+        return self._withdrawals_store.load({})
+
+    def _save_data(self, *paths):
         """Save payment and account data to JSON files"""
-        with open(self.payments_file, 'w', encoding='utf-8') as f:
-            json.dump(self.payments, f, ensure_ascii=False, indent=4)
-        
-        with open(self.accounts_file, 'w', encoding='utf-8') as f:
-            json.dump(self.accounts, f, ensure_ascii=False, indent=4)
-        
-        with open(self.withdrawals_file, 'w', encoding='utf-8') as f:
-            json.dump(self.withdrawals, f, ensure_ascii=False, indent=4)
+        save_sections(self, {
+            "payments": self._payments_store,
+            "accounts": self._accounts_store,
+            "withdrawals": self._withdrawals_store,
+        }, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return batch(self._payments_store, self._accounts_store, self._withdrawals_store)
 
     def create_trainer_account(self, trainer_id: str, bank_info: Dict) -> bool:
         """Create a financial account for a trainer"""
@@ -54,9 +52,9 @@ class TrainerPaymentManager:
             "total_earnings": 0.0,
             "pending_withdrawals": 0.0,
             "payment_methods": [],
-            "created_at": datetime.now().isoformat()
+            "created_at": now_ts()
         }
-        self._save_data()
+        self._save_data(("accounts", trainer_id))
         return True
 
     def add_payment_method(self, trainer_id: str, payment_method: Dict) -> bool:
@@ -69,7 +67,7 @@ class TrainerPaymentManager:
             "id": payment_method_id,
             **payment_method
         })
-        self._save_data()
+        self._save_data(("accounts", trainer_id, "payment_methods", -1))
         return True
 
     def process_session_payment(self, session_id: str, amount: float) -> bool:
@@ -95,9 +93,9 @@ class TrainerPaymentManager:
         payment["status"] = "completed"
         payment["platform_fee"] = platform_fee
         payment["trainer_amount"] = trainer_amount
-        payment["completed_at"] = datetime.now().isoformat()
+        payment["completed_at"] = now_ts()
 
-        self._save_data()
+        self._save_data(("payments", session_id), ("accounts", trainer_id))
         return True
 
     def request_withdrawal(self, trainer_id: str, amount: float, 
@@ -116,14 +114,14 @@ class TrainerPaymentManager:
             "amount": amount,
             "payment_method_id": payment_method_id,
             "status": "pending",
-            "requested_at": datetime.now().isoformat()
+            "requested_at": now_ts()
         }
 
         # Update account balance
         account["balance"] -= amount
         account["pending_withdrawals"] += amount
 
-        self._save_data()
+        self._save_data(("withdrawals", withdrawal_id), ("accounts", trainer_id))
         return withdrawal_id
 
     def process_withdrawal(self, withdrawal_id: str) -> bool:
@@ -139,12 +137,12 @@ class TrainerPaymentManager:
 
         # Update withdrawal status
         withdrawal["status"] = "completed"
-        withdrawal["completed_at"] = datetime.now().isoformat()
+        withdrawal["completed_at"] = now_ts()
 
         # Update account
         self.accounts[trainer_id]["pending_withdrawals"] -= withdrawal["amount"]
 
-        self._save_data()
+        self._save_data(("withdrawals", withdrawal_id), ("accounts", trainer_id, "pending_withdrawals"))
         return True
 
     def get_trainer_earnings(self, trainer_id: str, 
@@ -162,11 +160,13 @@ class TrainerPaymentManager:
             "sessions": []
         }
 
+        start = to_epoch(start_date) if start_date else None
+        end = to_epoch(end_date) if end_date else None
         for session_id, payment in self.payments.items():
             if payment["trainer_id"] == trainer_id:
-                if start_date and payment["date"] < start_date:
+                if start is not None and payment["date"] < start:
                     continue
-                if end_date and payment["date"] > end_date:
+                if end is not None and payment["date"] > end:
                     continue
 
                 if payment["status"] == "completed":
@@ -211,7 +211,7 @@ class TrainerPaymentManager:
 
         for session_id, payment in self.payments.items():
             if payment["trainer_id"] == trainer_id:
-                payment_date = datetime.fromisoformat(payment["date"])
+                payment_date = from_epoch(payment["date"])
                 if (payment_date.year == year and 
                     payment_date.month == month and 
                     payment["status"] == "completed"):
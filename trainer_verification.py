@@ -1,9 +1,9 @@
-import json
-import os
 import uuid
-from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from enum import Enum
+from functools import cached_property
+from storage import batch, open_store, save_sections
+from timeutils import DAY, now_ts
 
 class TrainerType(Enum):
     YOGA = "yoga"
@@ -22,38 +22,36 @@ class TrainerVerificationManager:
         self.verifications_file = "trainer_verifications.json"
         self.certifications_file = "certifications.json"
         self.specializations_file = "specializations.json"
-        self._load_data()
-
-    def _load_data(self):
-        """Load verification and certification data from JSON files"""
-        if os.path.exists(self.verifications_file):
-            with open(self.verifications_file, 'r', encoding='utf-8') as f:
-                self.verifications = json.load(f)
-        else:
-            self.verifications = {}
-
-        if os.path.exists(self.certifications_file):
-            with open(self.certifications_file, 'r', encoding='utf-8') as f:
-                self.certifications = json.load(f)
-        else:
-            self.certifications = {}
-
-        if os.path.exists(self.specializations_file):
-            with open(self.specializations_file, 'r', encoding='utf-8') as f:
-                self.specializations = json.load(f)
-        else:
-            self.specializations = {}
-
-    def _save_data(self):
+        self._verifications_store = open_store(self.verifications_file)
+        self._certifications_store = open_store(self.certifications_file)
+        self._specializations_store = open_store(self.specializations_file)
+
+    @cached_property
+    def verifications(self):
+        """Verifications, loaded from disk on first access"""
+        return self._verifications_store.load({})
+
+    @cached_property
+    def certifications(self):
+        """Certifications, loaded from disk on first access"""
+        return self._certifications_store.load({})
+
+    @cached_property
+    def specializations(self):
+        """Specializations, loaded from disk on first access"""
+        return self._specializations_store.load({})
+
+    def _save_data(self, *paths):
         """Save verification and certification data to JSON files"""
-        with open(self.verifications_file, 'w', encoding='utf-8') as f:
-            json.dump(self.verifications, f, ensure_ascii=False, indent=4)
-        
-        with open(self.certifications_file, 'w', encoding='utf-8') as f:
-            json.dump(self.certifications, f, ensure_ascii=False, indent=4)
-        
-        with open(self.specializations_file, 'w', encoding='utf-8') as f:
-            json.dump(self.specializations, f, ensure_ascii=False, indent=4)
+        save_sections(self, {
+            "verifications": self._verifications_store,
+            "certifications": self._certifications_store,
+            "specializations": self._specializations_store,
+        }, *paths)
+
+    def batch(self):
+        """Group several mutations into a single save"""
+        return batch(self._verifications_store, self._certifications_store, self._specializations_store)
 
     def register_specialization(self, trainer_id: str, trainer_type: TrainerType,
                               specialization_data: Dict) -> bool:
@@ -66,13 +64,13 @@ class TrainerVerificationManager:
             "type": trainer_type.value,
             "data": specialization_data,
             "status": VerificationStatus.PENDING.value,
-            "created_at": datetime.now().isoformat(),
+            "created_at": now_ts(),
             "verified_at": None,
             "expires_at": None
         }
 
         self.specializations[trainer_id].append(specialization)
-        self._save_data()
+        self._save_data(("specializations", trainer_id, -1))
         return True
 
     def submit_certification(self, trainer_id: str, certification_data: Dict) -> str:
@@ -82,12 +80,12 @@ class TrainerVerificationManager:
             "trainer_id": trainer_id,
             "data": certification_data,
             "status": VerificationStatus.PENDING.value,
-            "submitted_at": datetime.now().isoformat(),
+            "submitted_at": now_ts(),
             "verified_at": None,
             "expires_at": None,
             "verifier_notes": ""
         }
-        self._save_data()
+        self._save_data(("certifications", certification_id))
         return certification_id
 
     def verify_certification(self, certification_id: str, 
@@ -102,17 +100,15 @@ class TrainerVerificationManager:
             VerificationStatus.APPROVED.value if approved 
             else VerificationStatus.REJECTED.value
         )
-        certification["verified_at"] = datetime.now().isoformat()
+        certification["verified_at"] = now_ts()
         certification["verifier_id"] = verifier_id
         certification["verifier_notes"] = notes
 
         if approved:
             # Set expiration date (e.g., 2 years from now)
-            certification["expires_at"] = (
-                datetime.now() + timedelta(days=730)
-            ).isoformat()
+            certification["expires_at"] = now_ts() + 730 * DAY
 
-        self._save_data()
+        self._save_data(("certifications", certification_id))
         return True
 
     def verify_specialization(self, trainer_id: str, specialization_id: str,
@@ -128,17 +124,15 @@ class TrainerVerificationManager:
                     VerificationStatus.APPROVED.value if approved 
                     else VerificationStatus.REJECTED.value
                 )
-                specialization["verified_at"] = datetime.now().isoformat()
+                specialization["verified_at"] = now_ts()
                 specialization["verifier_id"] = verifier_id
                 specialization["verifier_notes"] = notes
 
                 if approved:
                     # Set expiration date (e.g., 2 years from now)
-                    specialization["expires_at"] = (
-                        datetime.now() + timedelta(days=730)
-                    ).isoformat()
+                    specialization["expires_at"] = now_ts() + 730 * DAY
 
-                self._save_data()
+                self._save_data(("specializations", trainer_id))
                 return True
 
         return False
@@ -207,12 +201,11 @@ class TrainerVerificationManager:
             "certifications": [],
             "specializations": []
         }
-        now = datetime.now()
+        now = now_ts()
 
         for cert_id, cert in self.certifications.items():
             if cert["expires_at"]:
-                expires_at = datetime.fromisoformat(cert["expires_at"])
-                if expires_at < now:
+                if cert["expires_at"] < now:
                     expired["certifications"].append({
                         "id": cert_id,
                         **cert
@@ -221,8 +214,7 @@ class TrainerVerificationManager:
         for trainer_id, specializations in self.specializations.items():
             for spec in specializations:
                 if spec["expires_at"]:
-                    expires_at = datetime.fromisoformat(spec["expires_at"])
-                    if expires_at < now:
+                    if spec["expires_at"] < now:
                         expired["specializations"].append({
                             "trainer_id": trainer_id,
                             **spec
@@ -233,6 +225,7 @@ class TrainerVerificationManager:
     def renew_verification(self, trainer_id: str, verification_type: str,
                          verification_id: str) -> bool:
         """Request renewal of an expired verification"""
+        changed = []
         if verification_type == "certification":
             if verification_id not in self.certifications:
                 return False
@@ -242,7 +235,8 @@ class TrainerVerificationManager:
                 return False
 
             cert["status"] = VerificationStatus.PENDING.value
-            cert["renewal_requested_at"] = datetime.now().isoformat()
+            cert["renewal_requested_at"] = now_ts()
+            changed.append(("certifications", verification_id))
 
         elif verification_type == "specialization":
             if trainer_id not in self.specializations:
@@ -251,10 +245,11 @@ class TrainerVerificationManager:
             for spec in self.specializations[trainer_id]:
                 if spec["id"] == verification_id:
                     spec["status"] = VerificationStatus.PENDING.value
-                    spec["renewal_requested_at"] = datetime.now().isoformat()
+                    spec["renewal_requested_at"] = now_ts()
+                    changed.append(("specializations", trainer_id))
                     break
             else:
                 return False
 
-        self._save_data()
+        self._save_data(*changed)
         return True 
\ No newline at end of file
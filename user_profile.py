@@ -1,21 +1,86 @@
-from datetime import datetime
-import json
 import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+import serialization
+from functools import cached_property
+from records import EmotionRecord, WorkoutRecord
+from storage import open_store
+from timeutils import now_ts, slice_range, to_epoch
 
-class UserProfile:
+class BaseUserProfile(ABC):
+    """
+    Operations shared by the JSON-backed UserProfile and SQLiteUserProfile.
+
+    History methods return WorkoutRecord/EmotionRecord lists in date order
+    whichever backend holds them.
+    """
+
+    @abstractmethod
+    def batch(self):
+        """Context manager grouping several mutations into one write"""
+
+    @abstractmethod
+    def create_profile(self, user_id, name, age, gender, weight, height, language="en"):
+        pass
+
+    @abstractmethod
+    def get_profile(self, user_id):
+        pass
+
+    @abstractmethod
+    def update_profile(self, user_id, **kwargs):
+        pass
+
+    @abstractmethod
+    def add_workout_record(self, user_id, workout_type, duration, intensity, notes=""):
+        pass
+
+    @abstractmethod
+    def add_emotion_record(self, user_id, emotion, intensity, notes=""):
+        pass
+
+    @abstractmethod
+    def get_workout_history(self, user_id):
+        pass
+
+    @abstractmethod
+    def get_emotion_history(self, user_id):
+        pass
+
+    @abstractmethod
+    def get_workout_history_range(self, user_id, start=None, end=None):
+        """Get workout records whose date falls within [start, end]"""
+
+    @abstractmethod
+    def get_emotion_history_range(self, user_id, start=None, end=None):
+        """Get emotion records whose date falls within [start, end]"""
+
+
+class UserProfile(BaseUserProfile):
     def __init__(self):
         self.profile_file = "user_profiles.json"
-        self.profiles = self._load_profiles()
+        self._store = open_store(self.profile_file, decode=self._decode_profiles)
+
+    @cached_property
+    def profiles(self):
+        return self._load_profiles()
 
     def _load_profiles(self):
-        if os.path.exists(self.profile_file):
-            with open(self.profile_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        return self._store.load({})
+
+    def _decode_profiles(self, profiles):
+        for profile in profiles.values():
+            profile["workout_history"] = [WorkoutRecord.from_dict(r) for r in profile.get("workout_history", [])]
+            profile["emotion_history"] = [EmotionRecord.from_dict(r) for r in profile.get("emotion_history", [])]
+        return profiles
 
-    def _save_profiles(self):
-        with open(self.profile_file, 'w', encoding='utf-8') as f:
-            json.dump(self.profiles, f, ensure_ascii=False, indent=4)
+    def _save_profiles(self, *paths):
+        self._store.save(self.profiles, *paths)
+
+    def batch(self):
+        return self._store.batch()
 
     def create_profile(self, user_id, name, age, gender, weight, height, language="en"):
         profile = {
@@ -25,15 +90,15 @@ class UserProfile:
             "weight": weight,
             "height": height,
             "language": language,
-            "created_at": datetime.now().isoformat(),
-            "last_updated": datetime.now().isoformat(),
+            "created_at": now_ts(),
+            "last_updated": now_ts(),
             "workout_history": [],
             "emotion_history": [],
             "goals": [],
             "achievements": []
         }
         self.profiles[user_id] = profile
-        self._save_profiles()
+        self._save_profiles((user_id,))
         return profile
 
     def get_profile(self, user_id):
@@ -42,38 +107,40 @@ class UserProfile:
     def update_profile(self, user_id, **kwargs):
         if user_id in self.profiles:
             profile = self.profiles[user_id]
+            changed = [(user_id, "last_updated")]
             for key, value in kwargs.items():
                 if key in profile:
                     profile[key] = value
-            profile["last_updated"] = datetime.now().isoformat()
-            self._save_profiles()
+                    changed.append((user_id, key))
+            profile["last_updated"] = now_ts()
+            self._save_profiles(*changed)
             return True
         return False
 
     def add_workout_record(self, user_id, workout_type, duration, intensity, notes=""):
         if user_id in self.profiles:
-            record = {
-                "date": datetime.now().isoformat(),
-                "type": workout_type,
-                "duration": duration,
-                "intensity": intensity,
-                "notes": notes
-            }
+            record = WorkoutRecord(
+                date=now_ts(),
+                type=workout_type,
+                duration=duration,
+                intensity=intensity,
+                notes=notes
+            )
             self.profiles[user_id]["workout_history"].append(record)
-            self._save_profiles()
+            self._save_profiles((user_id, "workout_history", -1))
             return True
         return False
 
     def add_emotion_record(self, user_id, emotion, intensity, notes=""):
         if user_id in self.profiles:
-            record = {
-                "date": datetime.now().isoformat(),
-                "emotion": emotion,
-                "intensity": intensity,
-                "notes": notes
-            }
+            record = EmotionRecord(
+                date=now_ts(),
+                emotion=emotion,
+                intensity=intensity,
+                notes=notes
+            )
             self.profiles[user_id]["emotion_history"].append(record)
-            self._save_profiles()
+            self._save_profiles((user_id, "emotion_history", -1))
             return True
         return False
 
@@ -85,4 +152,248 @@ class UserProfile:
     def get_emotion_history(self, user_id):
         if user_id in self.profiles:
             return self.profiles[user_id]["emotion_history"]
-        return [] 
\ No newline at end of file
+        return []
+
+    def get_workout_history_range(self, user_id, start=None, end=None):
+        """Get workout records whose date falls within [start, end]"""
+        return self._filter_by_date(self.get_workout_history(user_id), start, end)
+
+    def get_emotion_history_range(self, user_id, start=None, end=None):
+        """Get emotion records whose date falls within [start, end]"""
+        return self._filter_by_date(self.get_emotion_history(user_id), start, end)
+
+    def _filter_by_date(self, records, start, end):
+        # Records are appended in time order, so the range is a bisected slice
+        return slice_range(records, start, end)
+
+
+class SQLiteUserProfile(BaseUserProfile):
+    """
+    User profiles backed by SQLite, with one table per history type.
+
+    Workout and emotion records are indexed on (user_id, date), so adding a
+    record is a single-row insert and date range queries touch only the rows
+    in the window. Dates are epoch seconds. Value
+    columns are declared without a type so values round-trip unchanged.
+    The connection is shared between threads and serialized by a lock; a
+    batch() holds it until its transaction commits.
+    """
+
+    PROFILE_FIELDS = ["name", "age", "gender", "weight", "height", "language",
+                      "created_at", "last_updated"]
+    LIST_FIELDS = ["goals", "achievements"]
+    HISTORY_TABLES = {
+        "workout_history": ["date", "type", "duration", "intensity", "notes"],
+        "emotion_history": ["date", "emotion", "intensity", "notes"],
+    }
+    HISTORY_RECORDS = {
+        "workout_history": WorkoutRecord,
+        "emotion_history": EmotionRecord,
+    }
+
+    def __init__(self, db_path="user_profiles.db", import_from=None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._create_tables()
+        if import_from and os.path.exists(import_from):
+            self.import_json(import_from)
+
+    @contextmanager
+    def batch(self):
+        """Run every mutation inside the block in a single SQLite transaction"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                with self.conn if self._batch_depth == 1 else nullcontext():
+                    yield self
+            finally:
+                self._batch_depth -= 1
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            # Inside batch() the outer transaction commits everything at once
+            with nullcontext() if self._batch_depth else self.conn:
+                yield
+
+    def _fetch(self, query, params=()):
+        with self._lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    user_id TEXT PRIMARY KEY,
+                    name, age, gender, weight, height,
+                    language, created_at, last_updated,
+                    goals TEXT, achievements TEXT
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS workout_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL, date INTEGER NOT NULL,
+                    type, duration, intensity, notes
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS emotion_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL, date INTEGER NOT NULL,
+                    emotion, intensity, notes
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_workout_user_date ON workout_history (user_id, date)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_emotion_user_date ON emotion_history (user_id, date)")
+
+    def import_json(self, profile_file):
+        """Import profiles from a user_profiles.json file, skipping users already present"""
+        profiles = serialization.load(profile_file)
+        with self._transaction():
+            for user_id, profile in profiles.items():
+                if self._profile_exists(user_id):
+                    continue
+                self._insert_profile(user_id, profile)
+                for table, columns in self.HISTORY_TABLES.items():
+                    self._insert_history(table, columns, user_id, profile.get(table, []))
+
+    @staticmethod
+    def _encode_list(value):
+        return serialization.dumps(value, serialization.COMPACT).decode('utf-8')
+
+    def _profile_exists(self, user_id):
+        return bool(self._fetch("SELECT 1 FROM profiles WHERE user_id = ?", (user_id,)))
+
+    def _insert_profile(self, user_id, profile):
+        values = [profile.get(field) for field in self.PROFILE_FIELDS]
+        values += [self._encode_list(profile.get(field, [])) for field in self.LIST_FIELDS]
+        columns = ["user_id"] + self.PROFILE_FIELDS + self.LIST_FIELDS
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO profiles ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [user_id] + values
+        )
+
+    def _insert_history(self, table, columns, user_id, records):
+        self.conn.executemany(
+            f"INSERT INTO {table} (user_id, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})",
+            [[user_id, to_epoch(record["date"])] + [record.get(column) for column in columns[1:]]
+             for record in records]
+        )
+
+    def _query_history(self, table, user_id, start=None, end=None):
+        columns = self.HISTORY_TABLES[table]
+        query = f"SELECT {', '.join(columns)} FROM {table} WHERE user_id = ?"
+        params = [user_id]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(to_epoch(start))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(to_epoch(end))
+        query += " ORDER BY date, id"
+        record_type = self.HISTORY_RECORDS[table]
+        return [record_type(**dict(row)) for row in self._fetch(query, params)]
+
+    def create_profile(self, user_id, name, age, gender, weight, height, language="en"):
+        profile = {
+            "name": name,
+            "age": age,
+            "gender": gender,
+            "weight": weight,
+            "height": height,
+            "language": language,
+            "created_at": now_ts(),
+            "last_updated": now_ts(),
+            "workout_history": [],
+            "emotion_history": [],
+            "goals": [],
+            "achievements": []
+        }
+        with self._transaction():
+            # Recreating a profile starts it with empty history, as the JSON store does
+            for table in self.HISTORY_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+            self._insert_profile(user_id, profile)
+        return profile
+
+    def get_profile(self, user_id):
+        with self._lock:
+            rows = self._fetch("SELECT * FROM profiles WHERE user_id = ?", (user_id,))
+            if not rows:
+                return None
+            row = rows[0]
+            profile = {field: row[field] for field in self.PROFILE_FIELDS}
+            for field in self.LIST_FIELDS:
+                profile[field] = serialization.loads(row[field]) if row[field] else []
+            for table in self.HISTORY_TABLES:
+                profile[table] = self._query_history(table, user_id)
+            return profile
+
+    def update_profile(self, user_id, **kwargs):
+        assignments = {}
+        with self._transaction():
+            if not self._profile_exists(user_id):
+                return False
+            for key, value in kwargs.items():
+                if key in self.PROFILE_FIELDS:
+                    assignments[key] = value
+                elif key in self.LIST_FIELDS:
+                    assignments[key] = self._encode_list(value)
+                elif key in self.HISTORY_TABLES:
+                    self.conn.execute(f"DELETE FROM {key} WHERE user_id = ?", (user_id,))
+                    self._insert_history(key, self.HISTORY_TABLES[key], user_id, value)
+            assignments["last_updated"] = now_ts()
+            self.conn.execute(
+                f"UPDATE profiles SET {', '.join(f'{key} = ?' for key in assignments)} WHERE user_id = ?",
+                list(assignments.values()) + [user_id]
+            )
+        return True
+
+    def add_workout_record(self, user_id, workout_type, duration, intensity, notes=""):
+        record = {
+            "date": now_ts(),
+            "type": workout_type,
+            "duration": duration,
+            "intensity": intensity,
+            "notes": notes
+        }
+        with self._transaction():
+            if not self._profile_exists(user_id):
+                return False
+            self._insert_history("workout_history", self.HISTORY_TABLES["workout_history"], user_id, [record])
+        return True
+
+    def add_emotion_record(self, user_id, emotion, intensity, notes=""):
+        record = {
+            "date": now_ts(),
+            "emotion": emotion,
+            "intensity": intensity,
+            "notes": notes
+        }
+        with self._transaction():
+            if not self._profile_exists(user_id):
+                return False
+            self._insert_history("emotion_history", self.HISTORY_TABLES["emotion_history"], user_id, [record])
+        return True
+
+    def get_workout_history(self, user_id):
+        return self._query_history("workout_history", user_id)
+
+    def get_emotion_history(self, user_id):
+        return self._query_history("emotion_history", user_id)
+
+    def get_workout_history_range(self, user_id, start=None, end=None):
+        """Get workout records whose date falls within [start, end]"""
+        return self._query_history("workout_history", user_id, start, end)
+
+    def get_emotion_history_range(self, user_id, start=None, end=None):
+        """Get emotion records whose date falls within [start, end]"""
+        return self._query_history("emotion_history", user_id, start, end)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
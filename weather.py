@@ -0,0 +1,185 @@
+"""
+Current weather for AIEngine, fetched once per area and time window.
+
+Providers fetch asynchronously; WeatherService puts a cache in front of one,
+keyed on a rounded latitude/longitude and a time bucket, and coalesces
+concurrent lookups of the same area into a single request. FileWeatherProvider
+serves weather from a local JSON file for tests and offline runs.
+"""
+import asyncio
+import json
+import os
+import time
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import serialization
+from cache import TTLCache
+from timeutils import now_ts
+
+# OpenWeatherMap condition groups -> the conditions AIEngine understands
+CONDITIONS = {
+    "clear": "clear",
+    "clouds": "clouds",
+    "rain": "rain",
+    "drizzle": "rain",
+    "snow": "snow",
+    "thunderstorm": "storm",
+    "mist": "fog",
+    "fog": "fog",
+    "haze": "fog",
+}
+
+
+class WeatherError(Exception):
+    """Raised when weather for a location can't be fetched"""
+
+
+class WeatherProvider(ABC):
+    """Source of current weather as {"temperature", "condition", "humidity", "time_of_day"}"""
+
+    @abstractmethod
+    async def fetch(self, lat: float, lon: float) -> Dict:
+        """Current weather at (lat, lon); raises WeatherError when it can't be fetched"""
+
+
+def _run(coroutine):
+    """Run a coroutine to completion from synchronous code"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # asyncio.run can't nest, and blocking here would stall the caller's loop
+    coroutine.close()
+    raise RuntimeError("WeatherService's *_sync methods can't be called from a running event loop; "
+                       "await get() or get_many() instead")
+
+
+class OpenWeatherMapProvider(WeatherProvider):
+    """Current weather from the OpenWeatherMap API"""
+
+    url = "https://api.openweathermap.org/data/2.5/weather"
+
+    def __init__(self, api_key: str, timeout: float = 5):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _request(self, lat: float, lon: float) -> Dict:
+        query = urllib.parse.urlencode({"lat": lat, "lon": lon, "appid": self.api_key, "units": "metric"})
+        try:
+            with urllib.request.urlopen(f"{self.url}?{query}", timeout=self.timeout) as response:
+                return serialization.loads(response.read())
+        except (OSError, *serialization.DECODE_ERRORS) as e:
+            raise WeatherError(f"Weather lookup failed for ({lat}, {lon}): {e}") from e
+
+    async def fetch(self, lat: float, lon: float) -> Dict:
+        # urllib blocks, so the request runs in a worker thread
+        data = await asyncio.to_thread(self._request, lat, lon)
+        try:
+            group = data["weather"][0]["main"].lower()
+            return {
+                "temperature": data["main"]["temp"],
+                "condition": CONDITIONS.get(group, group),
+                "humidity": data["main"].get("humidity"),
+                "time_of_day": data.get("dt", now_ts())
+            }
+        except (KeyError, IndexError, TypeError) as e:
+            raise WeatherError(f"Unexpected weather response for ({lat}, {lon})") from e
+
+
+class FileWeatherProvider(WeatherProvider):
+    """
+    Weather read from a local JSON file, for tests and offline runs.
+
+    The file holds {"locations": {"<lat>,<lon>": weather}, "default": weather};
+    locations are matched after rounding to the file's "precision" (default 1).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.calls = 0
+
+    async def fetch(self, lat: float, lon: float) -> Dict:
+        self.calls += 1
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise WeatherError(f"Can't read weather file {self.path}: {e}") from e
+        precision = data.get("precision", 1)
+        key = f"{round(lat, precision)},{round(lon, precision)}"
+        weather = data.get("locations", {}).get(key, data.get("default"))
+        if weather is None:
+            raise WeatherError(f"No weather for ({lat}, {lon}) in {self.path}")
+        return {"time_of_day": now_ts(), **weather}
+
+
+class WeatherService:
+    """
+    Cached, coalescing front for a WeatherProvider.
+
+    Lookups are rounded to `precision` decimal degrees (1 is roughly 11 km) and
+    bucketed into `ttl`-second windows, so nearby users within the same window
+    share one fetch. Concurrent lookups of an area wait on the same request.
+    """
+
+    def __init__(self, provider: WeatherProvider, ttl: float = 600, precision: int = 1, maxsize: int = 10000):
+        self.provider = provider
+        self.ttl = ttl
+        self.precision = precision
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Cache key -> task fetching it
+        self._pending = {}
+
+    def _key(self, lat: float, lon: float) -> Tuple:
+        return round(lat, self.precision), round(lon, self.precision), int(time.time() // self.ttl)
+
+    async def get(self, lat: float, lon: float) -> Dict:
+        """Current weather near (lat, lon)"""
+        key = self._key(lat, lon)
+        weather = self.cache.get(key)
+        if weather is not None:
+            return weather
+        return await self._fetch(key)
+
+    async def _fetch(self, key: Tuple) -> Dict:
+        task = self._pending.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self.provider.fetch(key[0], key[1]))
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._pending.pop(key) if self._pending.get(key) is done else None)
+        weather = await asyncio.shield(task)
+        self.cache.set(key, weather)
+        return weather
+
+    async def get_many(self, locations: Iterable[Tuple[float, float]]) -> List[Dict]:
+        """Weather for each location; repeated areas are fetched once"""
+        return await asyncio.gather(*(self.get(lat, lon) for lat, lon in locations))
+
+    def get_sync(self, lat: float, lon: float) -> Dict:
+        """get() for synchronous callers; cache hits don't start an event loop"""
+        key = self._key(lat, lon)
+        weather = self.cache.get(key)
+        if weather is not None:
+            return weather
+        return _run(self._fetch(key))
+
+    def get_many_sync(self, locations: Iterable[Tuple[float, float]]) -> List[Dict]:
+        """get_many() for synchronous callers; when every area is cached no event loop is started"""
+        locations = list(locations)
+        cached = [self.cache.get(self._key(lat, lon)) for lat, lon in locations]
+        if all(weather is not None for weather in cached):
+            return cached
+        return _run(self.get_many(locations))
+
+
+def default_weather_service() -> Optional[WeatherService]:
+    """Service from the environment: FORMAMIND_WEATHER_FILE, else WEATHER_API_KEY, else None"""
+    ttl = float(os.getenv("FORMAMIND_WEATHER_TTL", 600))
+    if os.getenv("FORMAMIND_WEATHER_FILE"):
+        return WeatherService(FileWeatherProvider(os.getenv("FORMAMIND_WEATHER_FILE")), ttl=ttl)
+    if os.getenv("WEATHER_API_KEY"):
+        return WeatherService(OpenWeatherMapProvider(os.getenv("WEATHER_API_KEY")), ttl=ttl)
+    return None